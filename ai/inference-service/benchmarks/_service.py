@@ -0,0 +1,41 @@
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+PACKAGE_NAME = "inference_service"
+# The FastAPI app of the inference service
+APP_PATH = SERVICE_DIR.parents[1] / "backend" / "ingestion-service" / "main.py"
+
+def load_service() -> types.ModuleType:
+    """
+    Register the inference-service directory as an importable package so the
+    benchmarks can use its relative imports, e.g.
+    ``from inference_service.models.wildfire_heuristic import wildfire_model``.
+    """
+    package = sys.modules.get(PACKAGE_NAME)
+    if package is None:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [str(SERVICE_DIR)]
+        sys.modules[PACKAGE_NAME] = package
+    return package
+
+def load_app() -> types.ModuleType:
+    """
+    Import the FastAPI app module as ``inference_service.app`` (its ``app``
+    attribute is the ASGI app). It imports the service relatively and its
+    settings as the top-level ``config`` module, so the service directory
+    also goes on sys.path.
+    """
+    load_service()
+    name = f"{PACKAGE_NAME}.app"
+    module = sys.modules.get(name)
+    if module is None:
+        if str(SERVICE_DIR) not in sys.path:
+            sys.path.insert(0, str(SERVICE_DIR))
+        spec = importlib.util.spec_from_file_location(name, APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,131 @@
+"""
+Alert fan-out: indexes 100,000 synthetic alert regions (neighbourhood circles
+and some county-sized boxes around 150 towns across the continental US,
+mixed category and severity filters) and times the index build and incremental updates. Then
+matches 24-hour heuristic perimeters against them: brute force against every
+region, through the STRtree one perimeter at a time, and in batches as the
+matcher's consumer takes them. Finally sustains 500 predictions a second
+through a running matcher and reports the time from submit to publish.
+
+Run with: python benchmarks/bench_alerts.py
+"""
+import asyncio
+import time
+
+import numpy as np
+import shapely
+
+from _service import load_service
+
+load_service()
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+from inference_service.services.alert_matcher import (  # noqa: E402
+    ALERT_LATENCY_SECONDS, AlertIndex, AlertMatcher, MemoryAlertSource, MemoryNotificationPublisher
+)
+from inference_service.utils.metrics import STAGE_SECONDS  # noqa: E402
+from inference_service.utils.serialization import encode_json  # noqa: E402
+
+ALERTS = 100_000
+PREDICTIONS = 2_000
+RATE = 500
+CATEGORIES = [None, None, None, "wildfires", "wildfires", "severeStorms"]
+SEVERITIES = [None, None, "low", "medium", "high", "critical"]
+
+def alert(index: int, rng: np.random.Generator, centers: np.ndarray) -> dict:
+    lon, lat = centers[rng.integers(len(centers))] + rng.normal(0, 0.5, 2)
+    if rng.random() < 0.02:
+        size = rng.uniform(0.2, 0.5)
+        region = shapely.box(lon - size, lat - size / 2, lon + size, lat + size / 2)
+    else:
+        region = shapely.Point(lon, lat).buffer(rng.uniform(0.01, 0.08), quad_segs=8)
+    return {"id": index, "user_id": f"user-{index % 40_000}", "category_id": CATEGORIES[rng.integers(len(CATEGORIES))],
+            "min_severity": SEVERITIES[rng.integers(len(SEVERITIES))], "region": region}
+
+def prediction(index: int, rng: np.random.Generator, centers: np.ndarray):
+    lon, lat = centers[rng.integers(len(centers))] + rng.normal(0, 1.0, 2)
+    result = wildfire_model.predict(lon, lat, rng.uniform(5, 25), rng.uniform(0, 360), hours=24)
+    return ({"prediction_id": f"prediction-{index}", "event_id": f"EONET_{index}", "forecast_hours": 24,
+             "result": {"predicted_perimeter": result.predicted_perimeter}},
+            {"title": f"Fire {index}", "category": "wildfires", "severity": SEVERITIES[2 + index % 4]})
+
+def build(alerts) -> AlertIndex:
+    index = AlertIndex()
+    start = time.perf_counter()
+    index.replace(alerts)
+    print(f"indexed {len(alerts):,} alert regions in {(time.perf_counter() - start) * 1000:.0f} ms")
+    
+    rng = np.random.default_rng(2)
+    for count in (1, 100, 1000):
+        changed = [dict(alerts[i], user_id="moved") for i in rng.integers(len(alerts), size=count)]
+        start = time.perf_counter()
+        index.update(upserted=changed, removed=rng.integers(len(alerts), size=count).tolist())
+        print(f"  update of {count:>4} added + {count:>4} removed  {(time.perf_counter() - start) * 1000:8.2f} ms "
+              f"({len(index.delta_ids)} pending)")
+    index.replace(alerts)
+    return index
+
+def per_perimeter(index: AlertIndex, alerts, predictions) -> None:
+    regions = np.array([alert["region"] for alert in alerts], dtype=object)
+    sample = [shapely.from_geojson(encode_json(p["result"]["predicted_perimeter"]).decode()) for p, _ in predictions[:50]]
+    
+    start = time.perf_counter()
+    brute = [np.flatnonzero(shapely.intersects(regions, perimeter)) for perimeter in sample]
+    brute_ms = (time.perf_counter() - start) / len(sample) * 1000
+    
+    snapshot = index.snapshot
+    start = time.perf_counter()
+    tree = [snapshot.base.tree.query(perimeter, predicate="intersects") for perimeter in sample]
+    tree_ms = (time.perf_counter() - start) / len(sample) * 1000
+    assert all(set(b) == set(t) for b, t in zip(brute, tree))
+    hits = np.mean([len(t) for t in tree])
+    print(f"one perimeter: brute force {brute_ms:7.2f} ms, STRtree {tree_ms:6.3f} ms ({hits:.0f} regions intersect)")
+
+async def batches(index: AlertIndex, predictions) -> None:
+    for size in (1, 16, 64, 256):
+        matcher = AlertMatcher(MemoryAlertSource(), MemoryNotificationPublisher(), renotify_seconds=0)
+        matcher.index = index
+        STAGE_SECONDS.children.pop(("alert_match",), None)
+        published = 0
+        start = time.perf_counter()
+        for offset in range(0, len(predictions), size):
+            chunk = predictions[offset:offset + size]
+            published += len(await matcher.process([(time.perf_counter(), p, e) for p, e in chunk]))
+        elapsed = time.perf_counter() - start
+        print(f"batches of {size:>3}: {len(predictions) / elapsed:8,.0f} predictions/s, "
+              f"{published / len(predictions):5.1f} notifications each, "
+              f"match p50 {STAGE_SECONDS.labels('alert_match').quantile(0.5) * 1000:6.2f} ms per batch")
+
+async def sustained(index: AlertIndex, predictions) -> None:
+    matcher = AlertMatcher(MemoryAlertSource(), MemoryNotificationPublisher(max_items=10 ** 6), renotify_seconds=0)
+    await matcher.start()
+    matcher.index = index
+    ALERT_LATENCY_SECONDS.children.clear()
+    
+    # Arrivals in 10 ms ticks at RATE per second
+    per_tick = RATE // 100
+    start = time.perf_counter()
+    for tick in range(len(predictions) // per_tick):
+        chunk = predictions[tick * per_tick:(tick + 1) * per_tick]
+        matcher.submit([p for p, _ in chunk], [e for _, e in chunk])
+        await asyncio.sleep(max(0.0, start + (tick + 1) * 0.01 - time.perf_counter()))
+    while matcher.queue.qsize():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    stats = matcher.stats()
+    print(f"sustained {RATE}/s for {time.perf_counter() - start:.1f} s: {stats['published']:,} notifications, "
+          f"submit to publish p50 {stats['latency_ms_p50']:.1f} ms, p95 {stats['latency_ms_p95']:.1f} ms, "
+          f"{stats['dropped']} dropped")
+    await matcher.close()
+
+async def main() -> None:
+    rng = np.random.default_rng(0)
+    centers = rng.uniform([-123.0, 30.0], [-70.0, 48.0], (150, 2))
+    alerts = [alert(i, rng, centers) for i in range(ALERTS)]
+    predictions = [prediction(i, rng, centers) for i in range(PREDICTIONS)]
+    index = build(alerts)
+    per_perimeter(index, alerts, predictions)
+    await batches(index, predictions)
+    await sustained(index, predictions)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Build time, memory and per-perimeter lookup latency of the at-risk asset
+index with synthetic facilities and population cells over the western US.
+
+Run with: python benchmarks/bench_assets.py [n_assets]
+"""
+import sys
+import time
+
+import numpy as np
+
+from _service import load_service
+
+load_service()
+from inference_service.services.asset_index import AssetIndex, PointGridIndex  # noqa: E402
+from inference_service.utils.geo_utils import PreparedPerimeter, create_fire_spread_polygons, rings_to_geojson  # noqa: E402
+
+def main(n_assets: int = 1_000_000, n_perimeters: int = 1000) -> None:
+    rng = np.random.default_rng(0)
+    lon = rng.uniform(-125, -100, n_assets)
+    lat = rng.uniform(30, 50, n_assets)
+    
+    index = AssetIndex()
+    start = time.perf_counter()
+    index.infrastructure = PointGridIndex(lon, lat)
+    index.infrastructure_columns = {
+        "id": np.arange(n_assets),
+        "type": rng.choice(np.array(["school", "hospital", "substation", "road"], dtype=object), n_assets)
+    }
+    index.population = PointGridIndex(lon, lat)
+    index.population_counts = rng.integers(0, 500, n_assets).astype(float)
+    build = time.perf_counter() - start
+    
+    stats = index._stats(index.infrastructure, index.infrastructure_columns, 0, build / 2)
+    print(f"{n_assets:,} assets: built both indexes in {build:.2f}s, "
+          f"infrastructure index {stats['memory_mb']} MB")
+    
+    perimeters = rings_to_geojson(create_fire_spread_polygons(
+        rng.uniform(-124, -101, n_perimeters), rng.uniform(31, 49, n_perimeters),
+        rng.uniform(5, 40, n_perimeters), rng.uniform(0, 360, n_perimeters),
+        rng.integers(1, 13, n_perimeters)
+    ))
+    
+    # Spot-check against a brute-force scan
+    for perimeter in perimeters[:20]:
+        expected = np.flatnonzero(PreparedPerimeter(perimeter).contains(lon, lat))
+        assert np.array_equal(np.sort(index.infrastructure.query(PreparedPerimeter(perimeter))), expected)
+    
+    query_latencies = []
+    assess_latencies = []
+    hits = 0
+    for perimeter in perimeters:
+        start = time.perf_counter()
+        hits += len(index.infrastructure.query(PreparedPerimeter(perimeter)))
+        query_latencies.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        index.assess(perimeter)
+        assess_latencies.append(time.perf_counter() - start)
+    
+    for name, latencies in (("single index query", query_latencies),
+                            ("assess (facilities + population)", assess_latencies)):
+        latencies_ms = np.array(latencies) * 1e3
+        print(f"{name:<34} p50 {np.percentile(latencies_ms, 50):.3f} ms  "
+              f"p99 {np.percentile(latencies_ms, 99):.3f} ms")
+    print(f"avg {hits / n_perimeters:.0f} facilities inside each perimeter")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
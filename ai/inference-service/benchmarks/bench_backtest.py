@@ -0,0 +1,102 @@
+"""
+Backtesting throughput: writes a synthetic archive of past fires whose
+"observed" perimeters come from the heuristic run with the true weather
+(the archived parameters carry measurement noise), then replays it at
+1, 2, ... worker processes up to the core count and reports events/s and
+speedup. Finally kills a run part-way and resumes it from its results file,
+checking every event is scored exactly once.
+
+Run with: python benchmarks/bench_backtest.py [n_events] [--model ID]
+"""
+import argparse
+import gzip
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from _service import SERVICE_DIR, load_service
+
+load_service()
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+from inference_service.services.backtest import run_backtest  # noqa: E402
+
+def write_archive(path: str, n_events: int) -> None:
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(-123.5, -105, n_events), rng.uniform(32, 48, n_events)
+    wind_speed, wind_direction = rng.uniform(5, 35, n_events), rng.uniform(0, 360, n_events)
+    vegetation, temperature, humidity = rng.uniform(0.2, 0.9, n_events), rng.uniform(10, 40, n_events), rng.uniform(10, 70, n_events)
+    hours = rng.choice([6, 12, 24, 48], n_events)
+    observed = wildfire_model.predict_batch(lon, lat, wind_speed * rng.uniform(0.7, 1.3, n_events),
+                                            wind_direction + rng.normal(0, 20, n_events),
+                                            vegetation, temperature, humidity, hours)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for i in range(n_events):
+            record = {
+                "id": f"FIRE_{i}",
+                "title": f"Historical fire {i}",
+                "geometry": {"type": "Point", "coordinates": [round(lon[i], 4), round(lat[i], 4)]},
+                "observed_perimeter": observed[i].predicted_perimeter,
+                "parameters": {"wind_speed": round(wind_speed[i], 1), "wind_direction": round(wind_direction[i]),
+                               "vegetation_density": round(vegetation[i], 2), "temperature": round(temperature[i], 1),
+                               "humidity": round(humidity[i]), "forecast_hours": int(hours[i])}
+            }
+            if i % 97 == 0:
+                del record["observed_perimeter"]  # unusable: skipped
+            f.write(json.dumps(record) + "\n")
+
+def scaling(archive: str, directory: str, model: str) -> None:
+    cores = os.cpu_count() or 1
+    levels = sorted({1, 2, 4, cores} & set(range(1, cores + 1))) or [1]
+    base = None
+    for workers in levels:
+        output = os.path.join(directory, f"results-{workers}.jsonl")
+        summary = run_backtest(archive, output, model, workers=workers)
+        base = base or summary["events_per_second"]
+        print(f"{workers:>2} workers: {summary['events']:,} events in {summary['seconds']:.2f}s "
+              f"({summary['events_per_second']:,.0f} events/s, {summary['events_per_second'] / base:.2f}x), "
+              f"IoU mean {summary['iou_mean']:.3f}, spread MAE {summary['spread_error_km_mae']:.2f} km")
+    if cores == 1:
+        print("(one core available: speedup with workers cannot show on this machine)")
+
+def resume(archive: str, directory: str, model: str, n_events: int) -> None:
+    output = os.path.join(directory, "resumed.jsonl")
+    command = [sys.executable, str(SERVICE_DIR / "scripts" / "backtest.py"), archive, "--output", output,
+               "--chunk-size", "64", "--progress-every", "0"] + (["--model", model] if model else [])
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, start_new_session=True)
+    while not os.path.exists(output) or os.path.getsize(output) < 200_000:
+        time.sleep(0.01)
+    os.killpg(process.pid, signal.SIGKILL)
+    process.wait()
+    written = sum(1 for _ in open(output, "rb"))
+    
+    summary = run_backtest(archive, output, model)
+    ids = [json.loads(line)["id"] for line in open(output, "rb")]
+    expected = n_events - len(range(0, n_events, 97))
+    print(f"killed after {written:,} rows; resumed {summary['resumed']:,} and finished: "
+          f"{len(ids):,} rows, {len(set(ids)):,} unique of {expected:,} scorable events, summary covers {summary['events']:,}")
+    assert len(ids) == len(set(ids)) == expected == summary["events"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_events", type=int, nargs="?", default=20_000)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        archive = os.path.join(directory, "archive.jsonl.gz")
+        start = time.perf_counter()
+        write_archive(archive, args.n_events)
+        print(f"archive of {args.n_events:,} fires: {Path(archive).stat().st_size / 2 ** 20:.1f} MB gzip, "
+              f"{time.perf_counter() - start:.1f}s to write")
+        scaling(archive, directory, args.model)
+        resume(archive, directory, args.model, args.n_events)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Throughput of WildfireHeuristicModel.predict (one call per event) against
+predict_batch / predict_arrays at 1, 100 and 10,000 events.
+
+Run with: python benchmarks/bench_batch_predict.py
+"""
+import time
+
+import numpy as np
+
+from _service import load_service
+
+load_service()
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+
+SIZES = [1, 100, 10000]
+
+def make_inputs(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "center_lon": rng.uniform(-125, -100, n),
+        "center_lat": rng.uniform(30, 50, n),
+        "wind_speed": rng.uniform(0, 60, n),
+        "wind_direction": rng.uniform(0, 360, n),
+        "vegetation_density": rng.uniform(0, 1, n),
+        "temperature": rng.uniform(-5, 45, n),
+        "humidity": rng.uniform(5, 100, n),
+        "hours": rng.integers(1, 73, n)
+    }
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_loop(inputs: dict) -> None:
+    columns = {name: values.tolist() for name, values in inputs.items()}
+    for i in range(len(columns["center_lon"])):
+        wildfire_model.predict(**{name: values[i] for name, values in columns.items()})
+
+def main() -> None:
+    print(f"{'events':>8} {'loop ev/s':>14} {'batch ev/s':>14} {'arrays ev/s':>14} {'speedup':>9}")
+    for n in SIZES:
+        inputs = make_inputs(n)
+        repeats = 5 if n <= 100 else 2
+        loop_s = best_of(lambda: bench_loop(inputs), repeats)
+        batch_s = best_of(lambda: wildfire_model.predict_batch(**inputs), repeats)
+        arrays_s = best_of(lambda: wildfire_model.predict_arrays(**inputs), repeats)
+        print(f"{n:>8} {n / loop_s:>14,.0f} {n / batch_s:>14,.0f} {n / arrays_s:>14,.0f} {loop_s / batch_s:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Run time of the wildfire_cellular_v1 spread simulation by grid size and
+forecast length, next to the heuristic model for scale.
+
+Run with: python benchmarks/bench_cellular.py
+"""
+import time
+
+from _service import load_service
+
+load_service()
+from inference_service.models.wildfire_cellular import WildfireCellularModel  # noqa: E402
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+
+CASES = [(401, 6), (401, 72), (1001, 24), (1001, 72)]
+WEATHER = [("calm", 0), ("breezy", 20), ("windy", 60)]
+
+def main() -> None:
+    print(f"{'grid':>6} {'hours':>5} {'wind':>7} {'seconds':>8} {'area km2':>12} {'heuristic km2':>14}")
+    for grid_size, hours in CASES:
+        model = WildfireCellularModel(grid_size)
+        for label, wind_speed in WEATHER:
+            start = time.perf_counter()
+            result = model.predict(-120, 40, wind_speed, 270, 0.5, 25, 30, hours)
+            elapsed = time.perf_counter() - start
+            heuristic = wildfire_model.predict(-120, 40, wind_speed, 270, 0.5, 25, 30, hours)
+            print(f"{grid_size:>6} {hours:>5} {label:>7} {elapsed:>8.3f} "
+                  f"{result.area_affected_km2:>12,.1f} {heuristic.area_affected_km2:>14,.1f}")
+
+if __name__ == "__main__":
+    main()
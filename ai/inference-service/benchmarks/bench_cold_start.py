@@ -0,0 +1,118 @@
+"""
+Cold start of an inference-service replica: each run is a fresh interpreter
+that imports the app, runs its lifespan startup and serves two
+/predict/wildfire requests through the ASGI transport. Reports the median
+over runs of interpreter start, app import, lifespan startup (where the
+warm-up runs), time to the first prediction and the first and second
+request latencies. Then, from python -X importtime, the cumulative import
+time of every service module and of the third-party packages imported at
+top level.
+
+Run with: python benchmarks/bench_cold_start.py [--runs N] [--top N]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+STAGES = ["interpreter_ms", "import_ms", "startup_ms", "first_request_ms", "second_request_ms", "first_prediction_ms"]
+REQUEST = {"event_id": "EONET_COLD", "forecast_hours": 24, "wind_speed": 20.0, "wind_direction": 270.0}
+
+def child(spawned_at: float) -> None:
+    """
+    One cold start, timed from the parent's spawn; prints the stage times as JSON.
+    """
+    started = time.time()
+    # The client is harness, not service: keep its import out of the timings
+    import httpx
+    from _service import load_app
+    
+    start = time.perf_counter()
+    app_module = load_app()
+    imported = time.perf_counter()
+    
+    async def serve() -> Dict[str, float]:
+        app = app_module.app
+        async with app.router.lifespan_context(app):
+            ready = time.perf_counter()
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://cold") as client:
+                response = await client.post("/predict/wildfire", json=REQUEST)
+                response.raise_for_status()
+                first = time.perf_counter()
+                response = await client.post("/predict/wildfire", json=dict(REQUEST, event_id="EONET_COLD_2"))
+                response.raise_for_status()
+                second = time.perf_counter()
+        return {"ready": ready, "first": first, "second": second}
+    
+    times = asyncio.run(serve())
+    interpreter = (started - spawned_at) * 1000
+    print(json.dumps({
+        "interpreter_ms": interpreter,
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": (times["ready"] - imported) * 1000,
+        "first_request_ms": (times["first"] - times["ready"]) * 1000,
+        "second_request_ms": (times["second"] - times["first"]) * 1000,
+        "first_prediction_ms": interpreter + (times["first"] - start) * 1000
+    }))
+
+def run_child(importtime: bool = False) -> Tuple[Dict[str, float], str]:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + \
+              [str(Path(__file__).resolve()), "--child", repr(time.time())]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=Path(__file__).resolve().parent)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+def import_times(stderr: str) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Cumulative import ms of each inference_service module, and of each
+    third-party top-level package where it was first imported.
+    """
+    service: Dict[str, float] = {}
+    packages: Dict[str, float] = defaultdict(float)
+    stdlib = set(sys.stdlib_module_names)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        module = name.strip()
+        top = module.split(".")[0]
+        if top == "inference_service" or module == "config":
+            service[module] = int(cumulative) / 1000
+        elif top not in stdlib and not top.startswith("_") and module == top and top != "_service":
+            packages[top] = max(packages[top], int(cumulative) / 1000)
+    return service, dict(packages)
+
+def report(title: str, times: Dict[str, float], top: int) -> None:
+    print(f"\n{title}")
+    for name, ms in sorted(times.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<52} {ms:8.1f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        child(args.child)
+        return
+    
+    runs: List[Dict[str, float]] = [run_child()[0] for _ in range(args.runs)]
+    print(f"cold start, median of {args.runs} runs:")
+    for stage in STAGES:
+        values = [run[stage] for run in runs]
+        print(f"  {stage:<22} {statistics.median(values):8.1f} ms  (min {min(values):.1f}, max {max(values):.1f})")
+    
+    service, packages = import_times(run_child(importtime=True)[1])
+    report("service modules (cumulative import time, includes what each pulls in first):", service, args.top)
+    report("third-party packages (cumulative, where first imported):", packages, args.top)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Monte Carlo ensemble latency: members perturbed, evaluated in one array pass
+and reduced to burn-probability contours, for growing ensemble sizes. Also
+splits the N = 1000 run into its member and contour stages.
+
+Run with: python benchmarks/bench_ensemble.py
+"""
+import time
+
+from _service import load_service
+
+load_service()
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+from inference_service.utils.metrics import STAGE_SECONDS  # noqa: E402
+
+def run(members: int):
+    return wildfire_model.predict_ensemble(-120.0, 40.0, 25.0, 270.0, hours=24, members=members)
+
+def per_call_ms(members: int, repeats: int = 20) -> float:
+    run(members)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        run(members)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main() -> None:
+    for members in (100, 1000, 5000):
+        print(f"N = {members:>5}  {per_call_ms(members):8.2f} ms")
+    
+    stages = [STAGE_SECONDS.labels(stage) for stage in ("ensemble_members", "ensemble_contours")]
+    before = [(histogram.sum, histogram.count) for histogram in stages]
+    per_call_ms(1000)
+    for stage, histogram, (total, count) in zip(("members", "contours"), stages, before):
+        print(f"  {stage:<10} {(histogram.sum - total) / (histogram.count - count) * 1000:8.2f} ms")
+    
+    result = run(1000)
+    print("contours (probability, km²):",
+          [(c["probability"], round(c["area_km2"], 1)) for c in result.ensemble["burn_probability_contours"]])
+    print("spread distance quantiles (km):", {k: round(v, 2) for k, v in result.ensemble["spread_distance_km"].items()})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Speed of the geo_utils area and point-in-perimeter paths: the vectorized
+forms against the shapely-per-call path they replace. Their accuracy against
+known geodesic areas is checked by tests/test_geo_utils.py.
+
+Run with: python benchmarks/bench_geo.py
+"""
+import time
+
+import numpy as np
+from shapely.geometry import shape
+
+from _service import load_service
+
+load_service()
+from inference_service.utils.geo_utils import (  # noqa: E402
+    PreparedPerimeter,
+    calculate_affected_areas,
+    create_fire_spread_polygon,
+    create_fire_spread_polygons,
+    point_in_polygon
+)
+
+def bbox_area(geojson: dict) -> float:
+    """
+    The bounding-box estimate calculate_affected_area used to return.
+    """
+    bounds = shape(geojson).bounds
+    width_km = (bounds[2] - bounds[0]) * 111 * np.cos(np.radians(bounds[1]))
+    height_km = (bounds[3] - bounds[1]) * 111
+    return abs(width_km * height_km)
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def check_speed() -> None:
+    rng = np.random.default_rng(0)
+    print("Area of N perimeters")
+    for n in (100, 10000):
+        args = (rng.uniform(-125, -100, n), rng.uniform(30, 50, n), rng.uniform(1, 60, n),
+                rng.uniform(0, 360, n), rng.integers(1, 73, n))
+        rings = create_fire_spread_polygons(*args)
+        geojsons = [{"type": "Polygon", "coordinates": [ring]} for ring in rings.tolist()]
+        per_call = timed(lambda: [bbox_area(geojson) for geojson in geojsons])
+        batch = timed(lambda: calculate_affected_areas(rings))
+        print(f"  n={n:>6}: shapely per call {per_call * 1e3:>9.2f} ms   batch {batch * 1e3:>7.2f} ms   "
+              f"{per_call / batch:>7.1f}x")
+    
+    print("Points inside one perimeter")
+    perimeter = create_fire_spread_polygon(-120, 40, 30, 45, 24)
+    for n in (1000, 100000):
+        lon = rng.uniform(-121.5, -118.5, n)
+        lat = rng.uniform(39, 41, n)
+        per_call = timed(lambda: [point_in_polygon(x, y, perimeter) for x, y in zip(lon[:1000], lat[:1000])])
+        per_call *= n / 1000
+        prepared = timed(lambda: PreparedPerimeter(perimeter).contains(lon, lat))
+        print(f"  n={n:>6}: point_in_polygon {per_call * 1e3:>9.2f} ms   prepared {prepared * 1e3:>7.2f} ms   "
+              f"{per_call / prepared:>7.1f}x")
+
+if __name__ == "__main__":
+    check_speed()
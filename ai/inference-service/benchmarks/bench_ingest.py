@@ -0,0 +1,110 @@
+"""
+Streaming EONET ingestion: parse throughput and peak process memory for a
+synthetic archive, read from disk and from a local stub HTTP server. With
+DB_CONN_STRING set, also loads the archive into PostGIS and reports
+events/second and per-batch latency.
+
+Run with: python benchmarks/bench_ingest.py [n_events]
+"""
+import functools
+import gzip
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from _service import load_service
+
+load_service()
+from inference_service.services.event_ingest import (  # noqa: E402
+    event_rows, ingest_events, iter_batches, iter_eonet_events, open_feed
+)
+
+CATEGORIES = ["wildfires", "severeStorms", "volcanoes", "floods", "seaLakeIce"]
+
+def write_archive(path: str, n_events: int) -> None:
+    """
+    Write an EONET-format feed without holding it in memory.
+    """
+    rng = np.random.default_rng(0)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('{"title": "EONET Events", "description": "Synthetic archive", "events": [\n')
+        for i in range(n_events):
+            lon, lat = rng.uniform(-180, 180), rng.uniform(-60, 70)
+            event = {
+                "id": f"EONET_{i}",
+                "title": f"Synthetic event {i}",
+                "description": None,
+                "link": f"https://eonet.gsfc.nasa.gov/api/v3/events/EONET_{i}",
+                "closed": None,
+                "categories": [{"id": CATEGORIES[i % len(CATEGORIES)], "title": ""}],
+                "sources": [{"id": "InciWeb", "url": f"https://inciweb.example/{i}"}],
+                "geometry": [
+                    {"date": f"2024-07-{day:02d}T00:00:00Z", "type": "Point",
+                     "coordinates": [round(lon + day * 0.01, 4), round(lat, 4)]}
+                    for day in range(1, 1 + i % 4 + 1)
+                ]
+            }
+            f.write(("," if i else "") + json.dumps(event) + "\n")
+        f.write("]}\n")
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def parse(source: str, batch_size: int = 5000) -> dict:
+    start = time.perf_counter()
+    events = 0
+    with open_feed(source) as stream:
+        rows = (row for row in map(event_rows, iter_eonet_events(stream)) if row is not None)
+        for batch in iter_batches(rows, batch_size):
+            events += len(batch)
+    return {"events": events, "seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+def serve(directory: str) -> ThreadingHTTPServer:
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def report(label: str, result: dict) -> None:
+    print(f"{label}: {result['events']:,} events in {result['seconds']:.2f}s "
+          f"({result['events'] / result['seconds']:,.0f} events/s), "
+          f"peak RSS {result['peak_rss_mb']:.0f} MB")
+
+def main(n_events: int = 1_000_000) -> None:
+    print(f"Peak RSS before parsing: {peak_rss_mb():.0f} MB")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "eonet.json.gz")
+        start = time.perf_counter()
+        write_archive(path, n_events)
+        print(f"Wrote {n_events:,} events ({os.path.getsize(path) / 2 ** 20:.1f} MB gzipped) "
+              f"in {time.perf_counter() - start:.1f}s")
+        
+        report("parse (file)", parse(path))
+        
+        # The stub server sends the file as-is; the plain feed exercises the URL path
+        plain = os.path.join(directory, "eonet.json")
+        with gzip.open(path, "rb") as src, open(plain, "wb") as dst:
+            while chunk := src.read(1 << 20):
+                dst.write(chunk)
+        server = serve(directory)
+        try:
+            report("parse (http)", parse(f"http://127.0.0.1:{server.server_port}/eonet.json"))
+        finally:
+            server.shutdown()
+        
+        if os.getenv("DB_CONN_STRING"):
+            print(json.dumps(ingest_events(path, progress_every=20), indent=2))
+        else:
+            print("DB_CONN_STRING not set; skipping the PostGIS load")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
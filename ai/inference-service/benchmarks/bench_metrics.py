@@ -0,0 +1,66 @@
+"""
+Overhead of the stage timers: an empty `with timed(...)` block, a decorated
+sync and async function, and the same with Server-Timing collection active,
+against the bare call. Also times a /metrics render.
+
+Run with: python benchmarks/bench_metrics.py
+"""
+import asyncio
+import time
+
+from _service import load_service
+
+load_service()
+from inference_service.utils.metrics import _request_timings, metrics, timed  # noqa: E402
+
+def per_call_ns(fn, repeats: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e9
+
+def noop():
+    pass
+
+@timed("bench_sync")
+def timed_noop():
+    pass
+
+async def async_noop():
+    pass
+
+@timed("bench_async")
+async def timed_async_noop():
+    pass
+
+def with_block():
+    with timed("bench_block"):
+        pass
+
+async def per_call_ns_async(fn, repeats: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        await fn()
+    return (time.perf_counter() - start) / repeats * 1e9
+
+def main() -> None:
+    baseline = per_call_ns(noop)
+    print(f"bare call                {baseline:8.0f} ns")
+    print(f"with timed(...)          {per_call_ns(with_block) - baseline:8.0f} ns overhead")
+    print(f"@timed sync              {per_call_ns(timed_noop) - baseline:8.0f} ns overhead")
+
+    async_baseline = asyncio.run(per_call_ns_async(async_noop))
+    print(f"@timed async             {asyncio.run(per_call_ns_async(timed_async_noop)) - async_baseline:8.0f} ns overhead")
+
+    # Server-Timing collection appends to a per-request list; reset it as a request would
+    token = _request_timings.set([])
+    overhead = per_call_ns(with_block, 10_000) - baseline
+    _request_timings.reset(token)
+    print(f"with Server-Timing       {overhead:8.0f} ns overhead")
+
+    start = time.perf_counter()
+    body = metrics.render()
+    print(f"/metrics render          {(time.perf_counter() - start) * 1000:8.2f} ms ({len(body):,} bytes)")
+
+if __name__ == "__main__":
+    main()
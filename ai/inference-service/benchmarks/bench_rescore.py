@@ -0,0 +1,205 @@
+"""
+Incremental re-scoring of active wildfires: a few thousand synthetic fires
+over California whose weather (served by a local OpenWeatherMap stub, with
+diurnal cycles plus gusts) drifts between passes of 15 simulated minutes,
+while some fires are updated, new ones start and others go out. Each pass
+runs the scheduler once and, for comparison, a full periodic re-scoring of
+every active fire. Reports predictions performed against skipped, why the
+performed ones were needed and the model time saved; then runs the same
+scenario under a rate limit to show the queue draining highest severity first.
+
+Run with: python benchmarks/bench_rescore.py [--events N] [--passes N]
+"""
+import argparse
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+import numpy as np
+
+from _service import load_service
+
+# Every pass must see the drifted weather, not the cached cell
+os.environ["WEATHER_CACHE_BACKEND"] = "none"
+load_service()
+from inference_service.config import settings  # noqa: E402
+from inference_service.models.registry import model_registry  # noqa: E402
+from inference_service.schemas.prediction import WildfirePredictionRequest  # noqa: E402
+from inference_service.services.data_fetcher import data_fetcher  # noqa: E402
+from inference_service.services.prediction_service import prediction_service  # noqa: E402
+from inference_service.services.rescore_scheduler import (  # noqa: E402
+    MemoryActiveEventSource, RescoreScheduler, create_rescore_scheduler
+)
+
+PASS_HOURS = 0.25
+SEVERITIES = ("low", "medium", "high", "critical")
+
+class Weather:
+    """
+    Weather per ~1 km cell at simulated time `hours`: diurnal wind, temperature
+    and humidity cycles with a per-cell phase, plus gusts that change every pass.
+    """
+    
+    def __init__(self):
+        self.hours = 0.0
+    
+    def at(self, lat: float, lon: float) -> Dict[str, float]:
+        cell = (round(lat * 100), round(lon * 100))
+        phase = np.random.default_rng(abs(hash(cell)) % 2 ** 32).uniform(0, 1, 3)
+        gusts = np.random.default_rng(abs(hash((cell, round(self.hours / PASS_HOURS)))) % 2 ** 32).normal(0, 1, 2)
+        day = 2 * math.pi * self.hours / 24
+        return {
+            "wind_speed": max(0.0, 15 + 8 * math.sin(day + 2 * math.pi * phase[0]) + 1.5 * gusts[0]),
+            "wind_direction": (360 * phase[1] + 40 * math.sin(day / 1.5) + 5 * gusts[1]) % 360,
+            "temperature": 24 + 8 * math.sin(day + 2 * math.pi * phase[2]),
+            "humidity": 40 - 15 * math.sin(day + 2 * math.pi * phase[2])
+        }
+
+async def start_weather_stub(weather: Weather):
+    from aiohttp import web
+    
+    async def handle(request):
+        values = weather.at(float(request.query["lat"]), float(request.query["lon"]))
+        return web.json_response({
+            "main": {"temp": values["temperature"], "humidity": values["humidity"]},
+            "wind": {"speed": values["wind_speed"] / 3.6, "deg": values["wind_direction"]},
+            "weather": [{"main": "Clear"}]
+        })
+    
+    stub = web.Application()
+    stub.router.add_get("/weather", handle)
+    runner = web.AppRunner(stub, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    settings.OPENWEATHER_BASE_URL = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    settings.OPENWEATHER_API_KEY = "benchmark"
+    return runner
+
+class Fires:
+    """
+    The active fires: each pass about 2% are updated (new `updated`, sometimes
+    a new severity), 1% go out and as many start.
+    """
+    
+    def __init__(self, n: int, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.next_id = 0
+        self.now = datetime(2026, 8, 1, tzinfo=timezone.utc)
+        self.events: Dict[str, Dict[str, Any]] = {}
+        for _ in range(n):
+            self.start()
+    
+    def start(self) -> None:
+        lon, lat = self.rng.uniform([-123.5, 34.0], [-117.0, 41.5])
+        event_id = f"FIRE_{self.next_id}"
+        self.next_id += 1
+        self.events[event_id] = {
+            "id": event_id,
+            "title": f"Synthetic wildfire {event_id}",
+            "category": "wildfires",
+            "geometry": {"type": "Point", "coordinates": [round(float(lon), 4), round(float(lat), 4)]},
+            "acquired": self.now,
+            "updated": self.now,
+            "severity": SEVERITIES[int(self.rng.choice(4, p=[0.4, 0.3, 0.2, 0.1]))]
+        }
+    
+    def advance(self) -> None:
+        self.now += timedelta(hours=PASS_HOURS)
+        ids = list(self.events)
+        for event_id in self.rng.choice(ids, int(len(ids) * 0.02), replace=False):
+            event = dict(self.events[event_id], updated=self.now)
+            if self.rng.random() < 0.3:
+                event["severity"] = SEVERITIES[min(3, SEVERITIES.index(event["severity"]) + 1)]
+            self.events[event_id] = event
+        gone = self.rng.choice(ids, int(len(ids) * 0.01), replace=False)
+        for event_id in gone:
+            del self.events[event_id]
+        for _ in gone:
+            self.start()
+
+def sync(source: MemoryActiveEventSource, fires: Fires) -> None:
+    source.events = dict(fires.events)
+
+async def full_rescore(events: List[Dict[str, Any]]) -> float:
+    """
+    Re-score every active fire, as a periodic job would. Returns seconds.
+    """
+    start = time.perf_counter()
+    requests = [WildfirePredictionRequest(event_id=event["id"], forecast_hours=settings.RESCORE_FORECAST_HOURS)
+                for event in events]
+    for offset in range(0, len(requests), settings.RESCORE_BATCH_SIZE):
+        await prediction_service.predict_wildfire_batch(requests[offset:offset + settings.RESCORE_BATCH_SIZE],
+                                                        events[offset:offset + settings.RESCORE_BATCH_SIZE])
+    return time.perf_counter() - start
+
+def scheduler(max_per_minute: int) -> RescoreScheduler:
+    built = create_rescore_scheduler()
+    built.source = MemoryActiveEventSource()
+    built.max_per_minute = max_per_minute
+    built.tokens = float(max_per_minute)
+    return built
+
+async def savings(n_events: int, passes: int, weather: Weather) -> None:
+    fires = Fires(n_events)
+    rescore = scheduler(max_per_minute=10 ** 9)
+    incremental_seconds = full_seconds = 0.0
+    full_predictions = 0
+    print(f"{'pass':>4} {'active':>7} {'performed':>9} {'skipped':>8} {'pass ms':>8} {'full ms':>8}")
+    for index in range(passes):
+        sync(rescore.source, fires)
+        start = time.perf_counter()
+        counts = await rescore.run_once()
+        elapsed = time.perf_counter() - start
+        full = await full_rescore(list(fires.events.values()))
+        incremental_seconds += elapsed
+        full_seconds += full
+        full_predictions += len(fires.events)
+        print(f"{index:>4} {counts['active']:>7,} {counts['performed']:>9,} {counts['skipped']:>8,} "
+              f"{elapsed * 1000:8.0f} {full * 1000:8.0f}")
+        fires.advance()
+        weather.hours += PASS_HOURS
+    
+    stats = rescore.stats()
+    steady = stats["performed"] - n_events
+    print(f"\n{passes} passes over {PASS_HOURS * passes:.0f} simulated hours: {stats['performed']:,} re-scorings "
+          f"performed, {stats['skipped']:,} skipped of {full_predictions:,} a full periodic re-scoring runs "
+          f"(savings {stats['savings']:.1%}; after the first pass, {steady:,} of {full_predictions - n_events:,})")
+    print(f"reasons: {stats['reasons']}, coalesced {stats['coalesced']}, retired {stats['retired']}")
+    print(f"time: incremental {incremental_seconds:.2f}s (weather lookups included) vs full {full_seconds:.2f}s "
+          f"(weather fetched inside the batch)")
+
+async def rate_limited(n_events: int, weather: Weather) -> None:
+    fires = Fires(n_events, seed=1)
+    rescore = scheduler(max_per_minute=n_events // 4)
+    sync(rescore.source, fires)
+    counts = await rescore.run_once()
+    queued = [entry["event"]["severity"] for entry in rescore.pending.values()]
+    scored = [fires.events[event_id]["severity"] for event_id in rescore.scored]
+    print(f"\nrate limit of {rescore.max_per_minute:,}/min, {n_events:,} new fires: performed {counts['performed']:,}, "
+          f"deferred {counts['deferred']:,}")
+    print("  re-scored by severity: " + ", ".join(f"{s} {scored.count(s)}" for s in SEVERITIES))
+    print("  still queued:          " + ", ".join(f"{s} {queued.count(s)}" for s in SEVERITIES))
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--passes", type=int, default=24)
+    args = parser.parse_args()
+    
+    model_registry.load()
+    weather = Weather()
+    runner = await start_weather_stub(weather)
+    try:
+        await savings(args.events, args.passes, weather)
+        await rate_limited(args.events, weather)
+    finally:
+        await data_fetcher.close_session()
+        await runner.cleanup()
+        model_registry.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Bytes on the wire (raw and gzipped) and encode time per prediction response:
+the previous pydantic path (result.model_dump() nested into PredictionResponse, then
+FastAPI's jsonable_encoder + json.dumps) against orjson with full-precision,
+rounded, simplified and polyline-encoded perimeters.
+
+Run with: python benchmarks/bench_serialization.py
+"""
+import gzip
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from _service import load_service
+
+load_service()
+from inference_service.models.wildfire_cellular import WildfireCellularModel  # noqa: E402
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+from inference_service.schemas.prediction import PredictionResponse  # noqa: E402
+from inference_service.utils.serialization import compact_prediction, encode_json, prepare_geometry  # noqa: E402
+
+def per_call_us(fn, repeats: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+def as_prediction(result, precision=None, tolerance=0.0) -> dict:
+    result = dict(result)
+    if precision is not None:
+        result["predicted_perimeter"] = prepare_geometry(result["predicted_perimeter"], precision, tolerance)
+        if result.get("hourly_perimeters"):
+            result["hourly_perimeters"] = [
+                {**hour, "perimeter": prepare_geometry(hour["perimeter"], precision, tolerance)}
+                for hour in result["hourly_perimeters"]
+            ]
+    return {
+        "prediction_id": str(uuid.uuid4()),
+        "event_id": "EONET_1234",
+        "model_type": "wildfire",
+        "forecast_hours": 24,
+        "generated_at": datetime.now(timezone.utc),
+        "confidence": 0.7,
+        "result": result,
+        "metadata": {"model_name": "bench", "model_version": "1.0.0"}
+    }
+
+def pydantic_path(result) -> bytes:
+    response = PredictionResponse(
+        prediction_id=str(uuid.uuid4()), event_id="EONET_1234", model_type="wildfire",
+        forecast_hours=24, generated_at=datetime.now(timezone.utc), confidence=0.7,
+        result=result.model_dump(), metadata={"model_name": "bench", "model_version": "1.0.0"}
+    )
+    response.model_dump()  # stored copy
+    return json.dumps(jsonable_encoder(response)).encode()
+
+def report(label: str, body: bytes, encode_us: float) -> None:
+    print(f"  {label:<28} {len(body):>9,} B  {len(gzip.compress(body)):>8,} B gzip  {encode_us:>9.1f} us")
+
+def main(repeats: int = 200) -> None:
+    results = {
+        "heuristic (6 h)": wildfire_model.predict(-120.0, 40.0, 25.0, 270.0, hours=6),
+        "cellular (24 h, hourly)": WildfireCellularModel().predict(-120.0, 40.0, 25.0, 270.0, hours=24)
+    }
+    for name, result in results.items():
+        print(f"{name}:")
+        report("pydantic + json", pydantic_path(result), per_call_us(lambda: pydantic_path(result), repeats))
+        report("orjson, full precision", encode_json(as_prediction(result)),
+               per_call_us(lambda: encode_json(as_prediction(result)), repeats))
+        report("orjson, 5 decimals", encode_json(as_prediction(result, 5)),
+               per_call_us(lambda: encode_json(as_prediction(result, 5)), repeats))
+        report("orjson, 5 dp + simplify 1e-4", encode_json(as_prediction(result, 5, 1e-4)),
+               per_call_us(lambda: encode_json(as_prediction(result, 5, 1e-4)), repeats))
+        rounded = as_prediction(result, 5)
+        report("compact (polyline)", encode_json(compact_prediction(rounded, 5)),
+               per_call_us(lambda: encode_json(compact_prediction(rounded, 5)), repeats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Streaming predictions: time to the first hourly perimeter against the whole
+72-hour run, and peak Python memory while a stream is consumed against
+materializing every hour, for both wildfire models. Then through the
+cellular model's worker pool: first-perimeter latency, a slow client pacing
+the worker (it stays a few hours ahead rather than finishing), and an
+abandoned stream releasing its worker.
+
+Run with: python benchmarks/bench_streaming.py
+"""
+import asyncio
+import time
+import tracemalloc
+
+from _service import load_service
+
+load_service()
+from inference_service.config import settings  # noqa: E402
+from inference_service.models.registry import ModelRegistry  # noqa: E402
+
+EVENT = {"geometry": {"type": "Point", "coordinates": [-120.0, 40.0]}}
+PARAMETERS = {"wind_speed": 25.0, "wind_direction": 270.0, "vegetation_density": 0.6,
+              "temperature": 30.0, "humidity": 20.0, "forecast_hours": 72}
+
+def first_and_total_ms(model) -> tuple:
+    start = time.perf_counter()
+    generator = model.stream_from_event(EVENT, PARAMETERS)
+    next(generator)
+    first = time.perf_counter() - start
+    for _ in generator:
+        pass
+    return first * 1000, (time.perf_counter() - start) * 1000
+
+def peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+def consume(model) -> None:
+    for _ in model.stream_from_event(EVENT, PARAMETERS):
+        pass
+
+def materialize(model) -> None:
+    list(model.stream_from_event(EVENT, PARAMETERS))
+
+async def pool_stream(registry, handle) -> None:
+    await registry.warm_pools()
+    # The first stream also starts the manager process that owns the stream queues
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        async for kind, _ in handle.stream("stream_from_event", EVENT, PARAMETERS):
+            if kind == "item":
+                print(f"  first perimeter through the pool ({label}) {(time.perf_counter() - start) * 1000:8.1f} ms")
+                break
+    
+    # The client takes 20 ms per hour; an unpaced worker would finish in ~1 s and sit on 72 hours
+    start = time.perf_counter()
+    hours = 0
+    async for kind, _ in handle.stream("stream_from_event", EVENT, PARAMETERS, buffer=settings.STREAM_BUFFER_HOURS):
+        hours += kind == "item"
+        await asyncio.sleep(0.02)
+    print(f"  slow client, {hours} hours                {(time.perf_counter() - start) * 1000:8.1f} ms (paced by the client)")
+    
+    # Abandon streams after one hour on every worker, then check the pool still answers
+    for _ in range(handle.workers):
+        async for _ in handle.stream("stream_from_event", EVENT, PARAMETERS):
+            break
+    start = time.perf_counter()
+    await handle.run("predict_from_event", EVENT, {**PARAMETERS, "forecast_hours": 6})
+    print(f"  6 h run after abandoned streams        {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+def main() -> None:
+    registry = ModelRegistry(settings.MODEL_DIR, pool_workers=1)
+    registry.load()
+    for handle in registry.handles.values():
+        model = handle.model
+        first, total = first_and_total_ms(model)
+        print(f"{handle.model_name}: first perimeter {first:8.2f} ms of {total:8.2f} ms; "
+              f"peak memory streaming {peak_mb(lambda: consume(model)):6.2f} MB, "
+              f"all 72 hours held {peak_mb(lambda: materialize(model)):6.2f} MB")
+    
+    handle = registry.get("wildfire_cellular_v1")
+    print(f"{handle.model_name} in its worker pool:")
+    asyncio.run(pool_stream(registry, handle))
+    registry.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Vector tiles: loads 5,000 synthetic California fires with 24-hour heuristic
+perimeters into the in-memory tile source and times cold tile builds per zoom
+level (features per tile and encoded size alongside). Then replays a map
+session (viewports of 4 x 3 tiles panning around hot spots at zooms 5-11)
+through the tile cache, with and without a new prediction every 50 tile
+requests invalidating the tiles it touches, and reports the hit rate.
+
+Run with: python benchmarks/bench_tiles.py
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from _service import load_service
+
+load_service()
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+from inference_service.services.tile_service import MemoryTileSource, TileCache, TileService  # noqa: E402
+from inference_service.utils.mvt import tile_range  # noqa: E402
+
+EVENTS = 5_000
+ZOOMS = range(5, 12)
+
+def fire(index: int, lon: float, lat: float, rng: np.random.Generator):
+    event = {"id": f"EONET_{index}", "title": f"Fire {index}", "category": "wildfires", "severity": "high",
+             "geometry": {"type": "Point", "coordinates": [lon, lat]}}
+    result = wildfire_model.predict(lon, lat, rng.uniform(5, 40), rng.uniform(0, 360), hours=24)
+    prediction = {
+        "prediction_id": f"prediction-{index}-{rng.integers(1 << 30)}",
+        "event_id": event["id"],
+        "forecast_hours": 24,
+        "generated_at": datetime.now(timezone.utc),
+        "confidence": 0.7,
+        "result": {"predicted_perimeter": result.predicted_perimeter},
+        "metadata": {"model_name": wildfire_model.model_name}
+    }
+    return prediction, event
+
+def load(service: TileService, rng: np.random.Generator):
+    # Fires cluster around a few hot spots, as in a bad season
+    centers = rng.uniform([-123.5, 34.0], [-117.0, 41.5], (12, 2))
+    fires = []
+    for index in range(EVENTS):
+        lon, lat = centers[index % len(centers)] + rng.normal(0, 0.4, 2)
+        fires.append(fire(index, lon, lat, rng))
+    start = time.perf_counter()
+    service.record_predictions([p for p, _ in fires], [e for _, e in fires])
+    print(f"recorded {EVENTS:,} events in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return centers, fires
+
+async def cold_builds(service: TileService, centers: np.ndarray) -> None:
+    for z in ZOOMS:
+        x0, y0, x1, y1 = tile_range((*centers[0], *centers[0]), z, margin=1)
+        keys = [(z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+        service.cache.clear()
+        start = time.perf_counter()
+        tiles = [await service.get(*key) for key in keys]
+        elapsed = (time.perf_counter() - start) / len(keys) * 1000
+        sizes = [len(tile) for tile, _ in tiles]
+        print(f"z{z:<2}  cold build {elapsed:8.2f} ms/tile  {np.mean(sizes) / 1024:7.1f} KB/tile "
+              f"(max {max(sizes) / 1024:.1f} KB)")
+
+async def session(service: TileService, centers: np.ndarray, fires, rng: np.random.Generator, churn: bool) -> None:
+    service.cache.clear()
+    service.cache.counters = dict.fromkeys(service.cache.counters, 0)
+    requests = 0
+    start = time.perf_counter()
+    for _ in range(400):
+        z = int(rng.integers(ZOOMS.start, ZOOMS.stop))
+        lon, lat = centers[rng.integers(len(centers))] + rng.normal(0, 0.15, 2)
+        x0, y0, _, _ = tile_range((lon, lat, lon, lat), z)
+        for x in range(x0 - 1, x0 + 3):
+            for y in range(y0 - 1, y0 + 2):
+                await service.get(z, x, y)
+                requests += 1
+                if churn and requests % 50 == 0:
+                    prediction, event = fires[rng.integers(len(fires))]
+                    service.record_predictions([fire(int(event["id"].split("_")[1]), *event["geometry"]["coordinates"], rng)[0]], [event])
+    elapsed = time.perf_counter() - start
+    stats = service.stats()
+    print(f"{'with' if churn else 'no  '} churn: {requests:,} tile requests in {elapsed:.2f} s "
+          f"({elapsed / requests * 1000:.2f} ms avg), hit rate {stats['hit_rate']:.1%}, "
+          f"{stats['invalidated']} invalidated, {stats['tiles_cached']} cached ({stats['cache_mb']} MB)")
+
+async def main() -> None:
+    rng = np.random.default_rng(0)
+    service = TileService(MemoryTileSource(max_events=EVENTS), TileCache(64 * 2 ** 20))
+    centers, fires = load(service, rng)
+    await cold_builds(service, centers)
+    await session(service, centers, fires, np.random.default_rng(1), churn=False)
+    await session(service, centers, fires, np.random.default_rng(1), churn=True)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+NDVI vegetation lookups: writes four synthetic tiled, deflate-compressed
+GeoTIFFs (4096 x 4096 int16 NDVI at ~250 m, like MODIS 16-day composites)
+and times cold and warm point lookups, 10k-point batches and perimeter
+footprints, with the tile cache's memory. Ends with the cache size needed
+to hold a whole region in memory.
+
+Run with: python benchmarks/bench_vegetation.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from _service import load_service
+
+load_service()
+from inference_service.services.vegetation_raster import VegetationRaster  # noqa: E402
+from inference_service.utils.geo_utils import create_fire_spread_polygon  # noqa: E402
+
+PIXEL_DEG = 0.0025  # ~250 m
+SIZE = 4096
+
+def write_rasters(directory: str) -> list:
+    rng = np.random.default_rng(0)
+    paths = []
+    for row in range(2):
+        for col in range(2):
+            path = os.path.join(directory, f"ndvi_{row}_{col}.tif")
+            # Smooth field plus noise, scaled by 10000 as in MODIS products
+            y, x = np.mgrid[0:SIZE, 0:SIZE] / SIZE
+            ndvi = 0.45 + 0.3 * np.sin(6 * x + row) * np.cos(5 * y + col) + rng.normal(0, 0.05, (SIZE, SIZE))
+            profile = {
+                "driver": "GTiff", "width": SIZE, "height": SIZE, "count": 1, "dtype": "int16",
+                "crs": "EPSG:4326", "nodata": -3000, "tiled": True, "blockxsize": 256, "blockysize": 256,
+                "compress": "deflate",
+                "transform": from_origin(-124 + col * SIZE * PIXEL_DEG, 42 - row * SIZE * PIXEL_DEG, PIXEL_DEG, PIXEL_DEG)
+            }
+            with rasterio.open(path, "w", **profile) as dataset:
+                dataset.write((ndvi * 10000).astype(np.int16), 1)
+                dataset.scales = (1e-4,)
+            paths.append(path)
+    return paths
+
+def timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_rasters(directory)
+        extent = 2 * SIZE * PIXEL_DEG
+        rng = np.random.default_rng(1)
+        lats = rng.uniform(42 - extent, 42, 10_000)
+        lons = rng.uniform(-124, -124 + extent, 10_000)
+        ring = np.array(create_fire_spread_polygon(-122.0, 40.0, 25.0, 270.0, 24)["coordinates"][0])
+        
+        raster = VegetationRaster(paths, cache_bytes=512 * 2 ** 20)
+        print(f"one point      cold {timed_ms(lambda: raster.sample(lats[:1], lons[:1])):8.2f} ms"
+              f"   warm {timed_ms(lambda: raster.sample(lats[:1], lons[:1])):8.3f} ms")
+        raster.cache.clear()
+        print(f"10k points     cold {timed_ms(lambda: raster.sample(lats, lons)):8.2f} ms"
+              f"   warm {timed_ms(lambda: raster.sample(lats, lons)):8.3f} ms")
+        raster.cache.clear()
+        print(f"footprint      cold {timed_ms(lambda: raster.footprint(ring)):8.2f} ms"
+              f"   warm {timed_ms(lambda: raster.footprint(ring)):8.3f} ms   {raster.footprint(ring)}")
+        raster.cache.clear()
+        
+        raster.sample(lats, lons)
+        stats = raster.stats()
+        tile_bytes = raster.cache.bytes / len(raster.cache.tiles)
+        tile_km2 = (256 * PIXEL_DEG * 111) ** 2 * np.cos(np.radians(40))
+        print(f"cache: {stats['tiles_cached']} tiles, {stats['cache_mb']} MB "
+              f"({tile_bytes / 2 ** 10:.0f} KB per tile, ~{tile_km2:,.0f} km² each)")
+        for region, area_km2 in (("California", 424_000), ("CONUS", 8_080_000), ("North America", 24_700_000)):
+            print(f"  all of {region:<14} {area_km2 / tile_km2 * tile_bytes / 2 ** 20:10,.0f} MB of tiles")
+        
+        # A cache smaller than the working set keeps evicting
+        small = VegetationRaster(paths, cache_bytes=8 * 2 ** 20)
+        small.sample(lats, lons)
+        print(f"8 MB cache, 10k points: {timed_ms(lambda: small.sample(lats, lons)):8.2f} ms, "
+              f"{small.stats()['tile_evictions']} evictions")
+
+if __name__ == "__main__":
+    main()
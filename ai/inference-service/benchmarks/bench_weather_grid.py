@@ -0,0 +1,56 @@
+"""
+Offline forecast grid lookups: writes a synthetic 72-hour grid (hourly u/v
+wind, temperature, humidity over California at 0.05 degrees), memory-maps it
+and times vectorized point lookups and hourly series at growing point counts,
+including the per-point dict building DataFetcher returns.
+
+Run with: python benchmarks/bench_weather_grid.py
+"""
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from _service import load_service
+
+load_service()
+from inference_service.services.weather_grid import GRID_VARIABLES, WeatherGrid  # noqa: E402
+
+def write_grid(directory: str, steps: int = 73, rows: int = 200, cols: int = 240) -> float:
+    rng = np.random.default_rng(0)
+    time0 = time.time() - 3600
+    with open(os.path.join(directory, "grid.json"), "w") as f:
+        json.dump({"lon0": -124.5, "lat0": 32.5, "dlon": 0.05, "dlat": 0.05, "time0": time0, "step_hours": 1}, f)
+    for name in GRID_VARIABLES:
+        np.save(os.path.join(directory, f"{name}.npy"), rng.normal(10, 5, (steps, rows, cols)).astype(np.float32))
+    return time0
+
+def timed_ms(fn, repeats: int = 5) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        write_grid(directory)
+        start = time.perf_counter()
+        grid = WeatherGrid(directory)
+        print(f"open (memory-map) {(time.perf_counter() - start) * 1000:8.2f} ms  {grid.describe()['shape']}")
+        
+        rng = np.random.default_rng(1)
+        for points in (1, 1_000, 10_000):
+            lats = rng.uniform(33, 41, points)
+            lons = rng.uniform(-124, -113, points)
+            now = time.time()
+            current = timed_ms(lambda: grid.sample(lats, lons, np.full(points, now)))
+            series = timed_ms(lambda: grid.series(lats, lons, now, 24))
+            dicts = timed_ms(lambda: grid.lookup(lats, lons, 24, now))
+            print(f"{points:>6} points  current {current:8.2f} ms  24 h series {series:8.2f} ms  "
+                  f"as weather dicts {dicts:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
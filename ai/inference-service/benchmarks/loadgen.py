@@ -0,0 +1,258 @@
+"""
+Load generator for the /predict/wildfire request path. OpenWeatherMap is
+replaced by a local stub server answering after a fixed latency, and the
+events database by synthetic wildfires spread over California (a few hundred
+event ids, so the weather and prediction caches see a realistic mix of hits).
+Requests come from a closed loop of concurrent clients; reported are
+requests/s, latency percentiles, errors and the server's resident memory.
+
+Run in-process (ASGI transport, no sockets):
+    python benchmarks/loadgen.py --duration 10 --concurrency 16
+Against a local uvicorn serving the app with the same stubs:
+    python benchmarks/loadgen.py --serve --port 8765
+Against a service already running (with its own dependencies):
+    python benchmarks/loadgen.py --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import zlib
+from typing import Dict, Any, Optional, List, Sequence
+
+import numpy as np
+
+from _service import load_app, load_service
+
+load_service()
+from inference_service.config import settings  # noqa: E402
+
+EVENTS = 500
+WEATHER_LATENCY_SECONDS = 0.02
+
+def synthetic_event(event_id: str) -> Dict[str, Any]:
+    """
+    A wildfire somewhere in California, always the same one for an event id.
+    """
+    rng = np.random.default_rng(zlib.crc32(event_id.encode()))
+    lon, lat = rng.uniform([-123.5, 34.0], [-117.0, 41.5])
+    return {
+        "id": event_id,
+        "title": f"Synthetic wildfire {event_id}",
+        "category": "wildfires",
+        "geometry": {"type": "Point", "coordinates": [round(float(lon), 4), round(float(lat), 4)]},
+        "severity": ("low", "medium", "high", "critical")[int(rng.integers(4))]
+    }
+
+async def start_weather_stub(latency: float):
+    """
+    Serve OpenWeatherMap's /weather on a free local port. Returns the aiohttp
+    runner (to clean up) and the base URL to use as OPENWEATHER_BASE_URL.
+    """
+    from aiohttp import web
+    
+    async def weather(request):
+        await asyncio.sleep(latency)
+        lat, lon = float(request.query["lat"]), float(request.query["lon"])
+        return web.json_response({
+            "main": {"temp": 25 + (lat % 1) * 10, "humidity": 20 + (lon % 1) * 30},
+            "wind": {"speed": 2 + (lat * lon) % 10, "deg": (lon * 37) % 360},
+            "weather": [{"main": "Clear"}]
+        })
+    
+    stub = web.Application()
+    stub.router.add_get("/weather", weather)
+    runner = web.AppRunner(stub, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+async def install_stubs(app_module, weather_latency: float):
+    """
+    Point the app at the weather stub and the synthetic events. Returns the stub's runner.
+    """
+    runner, base_url = await start_weather_stub(weather_latency)
+    settings.OPENWEATHER_BASE_URL = base_url
+    settings.OPENWEATHER_API_KEY = "benchmark"
+    
+    async def fetch_event_data(event_id: str) -> Optional[Dict[str, Any]]:
+        return synthetic_event(event_id)
+    
+    app_module.fetch_event_data = fetch_event_data
+    return runner
+
+def request_bodies(seed: int = 0):
+    """
+    Endless /predict/wildfire bodies: random events and forecast windows; half
+    leave the weather to be fetched, the rest give all of it (wind with some
+    jitter) so they skip the weather lookup.
+    """
+    rng = np.random.default_rng(seed)
+    while True:
+        body = {"event_id": f"BENCH_{int(rng.integers(EVENTS))}", "forecast_hours": int(rng.choice([6, 12, 24]))}
+        if rng.random() < 0.5:
+            body.update(wind_speed=round(float(rng.uniform(5, 40)), 1),
+                        wind_direction=round(float(rng.uniform(0, 360)), 0),
+                        vegetation_density=round(float(rng.uniform(0.2, 0.9)), 2),
+                        # Fixed rather than drawn, so the sequence of events and windows is unchanged
+                        temperature=20.0,
+                        humidity=50.0)
+        yield body
+
+async def drive(client, duration: float, concurrency: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Keep `concurrency` requests in flight for `duration` seconds.
+    """
+    bodies = request_bodies(seed)
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            body = next(bodies)
+            start = time.perf_counter()
+            try:
+                response = await client.post("/predict/wildfire", json=body)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    milliseconds = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(milliseconds, 50)), 2),
+        "p95_ms": round(float(np.percentile(milliseconds, 95)), 2),
+        "p99_ms": round(float(np.percentile(milliseconds, 99)), 2),
+        "max_ms": round(float(milliseconds.max()), 2)
+    }
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """
+    Resident memory of a process (this one by default), from /proc where
+    available, else this process' peak from getrusage.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20, 1)
+
+async def run_in_process(duration: float,
+                         levels: Sequence[int],
+                         weather_latency: float = WEATHER_LATENCY_SECONDS,
+                         warmup: float = 1.0) -> Dict[int, Dict[str, Any]]:
+    """
+    Drive the app through httpx's ASGI transport at each concurrency level in
+    turn, inside one run of its lifespan (the services it starts are process
+    singletons). Memory is this process', so includes the client.
+    """
+    import httpx
+    
+    app_module = load_app()
+    runner = await install_stubs(app_module, weather_latency)
+    app = app_module.app
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadgen") as client:
+                for concurrency in levels:
+                    await drive(client, warmup, concurrency, seed=1)
+                    results[concurrency] = await drive(client, duration, concurrency)
+                    results[concurrency]["rss_mb"] = rss_mb()
+    finally:
+        await runner.cleanup()
+    return results
+
+async def run_against(url: str, duration: float, concurrency: int, server_pid: Optional[int] = None) -> Dict[str, Any]:
+    import httpx
+    
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await drive(client, 1.0, concurrency, seed=1)
+        stats = await drive(client, duration, concurrency)
+    if server_pid is not None:
+        stats["rss_mb"] = rss_mb(server_pid)
+    return stats
+
+async def serve(port: int, weather_latency: float) -> None:
+    """
+    Serve the app with the stubs installed on a local uvicorn (one worker).
+    """
+    import uvicorn
+    
+    app_module = load_app()
+    runner = await install_stubs(app_module, weather_latency)
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    try:
+        await server.serve()
+    finally:
+        await runner.cleanup()
+
+def run_with_server(port: int, duration: float, concurrency: int, weather_latency: float) -> Dict[str, Any]:
+    """
+    Start `serve` in a subprocess, wait for /health, drive it and stop it.
+    """
+    import httpx
+    
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--server-only", "--port", str(port),
+                               "--weather-latency", str(weather_latency)])
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(300):
+            try:
+                if httpx.get(f"{url}/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before serving")
+            time.sleep(0.1)
+        return asyncio.run(run_against(url, duration, concurrency, server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load (after 1 s of warm-up)")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests kept in flight")
+    parser.add_argument("--weather-latency", type=float, default=WEATHER_LATENCY_SECONDS,
+                        help="seconds the OpenWeatherMap stub takes to answer")
+    parser.add_argument("--url", help="drive an already running service instead")
+    parser.add_argument("--serve", action="store_true", help="drive a local uvicorn started with the stubs")
+    parser.add_argument("--port", type=int, default=8765, help="port for --serve")
+    parser.add_argument("--server-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.server_only:
+        asyncio.run(serve(args.port, args.weather_latency))
+        return
+    if args.url:
+        stats = asyncio.run(run_against(args.url, args.duration, args.concurrency))
+    elif args.serve:
+        stats = run_with_server(args.port, args.duration, args.concurrency, args.weather_latency)
+    else:
+        stats = asyncio.run(run_in_process(args.duration, [args.concurrency], args.weather_latency))[args.concurrency]
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmark suite with a regression gate: micro-benchmarks of the geo and
+model hot paths across input sizes, and a short in-process load test of
+/predict/wildfire (see loadgen.py). Results are compared with a stored
+baseline; a metric worse than its baseline by more than its tolerance fails
+the run with exit status 1.
+
+Run with: python benchmarks/suite.py                   # compare with benchmarks/baseline.json
+          python benchmarks/suite.py --save-baseline   # record a new baseline on this machine
+          python benchmarks/suite.py --only geo --no-load
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+import numpy as np
+
+from _service import load_service
+
+load_service()
+from inference_service.models.wildfire_heuristic import wildfire_model  # noqa: E402
+from inference_service.utils.geo_utils import (  # noqa: E402
+    calculate_affected_area,
+    calculate_affected_areas,
+    create_fire_spread_polygon,
+    create_fire_spread_polygons
+)
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# metric -> (higher is better, relative tolerance, absolute slack below which changes are noise)
+METRICS = {
+    "median_us": (False, 0.25, 1.0),
+    "peak_kb": (False, 0.25, 16.0),
+    "rps": (True, 0.30, 0.0),
+    "p50_ms": (False, 0.35, 1.0),
+    "p95_ms": (False, 0.50, 5.0),
+    "p99_ms": (False, 0.75, 10.0),
+    "rss_mb": (False, 0.20, 10.0),
+    "errors": (False, 0.0, 0.0)
+}
+
+def _ring(vertices: int) -> Dict[str, Any]:
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    ring = np.column_stack((-120 + 0.3 * np.cos(angles), 38 + 0.2 * np.sin(angles)))
+    return {"type": "Polygon", "coordinates": [np.vstack((ring, ring[:1])).tolist()]}
+
+def _events(n: int) -> Tuple[np.ndarray, ...]:
+    rng = np.random.default_rng(n)
+    return (rng.uniform(-123, -117, n), rng.uniform(34, 41, n), rng.uniform(5, 40, n), rng.uniform(0, 360, n),
+            rng.uniform(0.2, 0.9, n), rng.uniform(10, 40, n), rng.uniform(10, 80, n))
+
+def micro_benchmarks() -> Dict[str, Callable[[], Any]]:
+    """
+    Name -> zero-argument callable; inputs are built here, outside the timing.
+    """
+    benchmarks: Dict[str, Callable[[], Any]] = {}
+    for hours in (6, 24, 72):
+        benchmarks[f"geo.create_fire_spread_polygon[hours={hours}]"] = \
+            lambda hours=hours: create_fire_spread_polygon(-120.0, 38.0, 25.0, 270.0, hours)
+    for n in (1, 100, 10_000):
+        lon, lat, wind_speed, wind_direction = _events(n)[:4]
+        hours = np.full(n, 24)
+        benchmarks[f"geo.create_fire_spread_polygons[n={n}]"] = \
+            lambda args=(lon, lat, wind_speed, wind_direction, hours): create_fire_spread_polygons(*args)
+    for vertices in (16, 256, 4096):
+        benchmarks[f"geo.calculate_affected_area[vertices={vertices}]"] = \
+            lambda polygon=_ring(vertices): calculate_affected_area(polygon)
+    for n in (100, 10_000):
+        lon, lat, wind_speed, wind_direction = _events(n)[:4]
+        rings = create_fire_spread_polygons(lon, lat, wind_speed, wind_direction, np.full(n, 24))
+        benchmarks[f"geo.calculate_affected_areas[n={n}]"] = lambda rings=rings: calculate_affected_areas(rings)
+    for hours in (6, 24, 72):
+        benchmarks[f"model.heuristic.predict[hours={hours}]"] = \
+            lambda hours=hours: wildfire_model.predict(-120.0, 38.0, 25.0, 270.0, 0.6, 30.0, 20.0, hours)
+    for n in (100, 1000):
+        arrays = _events(n) + (np.full(n, 24),)
+        benchmarks[f"model.heuristic.predict_batch[n={n}]"] = lambda arrays=arrays: wildfire_model.predict_batch(*arrays)
+    return benchmarks
+
+def time_call(fn: Callable[[], Any], min_seconds: float = 0.25, repeats: int = 5) -> Dict[str, float]:
+    """
+    Per-call time: loops are calibrated so each of `repeats` timings takes
+    about min_seconds / repeats; the median and best of them are reported.
+    """
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds / repeats:
+            break
+        loops *= 2 if elapsed > min_seconds / repeats / 4 else 10
+    
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - start) / loops)
+    return {"median_us": round(statistics.median(timings) * 1e6, 3), "best_us": round(min(timings) * 1e6, 3)}
+
+def peak_kb(fn: Callable[[], Any]) -> float:
+    """
+    Peak Python allocations during one call, in KB (numpy buffers included).
+    """
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+def load_benchmarks(duration: float) -> Dict[str, Dict[str, Any]]:
+    from loadgen import run_in_process
+    
+    results = asyncio.run(run_in_process(duration, (1, 16)))
+    return {f"load.predict_wildfire[concurrency={level}]": stats for level, stats in results.items()}
+
+def machine() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            tolerance: Optional[float] = None) -> List[Tuple[str, str, Any, Any, str]]:
+    """
+    (benchmark, metric, baseline, current, verdict) for every gated metric;
+    verdicts are "ok", "improved", "REGRESSION" or "new".
+    """
+    rows = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            if metric not in METRICS:
+                continue
+            higher_is_better, relative, slack = METRICS[metric]
+            if tolerance is not None and metric != "errors":
+                relative = tolerance
+            previous = baseline.get(name, {}).get(metric)
+            if previous is None:
+                rows.append((name, metric, None, value, "new"))
+                continue
+            change = (previous - value) if higher_is_better else (value - previous)
+            if change > max(abs(previous) * relative, slack):
+                verdict = "REGRESSION"
+            elif -change > max(abs(previous) * relative, slack):
+                verdict = "improved"
+            else:
+                verdict = "ok"
+            rows.append((name, metric, previous, value, verdict))
+    return rows
+
+def report(rows: List[Tuple[str, str, Any, Any, str]]) -> None:
+    width = max((len(name) for name, *_ in rows), default=10)
+    print(f"\n{'benchmark':<{width}}  {'metric':<10} {'baseline':>12} {'current':>12} {'change':>8}  verdict")
+    for name, metric, previous, value, verdict in rows:
+        change = f"{(value - previous) / previous:+7.1%}" if previous else ""
+        previous_text = "" if previous is None else f"{previous:12g}"
+        print(f"{name:<{width}}  {metric:<10} {previous_text:>12} {value:12g} {change:>8}  {verdict}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline JSON to compare with or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--only", default="", help="run only benchmarks whose name contains this")
+    parser.add_argument("--no-load", action="store_true", help="skip the load test")
+    parser.add_argument("--load-duration", type=float, default=5.0, help="seconds of load per concurrency level")
+    parser.add_argument("--tolerance", type=float, help="relative tolerance for every metric, overriding the defaults")
+    parser.add_argument("--output", type=Path, help="also write the results here as JSON")
+    args = parser.parse_args()
+    
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, fn in micro_benchmarks().items():
+        if args.only not in name:
+            continue
+        results[name] = {**time_call(fn), "peak_kb": peak_kb(fn)}
+        print(f"{name:<48} {results[name]['median_us']:12.2f} us  {results[name]['peak_kb']:10.1f} KB peak")
+    if not args.no_load and args.only in "load.predict_wildfire":
+        for name, stats in load_benchmarks(args.load_duration).items():
+            results[name] = stats
+            print(f"{name:<48} {stats['rps']:8.1f} req/s  p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms  "
+                  f"p99 {stats['p99_ms']:.1f} ms  {stats['errors']} errors  {stats['rss_mb']} MB RSS")
+    
+    document = {"machine": machine(), "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2) + "\n")
+    if args.save_baseline:
+        if args.baseline.exists():
+            # Keep baseline entries of benchmarks not run this time
+            previous = json.loads(args.baseline.read_text())["results"]
+            document["results"] = {**previous, **results}
+        args.baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+        return
+    
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("machine") != machine():
+        print(f"\nWarning: baseline recorded on a different machine ({baseline.get('machine')}); "
+              f"expect differences unrelated to the code")
+    rows = compare(results, baseline["results"], args.tolerance)
+    report(rows)
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed beyond tolerance")
+        sys.exit(1)
+    print("\nNo regressions")
+
+if __name__ == "__main__":
+    main()
@@ -11,17 +11,186 @@ class Settings:
     
     # Database
     DB_CONN_STRING: str = os.getenv("DB_CONN_STRING", "")
+    EVENT_DB_POOL_MIN_SIZE: int = int(os.getenv("EVENT_DB_POOL_MIN_SIZE", 1))
+    EVENT_DB_POOL_MAX_SIZE: int = int(os.getenv("EVENT_DB_POOL_MAX_SIZE", 10))
+    EVENT_DB_POOL_TIMEOUT: float = float(os.getenv("EVENT_DB_POOL_TIMEOUT", 5.0))
+    
+    # Hot-event cache; cached rows are re-checked against events.updated this often
+    EVENT_CACHE_MAX_ENTRIES: int = int(os.getenv("EVENT_CACHE_MAX_ENTRIES", 1000))
+    EVENT_CACHE_REVALIDATE_SECONDS: float = float(os.getenv("EVENT_CACHE_REVALIDATE_SECONDS", 30))
     
     # External APIs
     NASA_API_KEY: str = os.getenv("NASA_API_KEY", "DEMO_KEY")
     OPENWEATHER_API_KEY: str = os.getenv("OPENWEATHER_API_KEY", "")
+    OPENWEATHER_BASE_URL: str = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
+    UPSTREAM_TIMEOUT_SECONDS: float = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", 10))
+    
+    # Total time budget for fetching missing prediction inputs; late sources fall back to defaults
+    ENRICHMENT_DEADLINE_SECONDS: float = float(os.getenv("ENRICHMENT_DEADLINE_SECONDS", 2.0))
+    
+    # Prediction storage ("memory" or "postgres")
+    PREDICTION_STORE_BACKEND: str = os.getenv("PREDICTION_STORE_BACKEND", "memory")
+    PREDICTION_STORE_MAX_ITEMS: int = int(os.getenv("PREDICTION_STORE_MAX_ITEMS", 10000))
+    PREDICTION_STORE_MAX_AGE_HOURS: float = float(os.getenv("PREDICTION_STORE_MAX_AGE_HOURS", 24))
+    PREDICTION_STORE_BATCH_SIZE: int = int(os.getenv("PREDICTION_STORE_BATCH_SIZE", 100))
+    PREDICTION_STORE_FLUSH_INTERVAL: float = float(os.getenv("PREDICTION_STORE_FLUSH_INTERVAL", 0.5))
+    # Predictions waiting to be written to postgres; the oldest are dropped beyond this
+    PREDICTION_STORE_MAX_PENDING: int = int(os.getenv("PREDICTION_STORE_MAX_PENDING", 10000))
+    
+    # Prediction memoization ("memory", "redis" or "none"). Inputs are snapped to
+    # these tolerances before the model runs; results are keyed on the snapped
+    # inputs plus model name and version
+    PREDICTION_CACHE_BACKEND: str = os.getenv("PREDICTION_CACHE_BACKEND", "memory")
+    PREDICTION_CACHE_MAX_ENTRIES: int = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", 10000))
+    PREDICTION_CACHE_TTL_SECONDS: int = int(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 3600))
+    PREDICTION_CACHE_COORDINATE_DEG: float = float(os.getenv("PREDICTION_CACHE_COORDINATE_DEG", 0.001))
+    PREDICTION_CACHE_WIND_SPEED_KMH: float = float(os.getenv("PREDICTION_CACHE_WIND_SPEED_KMH", 0.5))
+    PREDICTION_CACHE_WIND_DIRECTION_DEG: float = float(os.getenv("PREDICTION_CACHE_WIND_DIRECTION_DEG", 2.0))
+    PREDICTION_CACHE_VEGETATION: float = float(os.getenv("PREDICTION_CACHE_VEGETATION", 0.01))
+    PREDICTION_CACHE_TEMPERATURE_C: float = float(os.getenv("PREDICTION_CACHE_TEMPERATURE_C", 0.5))
+    PREDICTION_CACHE_HUMIDITY_PCT: float = float(os.getenv("PREDICTION_CACHE_HUMIDITY_PCT", 1.0))
+    
+    # Monte Carlo ensembles: member perturbations (relative sigma of the wind
+    # speed factor, standard deviations of the others) and burn-probability levels
+    ENSEMBLE_WIND_SPEED_SIGMA: float = float(os.getenv("ENSEMBLE_WIND_SPEED_SIGMA", 0.2))
+    ENSEMBLE_WIND_DIRECTION_SD_DEG: float = float(os.getenv("ENSEMBLE_WIND_DIRECTION_SD_DEG", 15.0))
+    ENSEMBLE_HUMIDITY_SD_PCT: float = float(os.getenv("ENSEMBLE_HUMIDITY_SD_PCT", 10.0))
+    ENSEMBLE_VEGETATION_SD: float = float(os.getenv("ENSEMBLE_VEGETATION_SD", 0.1))
+    ENSEMBLE_CONTOUR_LEVELS: str = os.getenv("ENSEMBLE_CONTOUR_LEVELS", "0.1,0.5,0.9")
+    
+    # Asynchronous prediction jobs ("memory" or "redis"). Workers drain the queue
+    # in every replica unless disabled, e.g. when scripts/prediction_worker.py
+    # processes run alongside API replicas that only enqueue
+    JOB_QUEUE_BACKEND: str = os.getenv("JOB_QUEUE_BACKEND", "memory")
+    JOB_QUEUE_WORKERS_ENABLED: bool = os.getenv("JOB_QUEUE_WORKERS_ENABLED", "True").lower() == "true"
+    JOB_QUEUE_CONCURRENCY: int = int(os.getenv("JOB_QUEUE_CONCURRENCY", 4))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+    JOB_TIMEOUT_SECONDS: float = float(os.getenv("JOB_TIMEOUT_SECONDS", 120))
+    JOB_RETRY_BACKOFF_SECONDS: float = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 1.0))
+    JOB_RESULT_TTL_SECONDS: int = int(os.getenv("JOB_RESULT_TTL_SECONDS", 3600))
+    # How long a Redis job claim lasts before another worker may take the job
+    # over; raised to at least JOB_TIMEOUT_SECONDS + 30 so only dead workers lose their jobs
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", 150))
+    
+    # Response encoding: decimal places kept in perimeter coordinates (5 is ~1 m)
+    # and Douglas-Peucker tolerance in degrees (0 disables simplification)
+    RESPONSE_COORDINATE_PRECISION: int = int(os.getenv("RESPONSE_COORDINATE_PRECISION", 5))
+    RESPONSE_SIMPLIFY_TOLERANCE_DEG: float = float(os.getenv("RESPONSE_SIMPLIFY_TOLERANCE_DEG", 0.0))
+    
+    # Events per COPY/merge batch when bulk-loading EONET feeds
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", 5000))
+    
+    # Backtesting: archive events per task sent to a worker, and worker processes (0 for one per core)
+    BACKTEST_CHUNK_SIZE: int = int(os.getenv("BACKTEST_CHUNK_SIZE", 256))
+    BACKTEST_WORKERS: int = int(os.getenv("BACKTEST_WORKERS", 0))
     
-    # Model Paths
-    MODEL_DIR: str = os.getenv("MODEL_DIR", "/app/models")
+    # At-risk asset datasets (CSV, GeoJSON or Parquet of points; empty to disable)
+    ASSET_INFRASTRUCTURE_PATH: str = os.getenv("ASSET_INFRASTRUCTURE_PATH", "")
+    ASSET_POPULATION_PATH: str = os.getenv("ASSET_POPULATION_PATH", "")
+    ASSET_INDEX_CELL_DEG: float = float(os.getenv("ASSET_INDEX_CELL_DEG", 0.05))
+    AT_RISK_MAX_ASSETS: int = int(os.getenv("AT_RISK_MAX_ASSETS", 100))
+    
+    # Model Paths (model specs are the *.json files in MODEL_DIR, plus MODEL_PATH if set)
+    MODEL_DIR: str = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+    MODEL_PATH: str = os.getenv("MODEL_PATH", "")
+    # Default worker processes per model with a process executor
+    MODEL_POOL_WORKERS: int = int(os.getenv("MODEL_POOL_WORKERS", 2))
+    # Run a warm-up prediction per model at startup, before the service reports ready
+    STARTUP_WARMUP: bool = os.getenv("STARTUP_WARMUP", "True").lower() == "true"
+    
+    # Streaming predictions: forecast hours a model may compute ahead of a slow
+    # client, and how long a pool worker waits on a stalled stream before giving
+    # up (capped at 15 s, well below client and proxy request timeouts). Each
+    # stream holds a pool worker, so a process-executor model takes at most
+    # STREAM_MAX_CONCURRENT streams at once and answers more with 503 (0: one
+    # fewer than its pool workers, at least 1; a spec's "max_streams" overrides)
+    STREAM_BUFFER_HOURS: int = int(os.getenv("STREAM_BUFFER_HOURS", 2))
+    STREAM_STALL_TIMEOUT_SECONDS: float = float(os.getenv("STREAM_STALL_TIMEOUT_SECONDS", 10))
+    STREAM_MAX_CONCURRENT: int = int(os.getenv("STREAM_MAX_CONCURRENT", 0))
+    
+    # Vector tiles: features from "postgres" (events and predictions tables) or
+    # "memory" (this process's predictions); encoded tiles are cached in an LRU
+    # of this many MB, and the database is polled for changes this often
+    TILE_SOURCE: str = os.getenv("TILE_SOURCE", PREDICTION_STORE_BACKEND)
+    TILE_CACHE_MB: float = float(os.getenv("TILE_CACHE_MB", 128))
+    TILE_CACHE_TTL_SECONDS: float = float(os.getenv("TILE_CACHE_TTL_SECONDS", 3600))
+    TILE_REVALIDATE_SECONDS: float = float(os.getenv("TILE_REVALIDATE_SECONDS", 10))
+    # Tile extent and buffer in tile units; perimeters are simplified by this
+    # many pixels of a 512-pixel tile, i.e. more at lower zooms
+    TILE_EXTENT: int = int(os.getenv("TILE_EXTENT", 4096))
+    TILE_BUFFER: int = int(os.getenv("TILE_BUFFER", 64))
+    TILE_SIMPLIFY_PIXELS: float = float(os.getenv("TILE_SIMPLIFY_PIXELS", 1.0))
+    
+    # Alert fan-out: user_alerts regions from "postgres" (or "memory", registered
+    # in-process) are matched against every new predicted perimeter, and matches
+    # published ("redis" or "memory") on the notification service's channel.
+    # New alerts are picked up this often, edits and deletions on full reloads;
+    # an alert fires at most once per event per ALERT_RENOTIFY_SECONDS
+    ALERT_SOURCE: str = os.getenv("ALERT_SOURCE", PREDICTION_STORE_BACKEND)
+    ALERT_PUBLISHER: str = os.getenv("ALERT_PUBLISHER", "redis" if ALERT_SOURCE.lower() == "postgres" else "memory")
+    ALERT_CHANNEL: str = os.getenv("ALERT_CHANNEL", "notifications")
+    ALERT_REFRESH_SECONDS: float = float(os.getenv("ALERT_REFRESH_SECONDS", 5))
+    ALERT_FULL_REFRESH_SECONDS: float = float(os.getenv("ALERT_FULL_REFRESH_SECONDS", 300))
+    ALERT_RENOTIFY_SECONDS: float = float(os.getenv("ALERT_RENOTIFY_SECONDS", 3600))
+    # Predictions waiting to be matched (more are dropped), matched per batch, and
+    # alerts changed since the last index rebuild before the next one
+    ALERT_QUEUE_SIZE: int = int(os.getenv("ALERT_QUEUE_SIZE", 10000))
+    ALERT_BATCH_SIZE: int = int(os.getenv("ALERT_BATCH_SIZE", 256))
+    ALERT_REBUILD_THRESHOLD: int = int(os.getenv("ALERT_REBUILD_THRESHOLD", 2000))
+    
+    # Re-scoring of active wildfires (updated or acquired within RESCORE_ACTIVE_DAYS,
+    # from "postgres" or "memory"): every RESCORE_INTERVAL_SECONDS each one's
+    # inputs are compared with those of its last prediction, and only events
+    # whose row changed, that moved or whose weather moved past these thresholds
+    # (or not re-scored for RESCORE_MAX_AGE_SECONDS) are predicted again, in
+    # batches, highest severity first, at most RESCORE_MAX_PER_MINUTE a minute.
+    # Enable it in one process only (an API replica or a prediction worker)
+    RESCORE_ENABLED: bool = os.getenv("RESCORE_ENABLED", "False").lower() == "true"
+    RESCORE_SOURCE: str = os.getenv("RESCORE_SOURCE", PREDICTION_STORE_BACKEND)
+    RESCORE_ACTIVE_DAYS: float = float(os.getenv("RESCORE_ACTIVE_DAYS", 7))
+    RESCORE_INTERVAL_SECONDS: float = float(os.getenv("RESCORE_INTERVAL_SECONDS", 60))
+    RESCORE_MAX_AGE_SECONDS: float = float(os.getenv("RESCORE_MAX_AGE_SECONDS", 6 * 3600))
+    RESCORE_WIND_SPEED_KMH: float = float(os.getenv("RESCORE_WIND_SPEED_KMH", 5))
+    RESCORE_WIND_DIRECTION_DEG: float = float(os.getenv("RESCORE_WIND_DIRECTION_DEG", 20))
+    RESCORE_TEMPERATURE_C: float = float(os.getenv("RESCORE_TEMPERATURE_C", 3))
+    RESCORE_HUMIDITY_PCT: float = float(os.getenv("RESCORE_HUMIDITY_PCT", 10))
+    RESCORE_MOVE_KM: float = float(os.getenv("RESCORE_MOVE_KM", 1))
+    RESCORE_BATCH_SIZE: int = int(os.getenv("RESCORE_BATCH_SIZE", 256))
+    RESCORE_MAX_PER_MINUTE: int = int(os.getenv("RESCORE_MAX_PER_MINUTE", 600))
+    RESCORE_WEATHER_CONCURRENCY: int = int(os.getenv("RESCORE_WEATHER_CONCURRENCY", 8))
+    # Model (empty for the default) and forecast window of re-scoring runs
+    RESCORE_MODEL: str = os.getenv("RESCORE_MODEL", "")
+    RESCORE_FORECAST_HOURS: int = int(os.getenv("RESCORE_FORECAST_HOURS", 24))
     
     # Redis for caching and task queue
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
     
+    # Offline forecast grid (directory of hourly .npy stacks plus grid.json; empty
+    # to disable). Points it covers are served from it before OpenWeatherMap
+    WEATHER_GRID_DIR: str = os.getenv("WEATHER_GRID_DIR", "")
+    
+    # NDVI rasters for vegetation density (a GeoTIFF/COG, a directory of them or
+    # a glob; empty to disable). Decoded tiles are kept in an LRU of this many MB
+    VEGETATION_NDVI_PATH: str = os.getenv("VEGETATION_NDVI_PATH", "")
+    VEGETATION_TILE_SIZE: int = int(os.getenv("VEGETATION_TILE_SIZE", 256))
+    VEGETATION_TILE_CACHE_MB: float = float(os.getenv("VEGETATION_TILE_CACHE_MB", 256))
+    # NDVI mapped to density 0 (bare) and 1 (dense), linearly in between
+    VEGETATION_NDVI_BARE: float = float(os.getenv("VEGETATION_NDVI_BARE", 0.1))
+    VEGETATION_NDVI_DENSE: float = float(os.getenv("VEGETATION_NDVI_DENSE", 0.8))
+    VEGETATION_FOOTPRINT_MAX_SAMPLES: int = int(os.getenv("VEGETATION_FOOTPRINT_MAX_SAMPLES", 65536))
+    
+    # Weather cache ("memory", "redis" or "none")
+    WEATHER_CACHE_BACKEND: str = os.getenv("WEATHER_CACHE_BACKEND", "memory")
+    WEATHER_CACHE_RESOLUTION_DEG: float = float(os.getenv("WEATHER_CACHE_RESOLUTION_DEG", 0.05))
+    WEATHER_CACHE_BUCKET_SECONDS: int = int(os.getenv("WEATHER_CACHE_BUCKET_SECONDS", 600))
+    WEATHER_CACHE_TTL_SECONDS: int = int(os.getenv("WEATHER_CACHE_TTL_SECONDS", 600))
+    WEATHER_CACHE_MAX_ENTRIES: int = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", 10000))
+    
+    # Observability: Server-Timing response header with per-stage durations,
+    # and how often event loop lag is sampled
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "False").lower() == "true"
+    LOOP_LAG_SAMPLE_SECONDS: float = float(os.getenv("LOOP_LAG_SAMPLE_SECONDS", 0.5))
+    
     # CORS
     ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
 
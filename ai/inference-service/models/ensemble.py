@@ -0,0 +1,85 @@
+import zlib
+import numpy as np
+from typing import Dict, Any, Optional, Sequence
+
+# Default member perturbations: wind speed is scaled by a mean-one lognormal
+# factor with this sigma; the others get additive normal noise, clipped to range
+DEFAULT_SPREADS = {
+    "wind_speed": 0.2,
+    "wind_direction": 15.0,   # degrees
+    "humidity": 10.0,         # percentage points
+    "vegetation_density": 0.1
+}
+
+# Burn probabilities to draw contours at, and spread-distance quantiles to report
+DEFAULT_LEVELS = (0.1, 0.5, 0.9)
+
+# Rays cast from the ignition point when tracing probability contours
+CONTOUR_BEARINGS = 72
+
+def ensemble_seed(*values: float) -> int:
+    """
+    Seed derived from the ensemble inputs, so the same inputs always give the same ensemble.
+    """
+    return zlib.crc32(np.asarray(values, dtype=np.float64).tobytes())
+
+def perturb_inputs(rng: np.random.Generator,
+                   members: int,
+                   wind_speed: float,
+                   wind_direction: float,
+                   humidity: float,
+                   vegetation_density: float,
+                   spreads: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """
+    Draw `members` perturbed copies of the weather and fuel inputs.
+    """
+    spreads = {**DEFAULT_SPREADS, **(spreads or {})}
+    sigma = spreads["wind_speed"]
+    return {
+        "wind_speed": wind_speed * np.exp(rng.normal(-sigma ** 2 / 2, sigma, members)),
+        "wind_direction": (wind_direction + rng.normal(0, spreads["wind_direction"], members)) % 360,
+        "humidity": np.clip(humidity + rng.normal(0, spreads["humidity"], members), 0, 100),
+        "vegetation_density": np.clip(vegetation_density + rng.normal(0, spreads["vegetation_density"], members), 0, 1)
+    }
+
+def probability_contours(center_lon: float,
+                         center_lat: float,
+                         radii_km: np.ndarray,
+                         bearings: np.ndarray,
+                         levels: Sequence[float]) -> np.ndarray:
+    """
+    Burn-probability contours for members that are star-shaped around the
+    ignition point. radii_km[i, k] is member i's burned distance along bearing k
+    (math angle, counterclockwise from east). Along each ray the points burned
+    with probability >= p are those within the (1 - p) quantile of the member
+    radii, so each contour is exact at the sampled bearings.
+    Returns an (L, K + 1, 2) array of closed [lon, lat] rings, one per level.
+    """
+    quantiles = np.quantile(radii_km, 1 - np.asarray(levels, dtype=float), axis=0)
+    lat_km = 111
+    lon_km = 111 * np.cos(np.radians(center_lat))
+    
+    rings = np.empty((len(levels), len(bearings) + 1, 2))
+    rings[:, :-1, 0] = center_lon + quantiles * np.cos(bearings) / lon_km
+    rings[:, :-1, 1] = center_lat + quantiles * np.sin(bearings) / lat_km
+    rings[:, -1] = rings[:, 0]
+    return rings
+
+def quantile_summary(values: np.ndarray, levels: Sequence[float]) -> Dict[str, float]:
+    """
+    {"p10": ..., "p50": ..., "p90": ...} for the given levels.
+    """
+    return {
+        f"p{round(level * 100):g}": float(value)
+        for level, value in zip(levels, np.quantile(values, levels))
+    }
+
+def ensemble_parameters(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ensemble options carried in a prediction's parameters.
+    """
+    return {
+        "members": int(parameters.get("ensemble") or 1),
+        "spreads": parameters.get("ensemble_spreads"),
+        "levels": tuple(parameters.get("ensemble_levels") or DEFAULT_LEVELS)
+    }
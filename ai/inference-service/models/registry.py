@@ -0,0 +1,361 @@
+import asyncio
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple, Callable
+from ..config import settings
+
+# Small event used to warm every model before it serves requests. The forecast
+# window is the request default: the cellular grid spans the whole window, so a
+# 1-hour forecast would be its most expensive case rather than a typical one
+WARMUP_EVENT = {"geometry": {"type": "Point", "coordinates": [-120.0, 40.0]}}
+WARMUP_PARAMETERS = {"wind_speed": 10.0, "wind_direction": 0.0, "forecast_hours": 6}
+
+def build_model(spec: Dict[str, Any]):
+    """
+    Instantiate the model class named in a spec ("module.ClassName", relative to
+    this package) and apply the spec's id and version.
+    """
+    module_name, class_name = spec["class"].rsplit(".", 1)
+    module = importlib.import_module(f"{__package__}.{module_name}")
+    model = getattr(module, class_name)(**spec.get("options", {}))
+    model.model_name = spec["id"]
+    model.model_version = spec.get("version", model.model_version)
+    return model
+
+# Models owned by this process when it is a pool worker, keyed by model id
+_worker_models: Dict[str, Any] = {}
+
+def _init_worker(spec: Dict[str, Any]) -> None:
+    model = build_model(spec)
+    model.predict_from_event(WARMUP_EVENT, WARMUP_PARAMETERS)
+    _worker_models[spec["id"]] = model
+
+def _call_worker(model_id: str, method: str, *args, **kwargs):
+    return getattr(_worker_models[model_id], method)(*args, **kwargs)
+
+def _worker_ready(model_id: str) -> bool:
+    return model_id in _worker_models
+
+# How often blocked stream producers and consumers re-check for cancellation
+STREAM_POLL_SECONDS = 0.5
+# Longest a pool worker may sit blocked on a stalled stream's consumer
+MAX_STREAM_STALL_SECONDS = 15.0
+
+def _stream_worker(model_id: str, method: str, channel, cancelled, stall_timeout: float, *args) -> None:
+    """
+    Run a generator model method in a pool worker, sending each item through a
+    bounded manager queue. A full queue blocks the generator, so the worker
+    computes at most the buffered items ahead of the consumer; it gives up when
+    the consumer cancels or has not taken an item for stall_timeout seconds.
+    """
+    def send(message) -> bool:
+        waited = 0.0
+        while not cancelled.is_set():
+            try:
+                channel.put(message, timeout=STREAM_POLL_SECONDS)
+                return True
+            except queue.Full:
+                waited += STREAM_POLL_SECONDS
+                if waited >= stall_timeout:
+                    return False
+        return False
+    
+    generator = getattr(_worker_models[model_id], method)(*args)
+    try:
+        while True:
+            try:
+                item = next(generator)
+            except StopIteration as stop:
+                send(("result", stop.value))
+                return
+            if not send(("item", item)):
+                return
+    except Exception as e:
+        send(("error", e))
+    finally:
+        generator.close()
+
+# Server process owning the queues that stream items out of pool workers, started on first use
+_stream_manager = None
+
+def _get_stream_manager():
+    global _stream_manager
+    if _stream_manager is None:
+        _stream_manager = multiprocessing.Manager()
+    return _stream_manager
+
+class ModelHandle:
+    """
+    A loaded model plus where it runs: inline on the event loop for cheap
+    models, or in a dedicated process pool for CPU-heavy ones.
+    A stream holds a pool worker for as long as its client takes to read it,
+    so pool models serve at most max_streams streams at once (0: no limit).
+    """
+    
+    def __init__(self,
+                 spec: Dict[str, Any],
+                 model,
+                 executor: Optional[ProcessPoolExecutor] = None,
+                 workers: int = 0,
+                 max_streams: int = 0):
+        self.spec = spec
+        self.model = model
+        self.executor = executor
+        self.workers = workers
+        self.max_streams = max_streams
+        self.active_streams = 0
+        self.load_seconds = 0.0
+        self.memory_bytes = 0
+    
+    @property
+    def model_name(self) -> str:
+        return self.model.model_name
+    
+    @property
+    def model_version(self) -> str:
+        return self.model.model_version
+    
+    async def run(self, method: str, *args, **kwargs):
+        """
+        Call a model method, off the event loop when the model has a worker pool.
+        """
+        if self.executor is None:
+            return getattr(self.model, method)(*args, **kwargs)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(_call_worker, self.model_name, method, *args, **kwargs)
+        )
+    
+    async def stream(self,
+                     method: str,
+                     *args,
+                     buffer: int = 2,
+                     stall_timeout: float = 30.0) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Iterate a generator model method, yielding ("item", value) per item as
+        it is produced and finally ("result", value) with the generator's return value.
+        Inline models are stepped on the event loop one item per iteration.
+        Pool models run in a worker that stays at most `buffer` items ahead of
+        this iterator, so a slow consumer slows the model instead of queueing
+        its output; a consumer that stops iterating releases the worker, and
+        one that stops reading does after stall_timeout seconds (at most
+        MAX_STREAM_STALL_SECONDS). Take a slot with reserve_stream() first.
+        """
+        if self.executor is None:
+            generator = getattr(self.model, method)(*args)
+            while True:
+                try:
+                    item = next(generator)
+                except StopIteration as stop:
+                    yield "result", stop.value
+                    return
+                yield "item", item
+        
+        manager = _get_stream_manager()
+        channel = manager.Queue(maxsize=buffer)
+        cancelled = manager.Event()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.executor,
+            partial(_stream_worker, self.model_name, method, channel, cancelled,
+                    min(stall_timeout, MAX_STREAM_STALL_SECONDS), *args)
+        )
+        try:
+            while True:
+                try:
+                    kind, value = await asyncio.to_thread(channel.get, True, STREAM_POLL_SECONDS)
+                except queue.Empty:
+                    if future.done():
+                        # The worker exited without a result (crashed or stalled out)
+                        future.result()
+                        raise RuntimeError(f"{self.model_name} stream ended without a result")
+                    continue
+                if kind == "error":
+                    raise value
+                yield kind, value
+                if kind == "result":
+                    return
+        finally:
+            cancelled.set()
+    
+    def reserve_stream(self) -> Optional[Callable[[], None]]:
+        """
+        Take one of the model's stream slots: returns a function that frees it
+        (safe to call more than once), or None when they are all taken.
+        """
+        if self.max_streams and self.active_streams >= self.max_streams:
+            return None
+        self.active_streams += 1
+        released = False
+        
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.active_streams -= 1
+        
+        return release
+    
+    def supports(self, capability: str) -> bool:
+        return capability in self.spec.get("capabilities", [])
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.model_name,
+            "name": self.spec.get("name", self.model_name),
+            "description": self.spec.get("description", ""),
+            "version": self.model_version,
+            "model_type": self.spec.get("model_type", "wildfire"),
+            "executor": self.spec.get("executor", "inline"),
+            "workers": self.workers,
+            "max_streams": self.max_streams,
+            "active_streams": self.active_streams,
+            "default": self.spec.get("default", False),
+            "capabilities": self.spec.get("capabilities", []),
+            "parameters": self.spec.get("parameters", {}),
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_mb": round(self.memory_bytes / 2 ** 20, 2)
+        }
+
+class ModelRegistry:
+    """
+    Discovers model specs (*.json) in settings.MODEL_DIR, plus settings.MODEL_PATH
+    when set, then loads and warms each model once.
+    """
+    
+    def __init__(self, model_dir: str, model_path: str = "", pool_workers: int = 2, max_streams: int = 0):
+        self.model_dir = model_dir
+        self.model_path = model_path
+        self.pool_workers = pool_workers
+        self.max_streams = max_streams
+        self.handles: Dict[str, ModelHandle] = {}
+        self.default_model: Optional[str] = None
+        self.loaded = False
+    
+    def discover(self) -> List[Dict[str, Any]]:
+        """
+        Read every model spec; later files override earlier ones with the same id.
+        """
+        paths = sorted(glob.glob(os.path.join(self.model_dir, "*.json")))
+        if self.model_path and self.model_path not in paths:
+            paths.append(self.model_path)
+        
+        specs: Dict[str, Dict[str, Any]] = {}
+        for path in paths:
+            try:
+                with open(path) as f:
+                    spec = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping model spec {path}: {e}")
+                continue
+            if "id" not in spec or "class" not in spec:
+                print(f"Skipping model spec {path}: missing id or class")
+                continue
+            specs[spec["id"]] = spec
+        return list(specs.values())
+    
+    def load(self) -> None:
+        """
+        Instantiate and warm every discovered model, recording load time and
+        retained memory, and start worker pools for process-executor models
+        (which warm in their workers, see warm_pools).
+        """
+        if self.loaded:
+            return
+        
+        for spec in self.discover():
+            start = time.perf_counter()
+            owns_tracing = not tracemalloc.is_tracing()
+            if owns_tracing:
+                tracemalloc.start()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            try:
+                model = build_model(spec)
+                # Pool workers warm their own copies (_init_worker); this one only describes the model
+                if spec.get("executor") != "process":
+                    model.predict_from_event(WARMUP_EVENT, WARMUP_PARAMETERS)
+                memory_bytes = tracemalloc.get_traced_memory()[0] - memory_before
+            except Exception as e:
+                print(f"Failed to load model {spec['id']}: {e}")
+                continue
+            finally:
+                if owns_tracing:
+                    tracemalloc.stop()
+            
+            executor = None
+            workers = 0
+            max_streams = 0
+            if spec.get("executor") == "process":
+                workers = spec.get("workers", self.pool_workers)
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(spec,)
+                )
+                # By default leave one worker free for one-shot predictions
+                max_streams = spec.get("max_streams", self.max_streams or max(1, workers - 1))
+            
+            handle = ModelHandle(spec, model, executor, workers, max_streams)
+            handle.load_seconds = time.perf_counter() - start
+            handle.memory_bytes = memory_bytes
+            self.handles[spec["id"]] = handle
+            if spec.get("default") or self.default_model is None:
+                self.default_model = spec["id"]
+            print(f"Loaded model {spec['id']} in {handle.load_seconds:.3f}s "
+                  f"({handle.memory_bytes / 2 ** 20:.2f} MB, executor: {spec.get('executor', 'inline')})")
+        
+        self.loaded = True
+    
+    async def warm_pools(self) -> None:
+        """
+        Start every pool worker now (each builds and warms its model) rather
+        than on the first request.
+        """
+        loop = asyncio.get_running_loop()
+        for handle in self.handles.values():
+            if handle.executor is not None:
+                await asyncio.gather(*(
+                    loop.run_in_executor(handle.executor, _worker_ready, handle.model_name)
+                    for _ in range(handle.workers)
+                ))
+    
+    def __contains__(self, model_name: str) -> bool:
+        self.load()
+        return model_name in self.handles
+    
+    def get(self, model_name: Optional[str] = None) -> ModelHandle:
+        """
+        Look up a loaded model by id, defaulting to the default model.
+        """
+        self.load()
+        handle = self.handles.get(model_name or self.default_model)
+        if handle is None:
+            raise ValueError(f"Unknown model: {model_name}")
+        return handle
+    
+    def describe(self) -> List[Dict[str, Any]]:
+        self.load()
+        return [handle.describe() for handle in self.handles.values()]
+    
+    def close(self) -> None:
+        global _stream_manager
+        for handle in self.handles.values():
+            if handle.executor is not None:
+                handle.executor.shutdown(wait=False, cancel_futures=True)
+        if _stream_manager is not None:
+            _stream_manager.shutdown()
+            _stream_manager = None
+
+# Create a singleton instance
+model_registry = ModelRegistry(
+    settings.MODEL_DIR, settings.MODEL_PATH, settings.MODEL_POOL_WORKERS, settings.STREAM_MAX_CONCURRENT
+)
@@ -0,0 +1,294 @@
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Iterator, Generator
+from ..schemas.prediction import WildfirePredictionResult
+from .wildfire_heuristic import WildfireHeuristicModel, heuristic_confidence_factors
+
+# Hop offsets (row, col) of the 16-neighbour stencil: the 8 adjacent cells plus
+# the 8 knight moves, which keeps the spread shape from snapping to an octagon
+NEIGHBOUR_OFFSETS = np.array([
+    (-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1),
+    (-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)
+])
+MAX_HOP = 2
+
+# Angular resolution of the hourly perimeter polygons
+PERIMETER_BINS = 64
+
+# Spread rate with no wind, in km/h
+BASE_SPREAD_KMH = 0.1
+
+# Vegetation raster cells at or below this density do not burn (water, rock, bare ground)
+MIN_BURNABLE_DENSITY = 0.05
+
+@lru_cache(maxsize=4)
+def _unit_grid(n: int) -> Dict[str, np.ndarray]:
+    """
+    Distance in cells, bearing and perimeter bearing bin of every cell of an
+    n x n grid from its center. Only the distance scales with the cell size,
+    so this is built once per grid size (at warm-up) and shared read-only.
+    """
+    offsets = np.arange(n) - n // 2
+    north, east = np.meshgrid(offsets, offsets, indexing="ij")
+    bearing = (np.arctan2(east, north) % (2 * np.pi)).ravel()
+    grid = {
+        "distance": np.hypot(north, east).ravel(),
+        "bearing": bearing,
+        "bin": np.minimum((bearing / (2 * np.pi) * PERIMETER_BINS).astype(np.int64), PERIMETER_BINS - 1)
+    }
+    for values in grid.values():
+        values.flags.writeable = False
+    return grid
+
+def length_to_breadth_ratio(wind_speed: float) -> float:
+    """
+    Fire ellipse length-to-breadth ratio for a wind speed in km/h (Alexander, 1985).
+    """
+    return float(1 + 8.729 * (1 - np.exp(-0.030 * wind_speed)) ** 2.155)
+
+class WildfireCellularModel:
+    """
+    Raster fire spread model.
+    Fire spreads from the ignition point over a square grid centered on the event.
+    Each cell's arrival time is relaxed from its 16 neighbours, with travel times
+    taken from an elliptical (Huygens) spread rate aligned downwind. Every
+    relaxation sweep is a handful of whole-array operations over the active window,
+    and the grid is stepped hour by hour to emit one perimeter per forecast hour.
+    """
+    
+    def __init__(self, grid_size: int = 401):
+        self.model_name = "wildfire_cellular_v1"
+        self.model_version = "1.0.0"
+        # Odd so the ignition point sits on the center cell
+        self.grid_size = grid_size if grid_size % 2 == 1 else grid_size + 1
+    
+    def head_spread_rate(self,
+                         wind_speed: float,
+                         vegetation_density: float,
+                         temperature: float,
+                         humidity: float) -> float:
+        """
+        Downwind rate of spread in km/h.
+        """
+        moisture_factor = np.clip(1.5 - humidity / 100, 0.3, 1.5)
+        temperature_factor = np.clip(0.8 + temperature / 100, 0.6, 1.3)
+        return float((BASE_SPREAD_KMH + 0.2 * wind_speed) * (1 + vegetation_density) * moisture_factor * temperature_factor)
+    
+    def iter_hours(self,
+                   center_lon: float,
+                   center_lat: float,
+                   wind_speed: float,
+                   wind_direction: float,
+                   vegetation_density: float = 0.5,
+                   temperature: float = 20,
+                   humidity: float = 50,
+                   hours: int = 6,
+                   vegetation_raster: Optional[np.ndarray] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Run the spread simulation, yielding the state after each forecast hour as
+        {"hour", "perimeter", "area_km2", "spread_distance_km"}.
+        An optional vegetation raster (densities 0-1, north-up) is resampled onto
+        the simulation grid and replaces the uniform vegetation density; it must
+        already cover the simulated extent, so only direct callers pass one (the
+        prediction service does not).
+        """
+        n = self.grid_size
+        center = n // 2
+        
+        # Relative fuel per cell: (1 + density), normalized to the uniform density
+        if vegetation_raster is not None:
+            density = self._resample(np.asarray(vegetation_raster, dtype=np.float32), n)
+            fuel = (1 + density) / (1 + vegetation_density)
+            fuel[density <= MIN_BURNABLE_DENSITY] = 0
+            max_fuel = max(float(fuel.max()), 1.0)
+        else:
+            fuel = np.ones((n, n), dtype=np.float32)
+            max_fuel = 1.0
+        
+        head_rate = self.head_spread_rate(wind_speed, vegetation_density, temperature, humidity)
+        max_rate = head_rate * max_fuel
+        # Size the domain so the head fire cannot leave it within the forecast
+        cell_km = max(max_rate * hours * 1.05, 0.5) / (center - MAX_HOP)
+        
+        # Directional rate of the fire ellipse, with the ignition point at the rear focus.
+        # Rows increase northward, columns eastward; bearings are clockwise from north
+        ratio = length_to_breadth_ratio(wind_speed)
+        eccentricity = np.sqrt(ratio ** 2 - 1) / ratio
+        downwind = np.radians((wind_direction + 180) % 360)
+        
+        def directional_rate(bearing):
+            return head_rate * (1 - eccentricity) / (1 - eccentricity * np.cos(bearing - downwind))
+        
+        hop_hours = (
+            np.hypot(NEIGHBOUR_OFFSETS[:, 0], NEIGHBOUR_OFFSETS[:, 1]) * cell_km
+            / directional_rate(np.arctan2(NEIGHBOUR_OFFSETS[:, 1], NEIGHBOUR_OFFSETS[:, 0]))
+        ).astype(np.float32)
+        
+        # Grids are padded by MAX_HOP so every hop is a constant offset into the flat array
+        width = n + 2 * MAX_HOP
+        hop_offsets = NEIGHBOUR_OFFSETS[:, 0] * width + NEIGHBOUR_OFFSETS[:, 1]
+        arrival = np.full(width * width, np.inf, dtype=np.float32)
+        inverse_fuel = np.full((width, width), np.inf, dtype=np.float32)
+        with np.errstate(divide="ignore"):
+            inverse_fuel[MAX_HOP:-MAX_HOP, MAX_HOP:-MAX_HOP] = 1 / fuel
+        inverse_fuel = inverse_fuel.ravel()
+        ignition = (center + MAX_HOP) * width + center + MAX_HOP
+        arrival[ignition] = 0
+        
+        # Straight lines are the fastest paths for a convex (elliptical) spread front,
+        # so distance / (directional rate * max fuel) bounds each cell's arrival time
+        # from below. A cell only needs relaxing once the clock passes its bound.
+        geometry = self._grid_geometry(n, cell_km)
+        lower_bound = np.full((width, width), np.inf, dtype=np.float32)
+        lower_bound[MAX_HOP:-MAX_HOP, MAX_HOP:-MAX_HOP] = (
+            geometry["distance"] / (directional_rate(geometry["bearing"]) * max_fuel)
+        ).reshape(n, n)
+        lower_bound = lower_bound.ravel()
+        lower_bound[inverse_fuel == np.inf] = np.inf
+        by_bound = np.argsort(lower_bound, kind="stable")
+        sorted_bound = lower_bound[by_bound]
+        
+        # A hop moves the fire at least one cell, so this many sweeps per hour
+        # reach every cell that starts burning during the hour
+        sweeps_per_hour = int(np.ceil(max_rate / cell_km)) + 1
+        
+        active = np.empty(0, dtype=np.int64)
+        reach_km = np.zeros(PERIMETER_BINS)
+        burned_cells = 0
+        
+        for hour in range(1, hours + 1):
+            # Narrow band: drop cells that finished burning last hour, add cells whose bound has passed
+            entering = by_bound[np.searchsorted(sorted_bound, hour - 1, side="right"):
+                                np.searchsorted(sorted_bound, hour, side="right")]
+            active = np.concatenate([active[arrival[active] > hour - 1], entering])
+            if hour == 1:
+                active = np.concatenate([active, [ignition]])
+            travel = np.outer(hop_hours, inverse_fuel[active])
+            
+            for _ in range(sweeps_per_hour):
+                best = arrival[active]
+                for offset, hop_travel in zip(hop_offsets, travel):
+                    np.minimum(best, arrival[active - offset] + hop_travel, out=best)
+                arrival[active] = best
+            
+            # Every active cell was unburned at the start of the hour, so these ignited during it
+            ignited = self._inner_index(active[arrival[active] <= hour], n)
+            burned_cells += len(ignited)
+            np.maximum.at(reach_km, geometry["bin"][ignited], geometry["distance"][ignited])
+            
+            yield self._hour_state(hour, reach_km, burned_cells, cell_km, center_lon, center_lat)
+    
+    @staticmethod
+    def _inner_index(padded_index: np.ndarray, n: int) -> np.ndarray:
+        """
+        Convert flat indices into the padded grid to flat indices into the n x n grid.
+        """
+        width = n + 2 * MAX_HOP
+        return (padded_index // width - MAX_HOP) * n + padded_index % width - MAX_HOP
+    
+    @staticmethod
+    def _resample(raster: np.ndarray, n: int) -> np.ndarray:
+        """
+        Nearest-neighbour resample of a north-up raster onto the n x n grid (row 0 = south).
+        """
+        rows = (np.arange(n) * raster.shape[0] // n)[::-1]
+        cols = np.arange(n) * raster.shape[1] // n
+        return raster[np.ix_(rows, cols)]
+    
+    @staticmethod
+    def _grid_geometry(n: int, cell_km: float) -> Dict[str, np.ndarray]:
+        """
+        Distance (km), bearing and perimeter bearing bin of every cell from the ignition point.
+        """
+        unit = _unit_grid(n)
+        return {"distance": unit["distance"] * cell_km, "bearing": unit["bearing"], "bin": unit["bin"]}
+    
+    @staticmethod
+    def _hour_state(hour: int,
+                    reach_km: np.ndarray,
+                    burned_cells: int,
+                    cell_km: float,
+                    center_lon: float,
+                    center_lat: float) -> Dict[str, Any]:
+        # Star-shaped polygon through the furthest burned cell in each bearing bin
+        radius_km = reach_km + cell_km / 2
+        bearing = (np.arange(PERIMETER_BINS) + 0.5) * 2 * np.pi / PERIMETER_BINS
+        lat_km = 111
+        lon_km = 111 * np.cos(np.radians(center_lat))
+        lon_points = center_lon + radius_km * np.sin(bearing) / lon_km
+        lat_points = center_lat + radius_km * np.cos(bearing) / lat_km
+        ring = np.column_stack([lon_points, lat_points]).tolist()
+        ring.append(ring[0])
+        
+        return {
+            "hour": hour,
+            "perimeter": {"type": "Polygon", "coordinates": [ring]},
+            "area_km2": burned_cells * cell_km ** 2,
+            "spread_distance_km": float(radius_km.max())
+        }
+    
+    def predict(self,
+                center_lon: float,
+                center_lat: float,
+                wind_speed: float,
+                wind_direction: float,
+                vegetation_density: float = 0.5,
+                temperature: float = 20,
+                humidity: float = 50,
+                hours: int = 6,
+                vegetation_raster: Optional[np.ndarray] = None) -> WildfirePredictionResult:
+        """
+        Generate a wildfire spread prediction with the raster spread simulation.
+        """
+        hourly = list(self.iter_hours(
+            center_lon, center_lat, wind_speed, wind_direction,
+            vegetation_density, temperature, humidity, hours, vegetation_raster
+        ))
+        final = hourly[-1]
+        
+        return WildfirePredictionResult(
+            predicted_perimeter=final["perimeter"],
+            spread_distance_km=final["spread_distance_km"],
+            area_affected_km2=final["area_km2"],
+            at_risk_infrastructure=None,
+            at_risk_population=None,
+            confidence_factors=heuristic_confidence_factors(vegetation_density, temperature, humidity),
+            hourly_perimeters=hourly
+        )
+    
+    def predict_from_event(self, event_data: Dict[str, Any], parameters: Dict[str, Any]) -> WildfirePredictionResult:
+        """
+        Generate prediction from event data.
+        """
+        return self.predict(**WildfireHeuristicModel.event_arguments(event_data, parameters))
+    
+    def stream_from_event(self,
+                          event_data: Dict[str, Any],
+                          parameters: Dict[str, Any]) -> Generator[Dict[str, Any], None, WildfirePredictionResult]:
+        """
+        Yield the simulation state after each forecast hour as soon as it is
+        computed, then return the final hour's result (without the hourly perimeters).
+        """
+        arguments = WildfireHeuristicModel.event_arguments(event_data, parameters)
+        final = None
+        for final in self.iter_hours(**arguments):
+            yield final
+        
+        return WildfirePredictionResult(
+            predicted_perimeter=final["perimeter"],
+            spread_distance_km=final["spread_distance_km"],
+            area_affected_km2=final["area_km2"],
+            at_risk_infrastructure=None,
+            at_risk_population=None,
+            confidence_factors=heuristic_confidence_factors(
+                arguments["vegetation_density"], arguments["temperature"], arguments["humidity"]
+            )
+        )
+    
+    def predict_batch_from_events(self,
+                                  events: List[Dict[str, Any]],
+                                  parameters: List[Dict[str, Any]]) -> List[WildfirePredictionResult]:
+        """
+        Each event is its own simulation; run them in order.
+        """
+        return [self.predict_from_event(event, params) for event, params in zip(events, parameters)]
@@ -1,7 +1,55 @@
 import numpy as np
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Generator
 from ..schemas.prediction import WildfirePredictionResult
-from ..utils.geo_utils import create_fire_spread_polygon, calculate_affected_area
+from ..utils.geo_utils import (
+    create_fire_spread_polygon,
+    calculate_affected_area,
+    create_fire_spread_polygons,
+    calculate_affected_areas,
+    rings_to_geojson
+)
+from ..utils.metrics import timed
+from .ensemble import (
+    CONTOUR_BEARINGS,
+    ensemble_parameters,
+    ensemble_seed,
+    perturb_inputs,
+    probability_contours,
+    quantile_summary
+)
+
+def heuristic_confidence_factors(vegetation_density: float, temperature: float, humidity: float) -> Dict[str, float]:
+    """
+    Confidence factors of the heuristic rules, shared by the wildfire models.
+    """
+    # Calculate confidence based on input quality
+    confidence = 0.7  # Base confidence
+    
+    # Adjust confidence based on vegetation density
+    confidence += vegetation_density * 0.1
+    
+    # Adjust confidence based on temperature (higher temp = more confidence)
+    if temperature > 30:
+        confidence += 0.1
+    elif temperature < 10:
+        confidence -= 0.1
+    
+    # Adjust confidence based on humidity (lower humidity = more confidence)
+    if humidity < 30:
+        confidence += 0.1
+    elif humidity > 70:
+        confidence -= 0.1
+    
+    # Cap confidence between 0.5 and 0.9
+    confidence = max(0.5, min(0.9, confidence))
+    
+    return {
+        "wind_quality": 0.8,
+        "vegetation_quality": 0.6 + vegetation_density * 0.4,
+        "temperature_impact": max(0, min(1, (temperature - 10) / 30)),
+        "humidity_impact": max(0, min(1, (100 - humidity) / 70)),
+        "model_confidence": confidence
+    }
 
 class WildfireHeuristicModel:
     """
@@ -25,31 +73,11 @@ class WildfireHeuristicModel:
         """
         Generate a wildfire spread prediction using heuristic rules.
         """
-        # Calculate confidence based on input quality
-        confidence = 0.7  # Base confidence
-        
-        # Adjust confidence based on vegetation density
-        confidence += vegetation_density * 0.1
-        
-        # Adjust confidence based on temperature (higher temp = more confidence)
-        if temperature > 30:
-            confidence += 0.1
-        elif temperature < 10:
-            confidence -= 0.1
-        
-        # Adjust confidence based on humidity (lower humidity = more confidence)
-        if humidity < 30:
-            confidence += 0.1
-        elif humidity > 70:
-            confidence -= 0.1
-        
-        # Cap confidence between 0.5 and 0.9
-        confidence = max(0.5, min(0.9, confidence))
-        
         # Generate predicted fire perimeter
-        predicted_perimeter = create_fire_spread_polygon(
-            center_lon, center_lat, wind_speed, wind_direction, hours
-        )
+        with timed("perimeter_polygon"):
+            predicted_perimeter = create_fire_spread_polygon(
+                center_lon, center_lat, wind_speed, wind_direction, hours
+            )
         
         # Calculate affected area
         area_affected = calculate_affected_area(predicted_perimeter)
@@ -58,13 +86,7 @@ class WildfireHeuristicModel:
         spread_distance = 0.2 * wind_speed * hours * (1 + vegetation_density)
         
         # Prepare confidence factors
-        confidence_factors = {
-            "wind_quality": 0.8,
-            "vegetation_quality": 0.6 + vegetation_density * 0.4,
-            "temperature_impact": max(0, min(1, (temperature - 10) / 30)),
-            "humidity_impact": max(0, min(1, (100 - humidity) / 70)),
-            "model_confidence": confidence
-        }
+        confidence_factors = heuristic_confidence_factors(vegetation_density, temperature, humidity)
         
         return WildfirePredictionResult(
             predicted_perimeter=predicted_perimeter,
@@ -75,11 +97,176 @@ class WildfireHeuristicModel:
             confidence_factors=confidence_factors
         )
     
-    def predict_from_event(self, event_data: Dict[str, Any], parameters: Dict[str, Any]) -> WildfirePredictionResult:
+    def iter_hours(self,
+                   center_lon: float,
+                   center_lat: float,
+                   wind_speed: float,
+                   wind_direction: float,
+                   vegetation_density: float = 0.5,
+                   temperature: float = 20,
+                   humidity: float = 50,
+                   hours: int = 6) -> Iterator[Dict[str, Any]]:
         """
-        Generate prediction from event data.
+        Yield the perimeter, affected area and spread distance after each
+        forecast hour, computing each hour only when it is requested.
+        """
+        for hour in range(1, hours + 1):
+            perimeter = create_fire_spread_polygon(center_lon, center_lat, wind_speed, wind_direction, hour)
+            yield {
+                "hour": hour,
+                "perimeter": perimeter,
+                "area_km2": calculate_affected_area(perimeter),
+                "spread_distance_km": 0.2 * wind_speed * hour * (1 + vegetation_density)
+            }
+    
+    def predict_batch(self,
+                      center_lon: np.ndarray,
+                      center_lat: np.ndarray,
+                      wind_speed: np.ndarray,
+                      wind_direction: np.ndarray,
+                      vegetation_density: np.ndarray,
+                      temperature: np.ndarray,
+                      humidity: np.ndarray,
+                      hours: np.ndarray) -> List[WildfirePredictionResult]:
+        """
+        Generate predictions for N events at once, in input order.
+        Every argument is a length-N array; results match predict() per event.
+        """
+        arrays = self.predict_arrays(
+            center_lon, center_lat, wind_speed, wind_direction,
+            vegetation_density, temperature, humidity, hours
+        )
+        
+        perimeters = rings_to_geojson(arrays["perimeters"])
+        spread_distances = arrays["spread_distance_km"].tolist()
+        areas = arrays["area_affected_km2"].tolist()
+        factor_names = ["wind_quality", "vegetation_quality", "temperature_impact",
+                        "humidity_impact", "model_confidence"]
+        factor_rows = zip(*(arrays[name].tolist() for name in factor_names))
+        
+        # Values come straight from validated float arrays, so skip per-result validation
+        return [
+            WildfirePredictionResult.model_construct(
+                predicted_perimeter=perimeter,
+                spread_distance_km=spread_distance,
+                area_affected_km2=area,
+                at_risk_infrastructure=None,
+                at_risk_population=None,
+                confidence_factors=dict(zip(factor_names, factors))
+            )
+            for perimeter, spread_distance, area, factors
+            in zip(perimeters, spread_distances, areas, factor_rows)
+        ]
+    
+    def predict_arrays(self,
+                       center_lon: np.ndarray,
+                       center_lat: np.ndarray,
+                       wind_speed: np.ndarray,
+                       wind_direction: np.ndarray,
+                       vegetation_density: np.ndarray,
+                       temperature: np.ndarray,
+                       humidity: np.ndarray,
+                       hours: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Array core of predict_batch: the same heuristic rules as predict(),
+        evaluated with whole-array operations and returned as arrays.
+        """
+        vegetation_density = np.asarray(vegetation_density, dtype=float)
+        temperature = np.asarray(temperature, dtype=float)
+        humidity = np.asarray(humidity, dtype=float)
+        wind_speed = np.asarray(wind_speed, dtype=float)
+        hours = np.asarray(hours)
+        
+        confidence = 0.7 + vegetation_density * 0.1
+        confidence = confidence + np.where(temperature > 30, 0.1, np.where(temperature < 10, -0.1, 0.0))
+        confidence = confidence + np.where(humidity < 30, 0.1, np.where(humidity > 70, -0.1, 0.0))
+        confidence = np.clip(confidence, 0.5, 0.9)
+        
+        with timed("perimeter_polygon_batch"):
+            perimeters = create_fire_spread_polygons(
+                center_lon, center_lat, wind_speed, wind_direction, hours
+            )
+        
+        return {
+            "perimeters": perimeters,
+            "area_affected_km2": calculate_affected_areas(perimeters),
+            "spread_distance_km": 0.2 * wind_speed * hours * (1 + vegetation_density),
+            "wind_quality": np.full(vegetation_density.shape, 0.8),
+            "vegetation_quality": 0.6 + vegetation_density * 0.4,
+            "temperature_impact": np.clip((temperature - 10) / 30, 0, 1),
+            "humidity_impact": np.clip((100 - humidity) / 70, 0, 1),
+            "model_confidence": confidence
+        }
+    
+    def predict_ensemble(self,
+                         center_lon: float,
+                         center_lat: float,
+                         wind_speed: float,
+                         wind_direction: float,
+                         vegetation_density: float = 0.5,
+                         temperature: float = 20,
+                         humidity: float = 50,
+                         hours: int = 6,
+                         members: int = 1000,
+                         spreads: Optional[Dict[str, float]] = None,
+                         levels: Tuple[float, ...] = (0.1, 0.5, 0.9)) -> WildfirePredictionResult:
+        """
+        Monte Carlo ensemble: run the heuristic for `members` perturbed copies of
+        the inputs in one array pass and summarize them as burn-probability
+        contours and spread quantiles. The 50% contour is the predicted perimeter.
+        The random seed is derived from the inputs, so results are reproducible.
+        """
+        seed = ensemble_seed(center_lon, center_lat, wind_speed, wind_direction,
+                             vegetation_density, temperature, humidity, hours, members)
+        rng = np.random.default_rng(seed)
+        inputs = perturb_inputs(rng, members, wind_speed, wind_direction, humidity, vegetation_density, spreads)
+        
+        with timed("ensemble_members"):
+            arrays = self.predict_arrays(
+                np.full(members, center_lon), np.full(members, center_lat),
+                inputs["wind_speed"], inputs["wind_direction"], inputs["vegetation_density"],
+                np.full(members, temperature), inputs["humidity"], np.full(members, hours)
+            )
+        
+        # Each member is an ellipse centered on the ignition point (see
+        # create_fire_spread_polygon); its radius along bearing theta is
+        # a*b / hypot(b*cos(theta - phi), a*sin(theta - phi)) with a = 1.5 and b = 0.7 times the base spread
+        with timed("ensemble_contours"):
+            bearings = np.linspace(0, 2 * np.pi, CONTOUR_BEARINGS, endpoint=False)
+            base_spread_km = 0.2 * inputs["wind_speed"] * hours
+            relative = bearings[None, :] - np.radians((450 - inputs["wind_direction"]) % 360)[:, None]
+            radii = base_spread_km[:, None] * (1.5 * 0.7) / np.hypot(0.7 * np.cos(relative), 1.5 * np.sin(relative))
+            
+            contour_levels = tuple(sorted(set(levels) | {0.5}))
+            rings = probability_contours(center_lon, center_lat, radii, bearings, contour_levels)
+            contour_areas = calculate_affected_areas(rings).tolist()
+            contours = [
+                {"probability": level, "perimeter": perimeter, "area_km2": area}
+                for level, perimeter, area in zip(contour_levels, rings_to_geojson(rings), contour_areas)
+            ]
+        
+        median = contours[contour_levels.index(0.5)]
+        return WildfirePredictionResult.model_construct(
+            predicted_perimeter=median["perimeter"],
+            spread_distance_km=float(np.median(arrays["spread_distance_km"])),
+            area_affected_km2=median["area_km2"],
+            at_risk_infrastructure=None,
+            at_risk_population=None,
+            confidence_factors=heuristic_confidence_factors(vegetation_density, temperature, humidity),
+            ensemble={
+                "members": members,
+                "seed": seed,
+                "burn_probability_contours": contours,
+                "spread_distance_km": quantile_summary(arrays["spread_distance_km"], levels),
+                "area_affected_km2": quantile_summary(arrays["area_affected_km2"], levels)
+            }
+        )
+    
+    @staticmethod
+    def event_coordinates(event_data: Dict[str, Any]) -> List[float]:
+        """
+        Extract the [lon, lat] prediction center from an event's geometry.
         """
-        # Extract coordinates from event
         geometry = event_data.get("geometry", {})
         coordinates = None
         
@@ -94,23 +281,91 @@ class WildfireHeuristicModel:
         if not coordinates or len(coordinates) < 2:
             raise ValueError("Invalid event coordinates")
         
-        # Extract parameters with defaults
-        wind_speed = parameters.get("wind_speed", 10.0)
-        wind_direction = parameters.get("wind_direction", 0.0)
-        vegetation_density = parameters.get("vegetation_density", 0.5)
-        temperature = parameters.get("temperature", 20.0)
-        humidity = parameters.get("humidity", 50.0)
-        hours = parameters.get("forecast_hours", 6)
-        
-        return self.predict(
-            center_lon=coordinates[0],
-            center_lat=coordinates[1],
-            wind_speed=wind_speed,
-            wind_direction=wind_direction,
-            vegetation_density=vegetation_density,
-            temperature=temperature,
-            humidity=humidity,
-            hours=hours
+        return coordinates
+    
+    @classmethod
+    def event_arguments(cls, event_data: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        predict() keyword arguments for an event: its center plus the
+        parameters, with defaults for any that are missing.
+        """
+        coordinates = cls.event_coordinates(event_data)
+        return {
+            "center_lon": coordinates[0],
+            "center_lat": coordinates[1],
+            "wind_speed": parameters.get("wind_speed", 10.0),
+            "wind_direction": parameters.get("wind_direction", 0.0),
+            "vegetation_density": parameters.get("vegetation_density", 0.5),
+            "temperature": parameters.get("temperature", 20.0),
+            "humidity": parameters.get("humidity", 50.0),
+            "hours": parameters.get("forecast_hours", 6)
+        }
+    
+    def predict_from_event(self, event_data: Dict[str, Any], parameters: Dict[str, Any]) -> WildfirePredictionResult:
+        """
+        Generate prediction from event data.
+        """
+        return self.predict(**self.event_arguments(event_data, parameters))
+    
+    def stream_from_event(self,
+                          event_data: Dict[str, Any],
+                          parameters: Dict[str, Any]) -> Generator[Dict[str, Any], None, WildfirePredictionResult]:
+        """
+        Yield each forecast hour of a prediction as it is computed, then return
+        the final hour's result. The hours are not kept, so the result has no
+        hourly perimeters.
+        """
+        arguments = self.event_arguments(event_data, parameters)
+        final = None
+        for final in self.iter_hours(**arguments):
+            yield final
+        
+        return WildfirePredictionResult(
+            predicted_perimeter=final["perimeter"],
+            spread_distance_km=final["spread_distance_km"],
+            area_affected_km2=final["area_km2"],
+            at_risk_infrastructure=None,
+            at_risk_population=None,
+            confidence_factors=heuristic_confidence_factors(
+                arguments["vegetation_density"], arguments["temperature"], arguments["humidity"]
+            )
+        )
+    
+    def predict_ensemble_from_event(self, event_data: Dict[str, Any], parameters: Dict[str, Any]) -> WildfirePredictionResult:
+        """
+        Generate an ensemble prediction from event data; the member count,
+        perturbation spreads and contour levels come from the parameters.
+        """
+        options = ensemble_parameters(parameters)
+        
+        return self.predict_ensemble(
+            **self.event_arguments(event_data, parameters),
+            members=options["members"],
+            spreads=options["spreads"],
+            levels=options["levels"]
+        )
+    
+    def predict_batch_from_events(self,
+                                  events: List[Dict[str, Any]],
+                                  parameters: List[Dict[str, Any]]) -> List[WildfirePredictionResult]:
+        """
+        Generate predictions for several events, applying the same parameter
+        defaults as predict_from_event.
+        """
+        coordinates = np.array([self.event_coordinates(event) for event in events], dtype=float).reshape(-1, 2)
+        
+        def column(name: str, default: float) -> np.ndarray:
+            return np.array([params.get(name, default) for params in parameters], dtype=float)
+        
+        return self.predict_batch(
+            center_lon=coordinates[:, 0],
+            center_lat=coordinates[:, 1],
+            wind_speed=column("wind_speed", 10.0),
+            wind_direction=column("wind_direction", 0.0),
+            vegetation_density=column("vegetation_density", 0.5),
+            temperature=column("temperature", 20.0),
+            humidity=column("humidity", 50.0),
+            hours=column("forecast_hours", 6)
         )
 
 # Create a singleton instance
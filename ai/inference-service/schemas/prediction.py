@@ -20,12 +20,17 @@ class PredictionResponse(BaseModel):
 
 class WildfirePredictionRequest(BaseModel):
     event_id: str
-    wind_speed: float = Field(..., ge=0, description="Wind speed in km/h")
-    wind_direction: float = Field(..., ge=0, le=360, description="Wind direction in degrees")
-    vegetation_density: Optional[float] = Field(0.5, ge=0, le=1, description="Vegetation density (0-1)")
-    temperature: Optional[float] = Field(20, description="Temperature in Celsius")
-    humidity: Optional[float] = Field(50, ge=0, le=100, description="Relative humidity percentage")
+    wind_speed: Optional[float] = Field(None, ge=0, description="Wind speed in km/h (fetched from weather data if omitted)")
+    wind_direction: Optional[float] = Field(None, ge=0, le=360, description="Wind direction in degrees (fetched from weather data if omitted)")
+    vegetation_density: Optional[float] = Field(None, ge=0, le=1, description="Vegetation density (0-1) (sampled from NDVI rasters if omitted)")
+    temperature: Optional[float] = Field(None, description="Temperature in Celsius (fetched from weather data if omitted)")
+    humidity: Optional[float] = Field(None, ge=0, le=100, description="Relative humidity percentage (fetched from weather data if omitted)")
     forecast_hours: int = Field(6, ge=1, le=72)
+    model: Optional[str] = Field(None, description="Wildfire model to use (see /models); defaults to wildfire_heuristic_v1")
+    ensemble: Optional[int] = Field(None, ge=2, le=5000, description="Run a Monte Carlo ensemble of this many perturbed members (models with the \"ensemble\" capability)")
+
+class WildfireBatchPredictionRequest(BaseModel):
+    requests: List[WildfirePredictionRequest] = Field(..., min_length=1, max_length=10000)
 
 class WildfirePredictionResult(BaseModel):
     predicted_perimeter: Dict[str, Any]  # GeoJSON
@@ -33,4 +38,7 @@ class WildfirePredictionResult(BaseModel):
     area_affected_km2: float
     at_risk_infrastructure: Optional[List[Dict[str, Any]]] = None
     at_risk_population: Optional[int] = None
-    confidence_factors: Dict[str, float]
\ No newline at end of file
+    confidence_factors: Dict[str, float]
+    hourly_perimeters: Optional[List[Dict[str, Any]]] = None  # Per-hour perimeter, area and spread distance
+    ensemble: Optional[Dict[str, Any]] = None  # Burn-probability contours and spread quantiles of an ensemble run
+    vegetation_footprint: Optional[Dict[str, float]] = None  # Mean/max NDVI vegetation density inside the predicted perimeter
\ No newline at end of file
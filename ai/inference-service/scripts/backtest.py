@@ -0,0 +1,43 @@
+"""
+Backtest a model against an archive of past fires with observed perimeters.
+
+Run with: python scripts/backtest.py <archive.jsonl|archive.jsonl.gz|url> --output results.jsonl
+          [--model ID] [--workers N] [--chunk-size N]
+
+Each archive line is an event (id, ignition point geometry) with its
+observed_perimeter and the prediction parameters. Per-event scores are
+appended to the output as they finish; rerun with the same output to resume
+after an interruption.
+"""
+import argparse
+import json
+import sys
+import types
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+PACKAGE_NAME = "inference_service"
+
+# Register the inference-service directory as a package so its relative imports resolve
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [str(SERVICE_DIR)]
+    sys.modules[PACKAGE_NAME] = package
+
+from inference_service.services.backtest import run_backtest  # noqa: E402
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("archive", help="JSON Lines archive of past fires (optionally gzip, or an http(s) URL)")
+    parser.add_argument("--output", required=True, help="per-event results (JSON Lines); also the resume checkpoint")
+    parser.add_argument("--model", default=None, help="registered model id (defaults to the default model)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (defaults to BACKTEST_WORKERS or one per core)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="events per worker task")
+    parser.add_argument("--progress-every", type=int, default=20, help="report every N chunks (0 to disable)")
+    args = parser.parse_args()
+    
+    summary = run_backtest(args.archive, args.output, args.model, args.workers, args.chunk_size, args.progress_every)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
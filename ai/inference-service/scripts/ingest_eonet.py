@@ -0,0 +1,35 @@
+"""
+Bulk-load an EONET feed into the PostGIS events and event_sources tables.
+
+Run with: python scripts/ingest_eonet.py <file|file.gz|url> [--batch-size N] [--dsn DSN]
+"""
+import argparse
+import json
+import sys
+import types
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+PACKAGE_NAME = "inference_service"
+
+# Register the inference-service directory as a package so its relative imports resolve
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [str(SERVICE_DIR)]
+    sys.modules[PACKAGE_NAME] = package
+
+from inference_service.services.event_ingest import ingest_events  # noqa: E402
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", help="EONET feed: JSON, JSON Lines, gzip file, or http(s) URL")
+    parser.add_argument("--batch-size", type=int, default=None, help="events per COPY/merge batch")
+    parser.add_argument("--dsn", default=None, help="connection string (defaults to DB_CONN_STRING)")
+    parser.add_argument("--progress-every", type=int, default=20, help="report every N batches (0 to disable)")
+    args = parser.parse_args()
+    
+    stats = ingest_events(args.source, args.dsn, args.batch_size, args.progress_every)
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
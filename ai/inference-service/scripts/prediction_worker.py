@@ -0,0 +1,87 @@
+"""
+Run prediction job workers without the HTTP API, draining the shared Redis job queue.
+
+Run with: JOB_QUEUE_BACKEND=redis python scripts/prediction_worker.py [--concurrency N]
+
+Start as many of these processes as needed; each claims a job atomically
+under a lease (JOB_LEASE_SECONDS), so a job runs in one of them at a time,
+and is woken by new jobs instead of polling. If a worker dies mid-job, its
+lease runs out and the next claim by any worker takes the job over. Predictions are written to the
+configured prediction store, which must be shared (postgres) for API
+replicas to serve them. With RESCORE_ENABLED, the worker also re-scores
+active wildfires whose inputs changed (run it in one process only).
+"""
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import types
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+PACKAGE_NAME = "inference_service"
+
+# Register the inference-service directory as a package so its relative imports resolve
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [str(SERVICE_DIR)]
+    sys.modules[PACKAGE_NAME] = package
+
+from inference_service.config import settings  # noqa: E402
+from inference_service.models.registry import model_registry  # noqa: E402
+from inference_service.services.asset_index import asset_index  # noqa: E402
+from inference_service.services.data_fetcher import data_fetcher  # noqa: E402
+from inference_service.services.event_repository import event_repository  # noqa: E402
+from inference_service.services.prediction_service import prediction_service  # noqa: E402
+from inference_service.services.alert_matcher import alert_matcher  # noqa: E402
+from inference_service.services.rescore_scheduler import rescore_scheduler  # noqa: E402
+
+async def run(concurrency: int) -> None:
+    if settings.JOB_QUEUE_BACKEND.lower() != "redis":
+        print("Warning: JOB_QUEUE_BACKEND is not redis; this worker only sees jobs queued in its own process")
+    
+    prediction_service.jobs.concurrency = concurrency
+    model_registry.load()
+    await model_registry.warm_pools()
+    asset_index.load(
+        infrastructure_path=settings.ASSET_INFRASTRUCTURE_PATH,
+        population_path=settings.ASSET_POPULATION_PATH,
+        cell_size_deg=settings.ASSET_INDEX_CELL_DEG,
+        max_results=settings.AT_RISK_MAX_ASSETS
+    )
+    await event_repository.start()
+    await prediction_service.store.start()
+    await prediction_service.jobs.start()
+    await alert_matcher.start()
+    if settings.STARTUP_WARMUP:
+        await prediction_service.warm_up()
+    if settings.RESCORE_ENABLED:
+        await rescore_scheduler.start()
+    print(f"Prediction worker started ({concurrency} concurrent jobs)")
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    
+    await rescore_scheduler.close()
+    await alert_matcher.close()
+    await prediction_service.close()
+    await event_repository.close()
+    await data_fetcher.close_session()
+    model_registry.close()
+    print(json.dumps(prediction_service.jobs.stats(), indent=2))
+    if settings.RESCORE_ENABLED:
+        print(json.dumps(rescore_scheduler.stats(), indent=2))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_QUEUE_CONCURRENCY,
+                        help="jobs run at once (defaults to JOB_QUEUE_CONCURRENCY)")
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency))
+
+if __name__ == "__main__":
+    main()
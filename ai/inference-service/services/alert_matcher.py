@@ -0,0 +1,545 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+import numpy as np
+import shapely
+from ..config import settings
+from ..utils.metrics import metrics, timed, STAGE_SECONDS
+from ..utils.serialization import encode_json
+
+# user_alerts rows: id, user_id, category_id, min_severity and region (a shapely geometry)
+Alert = Dict[str, Any]
+
+# Event severities in increasing order; events of unknown severity rank lowest
+SEVERITY_RANKS = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+NO_THRESHOLD = -1
+
+ALERT_LATENCY_SECONDS = metrics.histogram(
+    "terrapulse_alert_match_latency_seconds",
+    "Time from a prediction being stored to its alert notifications being published"
+)
+ALERT_NOTIFICATIONS = metrics.counter(
+    "terrapulse_alert_notifications_total", "Alert matches by outcome", ("result",)
+)
+
+def severity_rank(severity: Optional[str]) -> int:
+    return SEVERITY_RANKS.get(str(severity or "").lower(), 0)
+
+class AlertSet:
+    """
+    Alert regions in an STRtree, with the subscription filters as arrays
+    parallel to the tree's geometries.
+    """
+    
+    def __init__(self, alerts: List[Alert]):
+        self.ids = np.array([alert["id"] for alert in alerts], dtype=np.int64)
+        self.users = np.array([alert["user_id"] for alert in alerts], dtype=object)
+        self.categories = np.array([alert["category_id"] or "" for alert in alerts], dtype=object)
+        self.min_ranks = np.array([
+            severity_rank(alert["min_severity"]) if alert["min_severity"] else NO_THRESHOLD for alert in alerts
+        ], dtype=np.int8)
+        regions = np.empty(len(alerts), dtype=object)
+        regions[:] = [alert["region"] for alert in alerts]
+        self.tree = shapely.STRtree(regions)
+        self.positions = {alert_id: position for position, alert_id in enumerate(self.ids.tolist())}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def match(self,
+              perimeters: np.ndarray,
+              categories: np.ndarray,
+              ranks: np.ndarray,
+              active: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (perimeter index, alert position) of every alert region intersecting a
+        perimeter whose event passes the alert's category and severity filters.
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        perimeter_index, position = self.tree.query(perimeters, predicate="intersects")
+        keep = ((self.categories[position] == "") | (self.categories[position] == categories[perimeter_index])) \
+            & (self.min_ranks[position] <= ranks[perimeter_index])
+        if active is not None:
+            keep &= active[position]
+        return perimeter_index[keep], position[keep]
+
+class AlertSnapshot:
+    """
+    One consistent view of every alert: the set built at the last rebuild
+    with a mask of the alerts since removed or edited, plus a small set of the
+    alerts added or edited since. Snapshots are never modified, so matching
+    can run on one in a worker thread while refreshes publish the next.
+    """
+    
+    def __init__(self, base: AlertSet, active: np.ndarray, delta: AlertSet):
+        self.base = base
+        self.active = active
+        self.delta = delta
+    
+    def __len__(self) -> int:
+        return int(self.active.sum()) + len(self.delta)
+    
+    def match(self,
+              perimeters: np.ndarray,
+              categories: np.ndarray,
+              ranks: np.ndarray) -> List[Tuple[int, int, str]]:
+        """
+        (perimeter index, alert id, user id) of every matching subscription.
+        """
+        matches = []
+        for alert_set, active in ((self.base, self.active), (self.delta, None)):
+            perimeter_index, position = alert_set.match(perimeters, categories, ranks, active)
+            matches.extend(zip(perimeter_index.tolist(), alert_set.ids[position].tolist(), alert_set.users[position].tolist()))
+        return matches
+
+class AlertIndex:
+    """
+    The alert regions being matched. STRtrees cannot be updated in place, so
+    changes go to a delta set (rebuilt on every change, and kept small) and a
+    mask over the base set; once the delta outgrows rebuild_threshold alerts,
+    everything is folded into a new base.
+    """
+    
+    def __init__(self, rebuild_threshold: int = 2000):
+        self.rebuild_threshold = rebuild_threshold
+        self.alerts: Dict[int, Alert] = {}
+        self.delta_ids: List[int] = []
+        self.snapshot = self._build([], [])
+        self.rebuilds = 0
+    
+    def __len__(self) -> int:
+        return len(self.alerts)
+    
+    @staticmethod
+    def _build(base: List[Alert], delta: List[Alert]) -> AlertSnapshot:
+        base_set = AlertSet(base)
+        return AlertSnapshot(base_set, np.ones(len(base_set), dtype=bool), AlertSet(delta))
+    
+    def replace(self, alerts: Iterable[Alert]) -> None:
+        """
+        Swap in a complete set of alerts.
+        """
+        self.alerts = {alert["id"]: alert for alert in alerts}
+        self.delta_ids = []
+        self.snapshot = self._build(list(self.alerts.values()), [])
+        self.rebuilds += 1
+    
+    def update(self, upserted: Iterable[Alert] = (), removed: Iterable[int] = ()) -> None:
+        """
+        Add or replace some alerts and drop others.
+        """
+        upserted = list(upserted)
+        removed = {alert_id for alert_id in removed if alert_id in self.alerts}
+        if not upserted and not removed:
+            return
+        for alert_id in removed:
+            del self.alerts[alert_id]
+        for alert in upserted:
+            self.alerts[alert["id"]] = alert
+        
+        changed = removed.union(alert["id"] for alert in upserted)
+        self.delta_ids = [alert_id for alert_id in self.delta_ids if alert_id not in changed]
+        self.delta_ids.extend(alert["id"] for alert in upserted)
+        if len(self.delta_ids) > self.rebuild_threshold:
+            self.replace(list(self.alerts.values()))
+            return
+        
+        base = self.snapshot.base
+        active = self.snapshot.active.copy()
+        for alert_id in changed:
+            position = base.positions.get(alert_id)
+            if position is not None:
+                active[position] = False
+        self.snapshot = AlertSnapshot(base, active, AlertSet([self.alerts[alert_id] for alert_id in self.delta_ids]))
+
+class AlertSource(ABC):
+    """
+    Where alert subscriptions come from.
+    """
+    
+    name = "source"
+    
+    async def start(self) -> None:
+        pass
+    
+    async def close(self) -> None:
+        pass
+    
+    @abstractmethod
+    async def load(self, after_id: Optional[int] = None) -> List[Alert]:
+        """
+        Alerts with a region, in id order; only those with ids above after_id when given.
+        """
+        ...
+
+class MemoryAlertSource(AlertSource):
+    """
+    Alerts registered in this process, with regions as GeoJSON or shapely geometries.
+    """
+    
+    name = "memory"
+    
+    def __init__(self):
+        self.alerts: Dict[int, Alert] = {}
+    
+    def add(self, alerts: Iterable[Dict[str, Any]]) -> None:
+        for alert in alerts:
+            region = alert["region"]
+            if isinstance(region, dict):
+                region = shapely.from_geojson(encode_json(region).decode())
+            self.alerts[alert["id"]] = {
+                "id": alert["id"],
+                "user_id": alert.get("user_id"),
+                "category_id": alert.get("category_id"),
+                "min_severity": alert.get("min_severity"),
+                "region": region
+            }
+    
+    def remove(self, alert_ids: Iterable[int]) -> None:
+        for alert_id in alert_ids:
+            self.alerts.pop(alert_id, None)
+    
+    async def load(self, after_id: Optional[int] = None) -> List[Alert]:
+        return [
+            alert for alert_id, alert in sorted(self.alerts.items())
+            if after_id is None or alert_id > after_id
+        ]
+
+# Regions come back as WKB and are parsed in one vectorized call
+POSTGRES_ALERTS_SQL = """
+SELECT id, user_id, category_id, min_severity, ST_AsBinary(region::geometry) AS region
+FROM user_alerts
+WHERE region IS NOT NULL AND (%(after)s::integer IS NULL OR id > %(after)s::integer)
+ORDER BY id
+"""
+
+class PostgresAlertSource(AlertSource):
+    """
+    The user_alerts table of database/init.sql.
+    """
+    
+    name = "postgres"
+    
+    def __init__(self, conn_string: str):
+        self.conn_string = conn_string
+        self.pool = None
+    
+    async def start(self) -> None:
+        from psycopg_pool import AsyncConnectionPool
+        from psycopg.rows import dict_row
+        
+        self.pool = AsyncConnectionPool(self.conn_string, min_size=1, max_size=2,
+                                        kwargs={"row_factory": dict_row}, open=False)
+        await self.pool.open()
+    
+    async def close(self) -> None:
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+    
+    async def load(self, after_id: Optional[int] = None) -> List[Alert]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(POSTGRES_ALERTS_SQL, {"after": after_id})
+            rows = await cursor.fetchall()
+        regions = shapely.from_wkb([bytes(row["region"]) for row in rows]) if rows else []
+        for row, region in zip(rows, regions):
+            row["region"] = region
+        return rows
+
+class NotificationPublisher(ABC):
+    name = "publisher"
+    
+    @abstractmethod
+    async def publish(self, notifications: List[Dict[str, Any]]) -> None:
+        ...
+    
+    async def close(self) -> None:
+        pass
+
+class RedisNotificationPublisher(NotificationPublisher):
+    """
+    Publishes to the Redis channel the notification service relays to its
+    WebSocket clients, one pipelined round-trip per batch.
+    """
+    
+    name = "redis"
+    
+    def __init__(self, redis_url: str, channel: str):
+        import redis.asyncio as redis
+        
+        self.client = redis.from_url(redis_url)
+        self.channel = channel
+    
+    async def publish(self, notifications: List[Dict[str, Any]]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for notification in notifications:
+            pipeline.publish(self.channel, encode_json(notification))
+        await pipeline.execute()
+    
+    async def close(self) -> None:
+        await self.client.close()
+
+class MemoryNotificationPublisher(NotificationPublisher):
+    """
+    Keeps the most recent notifications, for running without Redis.
+    """
+    
+    name = "memory"
+    
+    def __init__(self, max_items: int = 1000):
+        self.notifications: deque = deque(maxlen=max_items)
+    
+    async def publish(self, notifications: List[Dict[str, Any]]) -> None:
+        self.notifications.extend(notifications)
+
+class AlertMatcher:
+    """
+    Fans new predictions out to the users whose alert regions they threaten.
+    Stored predictions are queued without waiting; a consumer task takes them
+    in batches, finds the alert regions each predicted perimeter intersects
+    (one bulk STRtree query per batch, in a worker thread), applies the
+    alerts' category and severity filters and publishes a notification per
+    match. A user is notified about an event at most once per
+    renotify_seconds per alert, however often the event is re-predicted.
+    Alerts are re-read incrementally (new ids) every refresh_seconds and in
+    full, picking up edits and deletions, every full_refresh_seconds.
+    """
+    
+    def __init__(self,
+                 source: AlertSource,
+                 publisher: NotificationPublisher,
+                 refresh_seconds: float = 5,
+                 full_refresh_seconds: float = 300,
+                 renotify_seconds: float = 3600,
+                 queue_size: int = 10000,
+                 batch_size: int = 256,
+                 rebuild_threshold: int = 2000):
+        self.source = source
+        self.publisher = publisher
+        self.refresh_seconds = refresh_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self.renotify_seconds = renotify_seconds
+        self.batch_size = batch_size
+        self.index = AlertIndex(rebuild_threshold)
+        self.queue: "asyncio.Queue[Tuple[float, Dict[str, Any], Dict[str, Any]]]" = asyncio.Queue(queue_size)
+        self.last_id: Optional[int] = None
+        self.last_full_refresh = 0.0
+        self.notified: Dict[Tuple[int, str], float] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.counters = {"predictions": 0, "matched": 0, "published": 0, "suppressed": 0, "dropped": 0,
+                         "publish_errors": 0, "refreshes": 0, "refresh_errors": 0}
+    
+    @property
+    def running(self) -> bool:
+        return bool(self.tasks)
+    
+    async def start(self) -> None:
+        if self.running:
+            return
+        await self.source.start()
+        try:
+            await self.refresh(full=True)
+        except Exception as e:
+            self.counters["refresh_errors"] += 1
+            print(f"Error loading alerts: {e}")
+        self.tasks = [asyncio.create_task(self._consume()), asyncio.create_task(self._refresh_periodically())]
+    
+    async def close(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await self.source.close()
+        await self.publisher.close()
+    
+    def submit(self, predictions: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> None:
+        """
+        Queue stored predictions for matching; never blocks. Predictions are
+        dropped (and counted) when the queue is full or the matcher is not running.
+        """
+        if not self.running:
+            return
+        now = time.perf_counter()
+        for prediction, event_data in zip(predictions, events):
+            if not prediction["result"].get("predicted_perimeter"):
+                continue
+            try:
+                self.queue.put_nowait((now, prediction, event_data))
+            except asyncio.QueueFull:
+                self.counters["dropped"] += 1
+                ALERT_NOTIFICATIONS.inc("dropped")
+    
+    async def refresh(self, full: bool = False) -> None:
+        start = time.monotonic()
+        if full:
+            alerts = await self.source.load()
+            self.index.replace(alerts)
+            self.last_full_refresh = start
+        else:
+            alerts = await self.source.load(after_id=self.last_id)
+            self.index.update(upserted=alerts)
+        if alerts:
+            self.last_id = max(self.last_id or 0, max(alert["id"] for alert in alerts))
+        self.counters["refreshes"] += 1
+        self._forget_notified()
+    
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh(full=time.monotonic() - self.last_full_refresh >= self.full_refresh_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["refresh_errors"] += 1
+                print(f"Error refreshing alerts: {e}")
+    
+    def _forget_notified(self) -> None:
+        cutoff = time.monotonic() - self.renotify_seconds
+        self.notified = {key: notified_at for key, notified_at in self.notified.items() if notified_at > cutoff}
+    
+    async def _consume(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self.process(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error matching predictions against alerts: {e}")
+    
+    async def process(self, batch: List[Tuple[float, Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Match a batch of (queued at, prediction, event) and publish the
+        notifications. Returns the notifications published.
+        """
+        self.counters["predictions"] += len(batch)
+        snapshot = self.index.snapshot
+        matches: List[Tuple[int, int, str]] = []
+        if len(snapshot):
+            perimeters = shapely.from_geojson([
+                encode_json(prediction["result"]["predicted_perimeter"]).decode() for _, prediction, _ in batch
+            ], on_invalid="ignore")
+            categories = np.array([event_data.get("category") or "" for _, _, event_data in batch], dtype=object)
+            ranks = np.array([severity_rank(event_data.get("severity")) for _, _, event_data in batch], dtype=np.int8)
+            with timed("alert_match"):
+                matches = await asyncio.to_thread(snapshot.match, perimeters, categories, ranks)
+        
+        now = time.monotonic()
+        notifications = []
+        common: Dict[int, Dict[str, Any]] = {}
+        for index, alert_id, user_id in matches:
+            _, prediction, event_data = batch[index]
+            key = (alert_id, prediction["event_id"])
+            if now - self.notified.get(key, -np.inf) < self.renotify_seconds:
+                self.counters["suppressed"] += 1
+                continue
+            self.notified[key] = now
+            if index not in common:
+                common[index] = self._notification(prediction, event_data)
+            notifications.append({
+                **common[index],
+                "id": f"{prediction['prediction_id']}:{alert_id}",
+                "userId": user_id,
+                "alertId": alert_id
+            })
+        self.counters["matched"] += len(matches)
+        ALERT_NOTIFICATIONS.inc("suppressed", amount=len(matches) - len(notifications))
+        
+        if notifications:
+            try:
+                await self.publisher.publish(notifications)
+                self.counters["published"] += len(notifications)
+                ALERT_NOTIFICATIONS.inc("published", amount=len(notifications))
+            except Exception as e:
+                # Unsent notifications may go out after the next prediction of the event
+                for notification in notifications:
+                    self.notified.pop((notification["alertId"], notification["eventId"]), None)
+                self.counters["publish_errors"] += 1
+                ALERT_NOTIFICATIONS.inc("failed", amount=len(notifications))
+                print(f"Error publishing alert notifications: {e}")
+                notifications = []
+        
+        done = time.perf_counter()
+        latency = ALERT_LATENCY_SECONDS.labels()
+        for queued_at, _, _ in batch:
+            latency.observe(done - queued_at)
+        return notifications
+    
+    @staticmethod
+    def _notification(prediction: Dict[str, Any], event_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The fields shared by a prediction's notifications, in the notification
+        service's format (id, eventId, type, message) plus the prediction that
+        triggered them; each match adds its id (prediction id and alert id, so
+        redelivery is idempotent), user and alert.
+        """
+        title = event_data.get("title") or prediction["event_id"]
+        return {
+            "eventId": prediction["event_id"],
+            "type": "alert_match",
+            "message": f"{title}: the {prediction['forecast_hours']}-hour predicted perimeter reaches one of your alert regions",
+            "predictionId": prediction["prediction_id"],
+            "severity": event_data.get("severity"),
+            "category": event_data.get("category")
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        match_ms = STAGE_SECONDS.labels("alert_match")
+        latency = ALERT_LATENCY_SECONDS.labels()
+        return {
+            "source": self.source.name,
+            "publisher": self.publisher.name,
+            "running": self.running,
+            "alerts": len(self.index),
+            "pending_changes": len(self.index.delta_ids),
+            "index_rebuilds": self.index.rebuilds,
+            "queue_depth": self.queue.qsize(),
+            **self.counters,
+            "match_ms_p50": round(match_ms.quantile(0.5) * 1000, 3),
+            "match_ms_p95": round(match_ms.quantile(0.95) * 1000, 3),
+            "latency_ms_p50": round(latency.quantile(0.5) * 1000, 3),
+            "latency_ms_p95": round(latency.quantile(0.95) * 1000, 3)
+        }
+
+def create_alert_matcher() -> AlertMatcher:
+    """
+    Build the alert matcher over the source and publisher selected by settings.
+    """
+    if settings.ALERT_SOURCE.lower() == "postgres":
+        source: AlertSource = PostgresAlertSource(settings.DB_CONN_STRING)
+    else:
+        source = MemoryAlertSource()
+    if settings.ALERT_PUBLISHER.lower() == "redis":
+        publisher: NotificationPublisher = RedisNotificationPublisher(settings.REDIS_URL, settings.ALERT_CHANNEL)
+    else:
+        publisher = MemoryNotificationPublisher()
+    
+    return AlertMatcher(
+        source,
+        publisher,
+        refresh_seconds=settings.ALERT_REFRESH_SECONDS,
+        full_refresh_seconds=settings.ALERT_FULL_REFRESH_SECONDS,
+        renotify_seconds=settings.ALERT_RENOTIFY_SECONDS,
+        queue_size=settings.ALERT_QUEUE_SIZE,
+        batch_size=settings.ALERT_BATCH_SIZE,
+        rebuild_threshold=settings.ALERT_REBUILD_THRESHOLD
+    )
+
+# Create a singleton instance
+alert_matcher = create_alert_matcher()
+
+def _alert_metrics():
+    stats = alert_matcher.stats()
+    return [
+        ("terrapulse_alert_regions", "gauge", "Alert regions indexed for matching", [({}, stats["alerts"])]),
+        ("terrapulse_alert_queue_depth", "gauge", "Stored predictions waiting to be matched against alerts",
+         [({}, stats["queue_depth"])])
+    ]
+
+metrics.register_collector(_alert_metrics)
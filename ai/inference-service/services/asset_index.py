@@ -0,0 +1,228 @@
+import json
+import math
+import os
+import sys
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+from ..utils.geo_utils import PreparedPerimeter
+
+LON_COLUMNS = ("lon", "longitude", "x")
+LAT_COLUMNS = ("lat", "latitude", "y")
+
+def _find_column(names: List[str], candidates: Tuple[str, ...]) -> str:
+    lowered = {name.lower(): name for name in names}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    raise ValueError(f"None of the columns {candidates} found in asset data")
+
+def load_point_assets(path: str) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Load point assets from CSV, Parquet or GeoJSON.
+    Returns lon and lat arrays plus the remaining attributes as columns.
+    Non-point GeoJSON features are reduced to their centroid.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    
+    if extension in (".geojson", ".json"):
+        from shapely.geometry import shape
+        
+        with open(path) as f:
+            features = json.load(f).get("features", [])
+        lon = np.empty(len(features))
+        lat = np.empty(len(features))
+        properties: Dict[str, list] = {}
+        for i, feature in enumerate(features):
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Point":
+                lon[i], lat[i] = geometry["coordinates"][:2]
+            else:
+                centroid = shape(geometry).centroid
+                lon[i], lat[i] = centroid.x, centroid.y
+            for key, value in (feature.get("properties") or {}).items():
+                properties.setdefault(key, [None] * len(features))[i] = value
+        return lon, lat, {key: np.array(values) for key, values in properties.items()}
+    
+    import pandas as pd
+    
+    if extension == ".parquet":
+        frame = pd.read_parquet(path)
+    elif extension == ".csv":
+        frame = pd.read_csv(path)
+    else:
+        raise ValueError(f"Unsupported asset file type: {path}")
+    
+    lon_column = _find_column(list(frame.columns), LON_COLUMNS)
+    lat_column = _find_column(list(frame.columns), LAT_COLUMNS)
+    columns = {
+        name: frame[name].to_numpy()
+        for name in frame.columns if name not in (lon_column, lat_column)
+    }
+    return frame[lon_column].to_numpy(dtype=float), frame[lat_column].to_numpy(dtype=float), columns
+
+class PointGridIndex:
+    """
+    Uniform lon/lat grid over point assets.
+    Points are sorted by cell id, so the cells of one grid row covered by a
+    bounding box form a single contiguous slice found with searchsorted.
+    """
+    
+    def __init__(self, lon: np.ndarray, lat: np.ndarray, cell_size_deg: float = 0.05):
+        self.cell_size_deg = cell_size_deg
+        self.lon = np.ascontiguousarray(lon, dtype=float)
+        self.lat = np.ascontiguousarray(lat, dtype=float)
+        self.columns_count = int(np.ceil(360 / cell_size_deg)) + 1
+        
+        cell_ids = self._cell_ids(self.lon, self.lat)
+        self.order = np.argsort(cell_ids, kind="stable")
+        self.sorted_cell_ids = cell_ids[self.order]
+    
+    def _cells(self, lon, lat) -> Tuple[np.ndarray, np.ndarray]:
+        column = np.floor((np.asarray(lon) + 180) / self.cell_size_deg).astype(np.int64)
+        row = np.floor((np.asarray(lat) + 90) / self.cell_size_deg).astype(np.int64)
+        return column, row
+    
+    def _cell_ids(self, lon, lat) -> np.ndarray:
+        column, row = self._cells(lon, lat)
+        return row * self.columns_count + column
+    
+    def __len__(self) -> int:
+        return len(self.lon)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.lon.nbytes + self.lat.nbytes + self.order.nbytes + self.sorted_cell_ids.nbytes
+    
+    def candidates(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> np.ndarray:
+        """
+        Indices of the points in every grid cell touching the bounding box.
+        """
+        (column_0, column_1), (row_0, row_1) = self._cells([min_lon, max_lon], [min_lat, max_lat])
+        rows = np.arange(row_0, row_1 + 1) * self.columns_count
+        starts = np.searchsorted(self.sorted_cell_ids, rows + column_0, side="left")
+        stops = np.searchsorted(self.sorted_cell_ids, rows + column_1, side="right")
+        slices = [self.order[start:stop] for start, stop in zip(starts, stops) if stop > start]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+    
+    def query(self, perimeter: PreparedPerimeter) -> np.ndarray:
+        """
+        Indices of the points inside a prepared perimeter.
+        """
+        candidates = self.candidates(*perimeter.bounds)
+        if len(candidates) == 0:
+            return candidates
+        inside = perimeter.contains(self.lon[candidates], self.lat[candidates])
+        return candidates[inside]
+
+class AssetIndex:
+    """
+    Spatial index over infrastructure facilities and population grid cells,
+    used to fill in the at-risk fields of wildfire predictions.
+    """
+    
+    def __init__(self):
+        self.infrastructure: Optional[PointGridIndex] = None
+        self.infrastructure_columns: Dict[str, np.ndarray] = {}
+        self.population: Optional[PointGridIndex] = None
+        self.population_counts: Optional[np.ndarray] = None
+        self.max_results = 100
+        self.build_stats: Dict[str, Any] = {}
+    
+    @property
+    def loaded(self) -> bool:
+        return self.infrastructure is not None or self.population is not None
+    
+    def load(self,
+             infrastructure_path: str = "",
+             population_path: str = "",
+             cell_size_deg: float = 0.05,
+             max_results: int = 100) -> None:
+        """
+        Load and index the asset files; either path may be empty.
+        """
+        self.max_results = max_results
+        
+        if infrastructure_path:
+            start = time.perf_counter()
+            lon, lat, columns = load_point_assets(infrastructure_path)
+            loaded = time.perf_counter()
+            self.infrastructure = PointGridIndex(lon, lat, cell_size_deg)
+            self.infrastructure_columns = columns
+            self.build_stats["infrastructure"] = self._stats(
+                self.infrastructure, columns, loaded - start, time.perf_counter() - loaded
+            )
+        
+        if population_path:
+            start = time.perf_counter()
+            lon, lat, columns = load_point_assets(population_path)
+            loaded = time.perf_counter()
+            self.population = PointGridIndex(lon, lat, cell_size_deg)
+            self.population_counts = np.asarray(
+                columns[_find_column(list(columns), ("population", "pop", "count"))], dtype=float
+            )
+            self.build_stats["population"] = self._stats(
+                self.population, {"population": self.population_counts}, loaded - start, time.perf_counter() - loaded
+            )
+    
+    @staticmethod
+    def _stats(index: PointGridIndex,
+               columns: Dict[str, np.ndarray],
+               load_seconds: float,
+               build_seconds: float) -> Dict[str, Any]:
+        memory = index.nbytes
+        for values in columns.values():
+            memory += values.nbytes
+            if values.dtype == object:
+                # nbytes only counts the pointers; add each distinct referenced object once
+                memory += sum(sys.getsizeof(value) for value in {id(value): value for value in values}.values())
+        return {
+            "assets": len(index),
+            "load_seconds": round(load_seconds, 3),
+            "build_seconds": round(build_seconds, 3),
+            "memory_mb": round(memory / 2 ** 20, 1)
+        }
+    
+    def assess(self, perimeter_geojson: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], Optional[int]]:
+        """
+        Infrastructure inside a perimeter (at most max_results entries) and the
+        summed population of the grid cells whose centroid lies inside it.
+        Fields whose dataset is not loaded are returned as None.
+        """
+        perimeter = PreparedPerimeter(perimeter_geojson)
+        
+        infrastructure = None
+        if self.infrastructure is not None:
+            hits = self.infrastructure.query(perimeter)[:self.max_results]
+            infrastructure = [
+                {
+                    "lon": float(self.infrastructure.lon[i]),
+                    "lat": float(self.infrastructure.lat[i]),
+                    **{name: _to_python(values[i]) for name, values in self.infrastructure_columns.items()}
+                }
+                for i in hits
+            ]
+        
+        population = None
+        if self.population is not None:
+            hits = self.population.query(perimeter)
+            population = int(round(float(self.population_counts[hits].sum())))
+        
+        return infrastructure, population
+
+def _to_python(value: Any) -> Any:
+    """
+    Convert a column value to a JSON-safe Python value.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+# Create a singleton instance
+asset_index = AssetIndex()
@@ -0,0 +1,292 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Dict, Any, Optional, List, Iterator, Iterable, Tuple, Set
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from ..config import settings
+from ..models.registry import ModelRegistry, build_model
+from ..models.wildfire_heuristic import WildfireHeuristicModel
+from ..utils.geo_utils import calculate_affected_area
+from ..utils.serialization import encode_json
+from .event_ingest import open_feed
+
+# Local projection for scoring, the same one the models lay perimeters out in:
+# 1° latitude ≈ 111 km, 1° longitude ≈ 111 km * cos(latitude of the fire)
+KM_PER_DEGREE = 111
+
+# Per-event metrics kept for the aggregate, in this order
+METRIC_NAMES = ("iou", "area_error_km2", "area_error_ratio", "spread_error_km")
+
+def model_spec(model_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The spec of a registered model (settings.MODEL_DIR / MODEL_PATH), or of the default one.
+    """
+    specs = ModelRegistry(settings.MODEL_DIR, settings.MODEL_PATH).discover()
+    if model_id is None:
+        defaults = [spec for spec in specs if spec.get("default")] or specs
+        if not defaults:
+            raise ValueError("No models registered")
+        return defaults[0]
+    for spec in specs:
+        if spec["id"] == model_id:
+            return spec
+    raise ValueError(f"Unknown model: {model_id}")
+
+def _local_km(geometries: np.ndarray, origins: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Geometries moved into km east/north of their own origin ([lon, lat] per
+    geometry). Also returns the owning geometry of every coordinate.
+    """
+    index = shapely.get_coordinates(geometries, return_index=True)[1]
+    scale = np.column_stack((KM_PER_DEGREE * np.cos(np.radians(origins[:, 1])), np.full(len(origins), KM_PER_DEGREE)))
+    return shapely.transform(geometries, lambda coords: (coords - origins[index]) * scale[index]), index
+
+def score_events(records: List[Dict[str, Any]], results: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Compare predictions with the observed perimeters of their archive records:
+    intersection over union of the two perimeters, the error of the predicted
+    area (km² and ratio), and the error of the spread distance, observed as
+    the farthest point of the observed perimeter from the ignition point
+    unless the record gives `observed_spread_km`.
+    """
+    origins = np.array([WildfireHeuristicModel.event_coordinates(record) for record in records], dtype=float)
+    observed = shapely.make_valid(np.array([shape(record["observed_perimeter"]) for record in records], dtype=object))
+    predicted = shapely.make_valid(np.array([shape(result.predicted_perimeter) for result in results], dtype=object))
+    
+    observed_km, observed_index = _local_km(observed, origins)
+    predicted_km = _local_km(predicted, origins)[0]
+    intersection = shapely.area(shapely.intersection(observed_km, predicted_km))
+    union = shapely.area(observed_km) + shapely.area(predicted_km) - intersection
+    iou = np.divide(intersection, union, out=np.zeros(len(records)), where=union > 0)
+    
+    reach = np.zeros(len(records))
+    np.maximum.at(reach, observed_index, np.hypot(*shapely.get_coordinates(observed_km).T))
+    
+    rows = []
+    for i, (record, result) in enumerate(zip(records, results)):
+        observed_area = calculate_affected_area(record["observed_perimeter"])
+        observed_spread = float(record.get("observed_spread_km", reach[i]))
+        rows.append({
+            "id": record["id"],
+            "forecast_hours": record["parameters"].get("forecast_hours"),
+            "iou": round(float(iou[i]), 4),
+            "predicted_area_km2": round(result.area_affected_km2, 3),
+            "observed_area_km2": round(observed_area, 3),
+            "area_error_km2": round(result.area_affected_km2 - observed_area, 3),
+            "area_error_ratio": round(result.area_affected_km2 / observed_area - 1, 4) if observed_area > 0 else None,
+            "predicted_spread_km": round(result.spread_distance_km, 3),
+            "observed_spread_km": round(observed_spread, 3),
+            "spread_error_km": round(result.spread_distance_km - observed_spread, 3)
+        })
+    return rows
+
+def parse_record(line: str) -> Optional[Dict[str, Any]]:
+    """
+    An archive record: one JSON object per line, an EONET-style event (id and
+    geometry of the ignition point) plus `observed_perimeter` (GeoJSON
+    Polygon or MultiPolygon) and the prediction `parameters` (weather,
+    vegetation, forecast_hours). Top-level `forecast_hours` is accepted too.
+    None for blank or unusable lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "id" not in record or "geometry" not in record:
+        return None
+    if (record.get("observed_perimeter") or {}).get("type") not in ("Polygon", "MultiPolygon"):
+        return None
+    parameters = dict(record.get("parameters") or {})
+    if "forecast_hours" in record:
+        parameters.setdefault("forecast_hours", record["forecast_hours"])
+    record["id"] = str(record["id"])
+    record["parameters"] = parameters
+    return record
+
+# Model and already scored event ids of this process when it is a backtest worker
+_worker_model = None
+_worker_done: Set[str] = set()
+
+def _init_worker(spec: Dict[str, Any], done: Set[str]) -> None:
+    global _worker_model, _worker_done
+    _worker_model = build_model(spec)
+    _worker_done = done
+
+def backtest_chunk(lines: List[str], model=None, done: Optional[Set[str]] = None) -> Tuple[bytes, np.ndarray, int]:
+    """
+    Predict and score one chunk of archive lines through the model's batch
+    path. Returns the result rows as JSON Lines, their metrics (one row per
+    scored event, METRIC_NAMES columns) and the number of lines skipped.
+    Events the batch cannot score are retried alone; failures become rows
+    with an "error" and no metrics.
+    """
+    model = model or _worker_model
+    done = _worker_done if done is None else done
+    records = [record for record in map(parse_record, lines) if record is not None]
+    skipped = sum(1 for line in lines if line.strip()) - len(records)
+    records = [record for record in records if record["id"] not in done]
+    
+    def run(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = model.predict_batch_from_events(batch, [record["parameters"] for record in batch])
+        return score_events(batch, results)
+    
+    try:
+        rows = run(records) if records else []
+    except Exception:
+        rows = []
+        for record in records:
+            try:
+                rows.extend(run([record]))
+            except Exception as e:
+                rows.append({"id": record["id"], "error": f"{type(e).__name__}: {e}"})
+    
+    scored = [row for row in rows if "error" not in row]
+    metrics = np.array([[np.nan if row[name] is None else row[name] for name in METRIC_NAMES] for row in scored],
+                       dtype=float).reshape(-1, len(METRIC_NAMES))
+    return b"".join(encode_json(row) + b"\n" for row in rows), metrics, skipped
+
+def read_checkpoint(path: str) -> Tuple[Set[str], List[np.ndarray], int]:
+    """
+    Event ids already in a results file, their metrics and the failed count.
+    A line cut short by an interruption is truncated away so that appending
+    resumes cleanly.
+    """
+    done: Set[str] = set()
+    metrics: List[List[float]] = []
+    failed = 0
+    if not os.path.exists(path):
+        return done, [np.empty((0, len(METRIC_NAMES)))], failed
+    
+    with open(path, "rb+") as f:
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            f.truncate(complete)
+    for line in data[:complete].splitlines():
+        row = json.loads(line)
+        done.add(row["id"])
+        if "error" in row:
+            failed += 1
+        else:
+            metrics.append([np.nan if row[name] is None else row[name] for name in METRIC_NAMES])
+    return done, [np.array(metrics, dtype=float).reshape(-1, len(METRIC_NAMES))], failed
+
+def iter_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_backtest(archive: str,
+                  spec: Dict[str, Any],
+                  done: Set[str],
+                  workers: int,
+                  chunk_size: int) -> Iterator[Tuple[bytes, np.ndarray, int]]:
+    """
+    Stream backtest_chunk results from a pool of worker processes, in
+    completion order. The archive is read as the workers drain it, with at
+    most two chunks per worker in flight, so memory stays bounded for any
+    archive size. Workers parse the lines themselves; this process only
+    splits the archive and collects the output.
+    """
+    with open_feed(archive) as stream, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(spec, done)
+    ) as executor:
+        chunks = iter_chunks(stream, chunk_size)
+        pending = set()
+        while True:
+            for chunk in islice(chunks, 2 * workers - len(pending)):
+                pending.add(executor.submit(backtest_chunk, chunk))
+            if not pending:
+                return
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+def summarize(metrics: np.ndarray, failed: int, skipped: int) -> Dict[str, Any]:
+    """
+    Aggregate scores over every scored event.
+    """
+    iou, area_error, area_ratio, spread_error = metrics.T
+    area_ratio = area_ratio[~np.isnan(area_ratio)]
+    
+    def stat(values: np.ndarray, fn) -> Optional[float]:
+        return round(float(fn(values)), 4) if len(values) else None
+    
+    return {
+        "events": len(metrics),
+        "failed": failed,
+        "skipped": skipped,
+        "iou_mean": stat(iou, np.mean),
+        "iou_median": stat(iou, np.median),
+        "iou_p10": stat(iou, lambda v: np.percentile(v, 10)),
+        "area_error_km2_mean": stat(area_error, np.mean),
+        "area_error_km2_mae": stat(np.abs(area_error), np.mean),
+        "area_error_ratio_median": stat(area_ratio, np.median),
+        "area_error_ratio_median_abs": stat(np.abs(area_ratio), np.median),
+        "spread_error_km_mean": stat(spread_error, np.mean),
+        "spread_error_km_mae": stat(np.abs(spread_error), np.mean),
+        "spread_error_km_rmse": stat(spread_error, lambda v: np.sqrt(np.mean(v ** 2)))
+    }
+
+def run_backtest(archive: str,
+                 output: str,
+                 model_id: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None,
+                 progress_every: int = 0) -> Dict[str, Any]:
+    """
+    Replay an archive of past fires (see parse_record) through a registered
+    model and score every prediction against the observed perimeter.
+    Per-event rows are appended to `output` (JSON Lines) as chunks finish;
+    the file is also the checkpoint, so running again with the same output
+    skips the events already in it and the summary covers both runs.
+    """
+    spec = model_spec(model_id)
+    workers = workers or settings.BACKTEST_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or settings.BACKTEST_CHUNK_SIZE
+    done, metrics, failed = read_checkpoint(output)
+    resumed = len(done)
+    if resumed:
+        print(f"Resuming: {resumed:,} events already scored in {output}")
+    
+    skipped = 0
+    chunks = 0
+    scored = 0
+    start = time.perf_counter()
+    with open(output, "ab") as out:
+        for lines, chunk_metrics, chunk_skipped in iter_backtest(archive, spec, done, workers, chunk_size):
+            out.write(lines)
+            out.flush()
+            os.fsync(out.fileno())
+            metrics.append(chunk_metrics)
+            chunk_failed = lines.count(b"\n") - len(chunk_metrics)
+            failed += chunk_failed
+            skipped += chunk_skipped
+            scored += len(chunk_metrics) + chunk_failed
+            chunks += 1
+            if progress_every and chunks % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{scored:,} events in {elapsed:.1f}s ({scored / elapsed:,.0f} events/s)")
+    
+    elapsed = time.perf_counter() - start
+    summary = summarize(np.concatenate(metrics), failed, skipped)
+    summary.update({
+        "model": spec["id"],
+        "model_version": spec.get("version"),
+        "resumed": resumed,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(scored / elapsed, 1) if elapsed > 0 else 0.0
+    })
+    return summary
@@ -1,19 +1,32 @@
-import aiohttp
-import async_timeout
+import asyncio
 import json
-from typing import Dict, Any, Optional
+import numpy as np
+from typing import Dict, Any, Optional, List
 from ..config import settings
+from ..services.weather_cache import WeatherCache, create_weather_cache
+from ..services.weather_grid import WeatherGrid, create_weather_grid
+from ..services.vegetation_raster import VegetationRaster, create_vegetation_raster
+from ..utils.metrics import metrics, timed, UPSTREAM_ERRORS
 
 class DataFetcher:
     """
     Service to fetch additional data needed for predictions.
     """
     
-    def __init__(self):
+    def __init__(self,
+                 weather_cache: Optional[WeatherCache] = None,
+                 weather_grid: Optional[WeatherGrid] = None,
+                 vegetation_raster: Optional[VegetationRaster] = None):
         self.session = None
+        self.weather_cache = weather_cache
+        self.weather_grid = weather_grid
+        self.vegetation_raster = vegetation_raster
     
     async def get_session(self):
         if self.session is None:
+            # Imported on first use: replicas served by the offline weather grid never need it
+            import aiohttp
+            
             self.session = aiohttp.ClientSession()
         return self.session
     
@@ -21,19 +34,81 @@ class DataFetcher:
         if self.session:
             await self.session.close()
             self.session = None
+        if self.weather_cache is not None:
+            await self.weather_cache.close()
+        if self.vegetation_raster is not None:
+            self.vegetation_raster.close()
     
-    async def fetch_weather_data(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    async def fetch_weather_data(self, lat: float, lon: float, hours: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
-        Fetch current weather data from OpenWeatherMap API.
+        Fetch current weather data: from the offline forecast grid when it
+        covers the point (with an hourly series over the next `hours`), otherwise
+        from OpenWeatherMap through the weather cache.
         """
+        if self.weather_grid is not None:
+            weather = self.fetch_grid_weather([lat], [lon], hours)[0]
+            if weather is not None:
+                return weather
+        
         if not settings.OPENWEATHER_API_KEY:
             return None
-            
+        
+        if self.weather_cache is None:
+            return await self.fetch_weather_upstream(lat, lon)
+        
+        return await self.weather_cache.get_or_fetch(lat, lon, self.fetch_weather_upstream)
+    
+    @timed("weather_grid")
+    def fetch_grid_weather(self,
+                           lats: List[float],
+                           lons: List[float],
+                           hours: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Weather for many points from the offline forecast grid in one vectorized
+        lookup; None for points it does not cover (or for all, without a grid).
+        """
+        if self.weather_grid is None:
+            return [None] * len(lats)
+        return self.weather_grid.lookup(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float), hours)
+    
+    async def fetch_weather_batch(self,
+                                  lats: List[float],
+                                  lons: List[float],
+                                  concurrency: int = 8) -> List[Optional[Dict[str, Any]]]:
+        """
+        Current weather for many points: one vectorized forecast grid lookup,
+        then OpenWeatherMap through the weather cache for the points the grid
+        does not cover, at most `concurrency` requests at a time.
+        """
+        weather = self.fetch_grid_weather(lats, lons)
+        missing = [index for index, value in enumerate(weather) if value is None]
+        if not missing or not settings.OPENWEATHER_API_KEY:
+            return weather
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch(index: int) -> None:
+            async with semaphore:
+                if self.weather_cache is None:
+                    weather[index] = await self.fetch_weather_upstream(lats[index], lons[index])
+                else:
+                    weather[index] = await self.weather_cache.get_or_fetch(lats[index], lons[index], self.fetch_weather_upstream)
+        
+        await asyncio.gather(*(fetch(index) for index in missing))
+        return weather
+    
+    @timed("weather_upstream")
+    async def fetch_weather_upstream(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """
+        Fetch current weather data from OpenWeatherMap API.
+        """
+        import async_timeout
+        
         try:
             session = await self.get_session()
-            url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={settings.OPENWEATHER_API_KEY}&units=metric"
+            url = f"{settings.OPENWEATHER_BASE_URL}/weather?lat={lat}&lon={lon}&appid={settings.OPENWEATHER_API_KEY}&units=metric"
             
-            async with async_timeout.timeout(10):
+            async with async_timeout.timeout(settings.UPSTREAM_TIMEOUT_SECONDS):
                 async with session.get(url) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -44,18 +119,73 @@ class DataFetcher:
                             "wind_direction": data.get("wind", {}).get("deg", 0),
                             "conditions": data.get("weather", [{}])[0].get("main", "Unknown")
                         }
+                    UPSTREAM_ERRORS.inc("openweather")
         except Exception as e:
+            UPSTREAM_ERRORS.inc("openweather")
             print(f"Error fetching weather data: {e}")
             return None
     
     async def fetch_vegetation_data(self, lat: float, lon: float) -> Optional[float]:
         """
-        Placeholder for fetching vegetation density data.
-        In a real implementation, this would use satellite data APIs.
+        Fetch vegetation density (0-1) from the NDVI rasters; None where they have no data.
+        """
+        if self.vegetation_raster is None:
+            # No rasters configured: medium vegetation density everywhere
+            return 0.5
+        return (await self.fetch_vegetation_batch([lat], [lon]))[0]
+    
+    @timed("vegetation_raster")
+    async def fetch_vegetation_batch(self, lats: List[float], lons: List[float]) -> List[Optional[float]]:
+        """
+        Vegetation density at many points in one call, reading each NDVI tile at most once.
+        Tile reads run off the event loop.
+        """
+        if self.vegetation_raster is None:
+            return [0.5] * len(lats)
+        values = await asyncio.to_thread(self.vegetation_raster.sample, np.asarray(lats), np.asarray(lons))
+        return [None if value != value else value for value in values.tolist()]
+    
+    @timed("vegetation_footprint")
+    async def fetch_vegetation_footprints(self, rings: List[Any]) -> List[Optional[Dict[str, float]]]:
         """
-        # This is a simplified placeholder
-        # Real implementation would use NDVI data from satellite APIs
-        return 0.5  # Default medium vegetation density
+        Mean/max vegetation density inside each [lon, lat] ring (e.g. predicted
+        perimeters); None for all without rasters or where they have no data.
+        """
+        if self.vegetation_raster is None or not rings:
+            return [None] * len(rings)
+        return await asyncio.to_thread(self.vegetation_raster.footprints, rings)
 
 # Create a singleton instance
-data_fetcher = DataFetcher()
\ No newline at end of file
+data_fetcher = DataFetcher(
+    weather_cache=create_weather_cache(),
+    weather_grid=create_weather_grid(),
+    vegetation_raster=create_vegetation_raster()
+)
+
+def _weather_cache_metrics():
+    if data_fetcher.weather_cache is None:
+        return []
+    stats = data_fetcher.weather_cache.stats()
+    return [
+        ("terrapulse_weather_cache_requests_total", "counter", "Weather cache lookups by result",
+         [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]), ({"result": "coalesced"}, stats["coalesced"])]),
+        ("terrapulse_weather_cache_backend_errors_total", "counter", "Weather cache backend failures",
+         [({}, stats["backend_errors"])])
+    ]
+
+metrics.register_collector(_weather_cache_metrics)
+
+def _vegetation_tile_metrics():
+    if data_fetcher.vegetation_raster is None:
+        return []
+    stats = data_fetcher.vegetation_raster.stats()
+    return [
+        ("terrapulse_vegetation_tile_requests_total", "counter", "NDVI tile cache lookups by result",
+         [({"result": "hit"}, stats["tile_hits"]), ({"result": "miss"}, stats["tile_misses"])]),
+        ("terrapulse_vegetation_tile_evictions_total", "counter", "NDVI tiles evicted from the tile cache",
+         [({}, stats["tile_evictions"])]),
+        ("terrapulse_vegetation_tile_cache_bytes", "gauge", "Memory held by decoded NDVI tiles",
+         [({}, data_fetcher.vegetation_raster.cache.bytes)])
+    ]
+
+metrics.register_collector(_vegetation_tile_metrics)
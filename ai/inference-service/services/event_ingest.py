@@ -0,0 +1,294 @@
+import gzip
+import io
+import json
+import time
+import urllib.request
+from itertools import islice
+from typing import Dict, Any, Optional, List, Iterator, Iterable, IO, Tuple
+from ..config import settings
+
+# Bytes read from the feed at a time; the parse buffer holds at most one chunk plus one event
+READ_CHUNK_CHARS = 1 << 16
+
+STAGING_TABLE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS events_staging (
+    id TEXT,
+    title TEXT,
+    description TEXT,
+    category_id TEXT,
+    geometry TEXT,
+    acquired TIMESTAMPTZ,
+    updated TIMESTAMPTZ,
+    source_url TEXT,
+    sources JSONB
+) ON COMMIT DELETE ROWS
+"""
+
+COPY_SQL = """
+COPY events_staging (id, title, description, category_id, geometry, acquired, updated, source_url, sources)
+FROM STDIN
+"""
+
+# One merge per batch: newest row per id wins, unknown categories become NULL,
+# and rows whose `updated` has not changed are left alone
+MERGE_EVENTS_SQL = """
+INSERT INTO events (id, title, description, category_id, geometry, acquired, updated, source_url)
+SELECT DISTINCT ON (s.id)
+    s.id,
+    left(s.title, 512),
+    s.description,
+    c.id,
+    ST_GeomFromGeoJSON(s.geometry)::geography,
+    s.acquired,
+    s.updated,
+    left(s.source_url, 1024)
+FROM events_staging s
+LEFT JOIN event_categories c ON c.id = s.category_id
+ORDER BY s.id, s.updated DESC NULLS LAST
+ON CONFLICT (id) DO UPDATE SET
+    title = EXCLUDED.title,
+    description = EXCLUDED.description,
+    category_id = EXCLUDED.category_id,
+    geometry = EXCLUDED.geometry,
+    acquired = EXCLUDED.acquired,
+    updated = EXCLUDED.updated,
+    source_url = EXCLUDED.source_url
+WHERE events.updated IS DISTINCT FROM EXCLUDED.updated
+"""
+
+# event_sources has no natural key, so an event's sources are replaced wholesale
+DELETE_SOURCES_SQL = """
+DELETE FROM event_sources WHERE event_id IN (SELECT DISTINCT id FROM events_staging)
+"""
+
+INSERT_SOURCES_SQL = """
+INSERT INTO event_sources (event_id, source_id, url)
+SELECT DISTINCT ON (s.id, src->>'id') s.id, src->>'id', left(src->>'url', 1024)
+FROM events_staging s, jsonb_array_elements(s.sources) AS src
+ORDER BY s.id, src->>'id', s.updated DESC NULLS LAST
+"""
+
+def open_feed(source: str) -> IO[str]:
+    """
+    Open an EONET feed for streaming: an http(s) URL, a file path, or a
+    gzip-compressed file (*.gz).
+    """
+    if source.startswith(("http://", "https://")):
+        response = urllib.request.urlopen(source, timeout=settings.UPSTREAM_TIMEOUT_SECONDS)
+        raw = gzip.GzipFile(fileobj=response) if response.headers.get("Content-Encoding") == "gzip" else response
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    if source.endswith(".gz"):
+        return gzip.open(source, "rt", encoding="utf-8")
+    return open(source, "r", encoding="utf-8")
+
+class _JSONStream:
+    """
+    Incremental reader over a text stream that decodes one JSON value at a time,
+    so a feed is never held in memory as a whole.
+    """
+    
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.buffer = ""
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+    
+    def _fill(self) -> bool:
+        chunk = self.stream.read(READ_CHUNK_CHARS)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+    
+    def peek(self) -> str:
+        """
+        Next non-whitespace character, or "" at end of stream.
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+    
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed feed: expected {char!r}, found {found!r}")
+        self.position += 1
+    
+    def value(self) -> Any:
+        """
+        Decode the next complete JSON value, reading more input until it parses.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.position = end
+            return value
+    
+    def array_items(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.position += 1
+                continue
+            self.expect("]")
+            return
+
+def iter_eonet_events(stream: IO[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield events one at a time from an EONET feed ({"title": ..., "events": [...]}),
+    a bare JSON array of events, or JSON Lines with one event per line.
+    """
+    reader = _JSONStream(stream)
+    first = reader.peek()
+    
+    if first == "[":
+        yield from reader.array_items()
+        return
+    
+    if first != "{":
+        if first:
+            raise ValueError(f"Malformed feed: unexpected {first!r}")
+        return
+    
+    # Either the feed envelope or the first line of a JSON Lines archive: walk the
+    # object's keys and stream "events" without decoding it as a whole
+    reader.expect("{")
+    envelope = False
+    event: Dict[str, Any] = {}
+    while reader.peek() != "}":
+        key = reader.value()
+        reader.expect(":")
+        if key == "events" and reader.peek() == "[":
+            envelope = True
+            yield from reader.array_items()
+        else:
+            event[key] = reader.value()
+        if reader.peek() == ",":
+            reader.position += 1
+    reader.expect("}")
+    
+    if envelope:
+        return
+    yield event
+    while reader.peek():
+        yield reader.value()
+
+def event_rows(event: Dict[str, Any]) -> Optional[Tuple]:
+    """
+    Flatten an EONET event into a staging row. The event's geometry history is
+    reduced to its latest position; acquired/updated are its first/last dates.
+    """
+    event_id = event.get("id")
+    geometries = [g for g in event.get("geometry") or [] if g.get("coordinates") is not None]
+    if not event_id or not geometries:
+        return None
+    
+    geometries.sort(key=lambda g: g.get("date") or "")
+    latest = geometries[-1]
+    categories = event.get("categories") or [{}]
+    sources = [
+        {"id": source.get("id"), "url": source.get("url")}
+        for source in event.get("sources") or []
+    ]
+    
+    return (
+        str(event_id),
+        event.get("title") or str(event_id),
+        event.get("description"),
+        categories[0].get("id"),
+        json.dumps({"type": latest.get("type", "Point"), "coordinates": latest["coordinates"]}),
+        geometries[0].get("date"),
+        latest.get("date") or event.get("closed"),
+        event.get("link"),
+        json.dumps(sources)
+    )
+
+def iter_batches(rows: Iterable[Tuple], batch_size: int) -> Iterator[List[Tuple]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def ingest_events(source: str,
+                  conn_string: Optional[str] = None,
+                  batch_size: Optional[int] = None,
+                  progress_every: int = 0) -> Dict[str, Any]:
+    """
+    Stream an EONET feed into the events and event_sources tables.
+    Each batch is COPYed into a temporary staging table and merged with one
+    upsert in its own transaction, so memory stays bounded by the batch size.
+    Returns throughput and per-batch latency statistics.
+    """
+    import psycopg
+    
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    stats = {"events": 0, "skipped": 0, "batches": 0, "merged": 0}
+    latencies: List[float] = []
+    start = time.perf_counter()
+    
+    with open_feed(source) as stream, psycopg.connect(conn_string or settings.DB_CONN_STRING) as conn:
+        conn.execute(STAGING_TABLE_SQL)
+        conn.commit()
+        
+        def rows() -> Iterator[Tuple]:
+            for event in iter_eonet_events(stream):
+                row = event_rows(event)
+                if row is None:
+                    stats["skipped"] += 1
+                    continue
+                yield row
+        
+        for batch in iter_batches(rows(), batch_size):
+            batch_start = time.perf_counter()
+            with conn.transaction():
+                with conn.cursor() as cursor:
+                    with cursor.copy(COPY_SQL) as copy:
+                        for row in batch:
+                            copy.write_row(row)
+                    cursor.execute(MERGE_EVENTS_SQL)
+                    stats["merged"] += max(cursor.rowcount, 0)
+                    cursor.execute(DELETE_SOURCES_SQL)
+                    cursor.execute(INSERT_SOURCES_SQL)
+            latencies.append(time.perf_counter() - batch_start)
+            
+            stats["events"] += len(batch)
+            stats["batches"] += 1
+            if progress_every and stats["batches"] % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{stats['events']:,} events in {elapsed:.1f}s "
+                      f"({stats['events'] / elapsed:,.0f} events/s, last batch {latencies[-1] * 1000:.0f} ms)")
+    
+    elapsed = time.perf_counter() - start
+    stats.update({
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(stats["events"] / elapsed, 1) if elapsed > 0 else 0.0,
+        "batch_ms_p50": round(_percentile(latencies, 0.5) * 1000, 2),
+        "batch_ms_p95": round(_percentile(latencies, 0.95) * 1000, 2),
+        "batch_ms_max": round(max(latencies, default=0.0) * 1000, 2)
+    })
+    return stats
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from ..config import settings
+from ..utils.metrics import metrics
+
+EVENT_QUERY = """
+SELECT id, title, description, category_id, ST_AsGeoJSON(geometry)::json AS geometry,
+       acquired, updated, source_url, severity, confidence
+FROM events WHERE id = %s
+"""
+
+POOL_WAIT_SECONDS = metrics.histogram(
+    "terrapulse_event_db_pool_wait_seconds", "Time waiting for a pooled connection for an event lookup"
+)
+QUERY_SECONDS = metrics.histogram(
+    "terrapulse_event_db_query_seconds", "Event lookup query latency, excluding pool wait"
+)
+
+class EventRepository:
+    """
+    Event lookups against the PostGIS events table through an async connection
+    pool, with an in-process LRU of hot event rows.
+    Cached rows are served without a round-trip; a background task re-reads the
+    `updated` column of every cached event in one query and drops rows that changed.
+    Returned rows are shared with the cache and must be treated as read-only.
+    """
+    
+    def __init__(self,
+                 conn_string: str,
+                 min_size: int = 1,
+                 max_size: int = 10,
+                 pool_timeout: float = 5.0,
+                 max_entries: int = 1000,
+                 revalidate_seconds: float = 30.0):
+        self.conn_string = conn_string
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool_timeout = pool_timeout
+        self.max_entries = max_entries
+        self.revalidate_seconds = revalidate_seconds
+        self.pool = None
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.revalidate_task = None
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "not_found": 0, "invalidated": 0, "errors": 0}
+        self.pool_wait = POOL_WAIT_SECONDS.labels()
+        self.query_latency = QUERY_SECONDS.labels()
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.conn_string)
+    
+    async def start(self) -> None:
+        if not self.enabled or self.pool is not None:
+            return
+        from psycopg_pool import AsyncConnectionPool
+        from psycopg.rows import dict_row
+        
+        self.pool = AsyncConnectionPool(
+            self.conn_string,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            timeout=self.pool_timeout,
+            kwargs={"row_factory": dict_row},
+            open=False
+        )
+        await self.pool.open()
+        self.revalidate_task = asyncio.create_task(self._revalidate_periodically())
+    
+    async def close(self) -> None:
+        if self.revalidate_task:
+            self.revalidate_task.cancel()
+            self.revalidate_task = None
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+    
+    async def get(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch an event row, from the cache when it is hot.
+        Concurrent misses for the same event share one query.
+        """
+        event = self.cache.get(event_id)
+        if event is not None:
+            self.cache.move_to_end(event_id)
+            self.counters["hits"] += 1
+            return event
+        
+        pending = self.inflight.get(event_id)
+        if pending is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(pending)
+        
+        self.counters["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[event_id] = future
+        try:
+            event = await self._query(event_id)
+        except BaseException as e:
+            self.counters["errors"] += 1
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Waiters re-raise it; don't warn about an unretrieved exception
+                future.exception()
+            raise
+        finally:
+            self.inflight.pop(event_id, None)
+        
+        if event is None:
+            self.counters["not_found"] += 1
+        else:
+            self._remember(event_id, event)
+        future.set_result(event)
+        return event
+    
+    async def _query(self, event_id: str) -> Optional[Dict[str, Any]]:
+        requested = time.perf_counter()
+        async with self.pool.connection() as conn:
+            acquired = time.perf_counter()
+            self.pool_wait.observe(acquired - requested)
+            cursor = await conn.execute(EVENT_QUERY, (event_id,))
+            row = await cursor.fetchone()
+            self.query_latency.observe(time.perf_counter() - acquired)
+        return self._to_event(row) if row else None
+    
+    @staticmethod
+    def _to_event(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "category": row["category_id"],
+            "geometry": row["geometry"],
+            "acquired": row["acquired"],
+            "updated": row["updated"],
+            "source_url": row["source_url"],
+            "severity": row["severity"],
+            "confidence": float(row["confidence"]) if row["confidence"] is not None else None
+        }
+    
+    def _remember(self, event_id: str, event: Dict[str, Any]) -> None:
+        self.cache[event_id] = event
+        self.cache.move_to_end(event_id)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+    
+    def invalidate(self, event_id: str) -> None:
+        if self.cache.pop(event_id, None) is not None:
+            self.counters["invalidated"] += 1
+    
+    async def revalidate(self) -> None:
+        """
+        Drop cached events whose `updated` timestamp changed or that were deleted.
+        """
+        if not self.cache:
+            return
+        ids = list(self.cache)
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute("SELECT id, updated FROM events WHERE id = ANY(%s)", (ids,))
+            current = {row["id"]: row["updated"] for row in await cursor.fetchall()}
+        
+        for event_id in ids:
+            event = self.cache.get(event_id)
+            if event is not None and (event_id not in current or current[event_id] != event["updated"]):
+                self.invalidate(event_id)
+    
+    async def _revalidate_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.revalidate_seconds)
+            try:
+                await self.revalidate()
+            except Exception as e:
+                print(f"Error revalidating cached events: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+        stats: Dict[str, Any] = {
+            **self.counters,
+            "enabled": self.enabled,
+            "cached": len(self.cache),
+            "hit_rate": round((self.counters["hits"] + self.counters["coalesced"]) / lookups, 4) if lookups else 0.0,
+            "pool_wait_ms_p50": round(self.pool_wait.quantile(0.5) * 1000, 3),
+            "pool_wait_ms_p95": round(self.pool_wait.quantile(0.95) * 1000, 3),
+            "query_ms_p50": round(self.query_latency.quantile(0.5) * 1000, 3),
+            "query_ms_p95": round(self.query_latency.quantile(0.95) * 1000, 3)
+        }
+        if self.pool is not None:
+            pool_stats = self.pool.get_stats()
+            stats["pool"] = {
+                "size": pool_stats.get("pool_size", 0),
+                "available": pool_stats.get("pool_available", 0),
+                "waiting": pool_stats.get("requests_waiting", 0),
+                "requests": pool_stats.get("requests_num", 0),
+                "wait_ms_total": pool_stats.get("requests_wait_ms", 0),
+                "timeouts": pool_stats.get("requests_errors", 0)
+            }
+        return stats
+
+# Create a singleton instance
+event_repository = EventRepository(
+    settings.DB_CONN_STRING,
+    min_size=settings.EVENT_DB_POOL_MIN_SIZE,
+    max_size=settings.EVENT_DB_POOL_MAX_SIZE,
+    pool_timeout=settings.EVENT_DB_POOL_TIMEOUT,
+    max_entries=settings.EVENT_CACHE_MAX_ENTRIES,
+    revalidate_seconds=settings.EVENT_CACHE_REVALIDATE_SECONDS
+)
+
+def _event_repository_metrics():
+    if not event_repository.enabled:
+        return []
+    stats = event_repository.stats()
+    families = [
+        ("terrapulse_event_cache_requests_total", "counter", "Event cache lookups by result",
+         [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]), ({"result": "coalesced"}, stats["coalesced"])]),
+        ("terrapulse_event_cache_invalidations_total", "counter", "Cached events dropped after their updated timestamp changed",
+         [({}, stats["invalidated"])]),
+        ("terrapulse_event_cache_entries", "gauge", "Events held in the hot-event cache", [({}, stats["cached"])])
+    ]
+    if "pool" in stats:
+        families.append(("terrapulse_event_db_pool_connections", "gauge", "Event lookup pool connections",
+                         [({"state": "open"}, stats["pool"]["size"]), ({"state": "available"}, stats["pool"]["available"])]))
+        families.append(("terrapulse_event_db_pool_waiting", "gauge", "Requests waiting for a pooled connection",
+                         [({}, stats["pool"]["waiting"])]))
+    return families
+
+metrics.register_collector(_event_repository_metrics)
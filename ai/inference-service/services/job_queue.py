@@ -0,0 +1,459 @@
+import asyncio
+import heapq
+import itertools
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+import orjson
+from ..config import settings
+from ..utils.metrics import metrics, Histogram
+from ..utils.serialization import encode_json
+
+Job = Dict[str, Any]
+
+# Job states; the last three are terminal
+QUEUED, RUNNING, RETRYING, SUCCEEDED, FAILED = "queued", "running", "retrying", "succeeded", "failed"
+PENDING_STATES = (QUEUED, RUNNING, RETRYING)
+
+JOB_WAIT_SECONDS = metrics.histogram(
+    "terrapulse_job_wait_seconds", "Time jobs spend queued before a worker starts them", ("kind",)
+)
+JOB_RUN_SECONDS = metrics.histogram(
+    "terrapulse_job_run_seconds", "Time workers spend running each job attempt", ("kind",)
+)
+JOB_RESULTS = metrics.counter(
+    "terrapulse_jobs_total", "Job attempts by kind and outcome", ("kind", "status")
+)
+
+class JobBackend(ABC):
+    """
+    Storage for queued jobs: a priority queue of job ids plus the job records.
+    Higher priority pops first; equal priorities pop in submission order.
+    """
+    
+    @abstractmethod
+    async def push(self, job: Job, delay: float = 0.0) -> None:
+        """
+        Queue a job, or with `delay` schedule it to be queued that many seconds from now.
+        """
+        ...
+    
+    @abstractmethod
+    async def pop(self, timeout: float) -> Optional[Job]:
+        """
+        Claim and return the highest-priority job, or None after `timeout` seconds.
+        """
+        ...
+    
+    @abstractmethod
+    async def save(self, job: Job) -> None:
+        """
+        Store a job's record; saving it in a terminal state releases its claim.
+        """
+        ...
+    
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        ...
+    
+    @abstractmethod
+    async def depth(self) -> int:
+        ...
+    
+    async def close(self) -> None:
+        pass
+
+class MemoryJobBackend(JobBackend):
+    """
+    In-process heap, for a single replica and for tests. Finished jobs are
+    kept for status polling until max_finished newer ones have completed.
+    """
+    
+    def __init__(self, max_finished: int = 10000):
+        self.max_finished = max_finished
+        self.heap: List[tuple] = []
+        self.delayed: List[tuple] = []
+        self.sequence = itertools.count()
+        self.jobs: Dict[str, Job] = {}
+        self.finished: "OrderedDict[str, None]" = OrderedDict()
+        self.available = asyncio.Condition()
+    
+    async def push(self, job: Job, delay: float = 0.0) -> None:
+        self.jobs[job["id"]] = job
+        async with self.available:
+            if delay > 0:
+                heapq.heappush(self.delayed, (time.monotonic() + delay, next(self.sequence), job["id"]))
+            else:
+                heapq.heappush(self.heap, (-job["priority"], next(self.sequence), job["id"]))
+            self.available.notify()
+    
+    def _promote(self) -> Optional[float]:
+        """
+        Queue the delayed jobs now due; returns seconds until the next one is, if any.
+        """
+        now = time.monotonic()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, sequence, job_id = heapq.heappop(self.delayed)
+            heapq.heappush(self.heap, (-self.jobs[job_id]["priority"], sequence, job_id))
+        return self.delayed[0][0] - now if self.delayed else None
+    
+    async def pop(self, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        async with self.available:
+            while True:
+                next_due = self._promote()
+                if self.heap:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(self.available.wait(), min(remaining, next_due or remaining))
+                except asyncio.TimeoutError:
+                    pass
+            _, _, job_id = heapq.heappop(self.heap)
+        return self.jobs[job_id]
+    
+    async def save(self, job: Job) -> None:
+        self.jobs[job["id"]] = job
+        if job["status"] in (SUCCEEDED, FAILED):
+            self.finished[job["id"]] = None
+            while len(self.finished) > self.max_finished:
+                job_id, _ = self.finished.popitem(last=False)
+                self.jobs.pop(job_id, None)
+    
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+    
+    async def depth(self) -> int:
+        return len(self.heap) + len(self.delayed)
+
+# KEYS: queue, processing, delayed, scores; ARGV: now, lease seconds.
+# Requeues jobs whose lease expired (their worker died) and delayed jobs now
+# due, each at its queue score, then moves the first queued id to processing
+# under a new lease. All in one step, so no job is ever only in a worker's hands.
+CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+for _, source in ipairs({KEYS[2], KEYS[3]}) do
+    for _, job_id in ipairs(redis.call('ZRANGEBYSCORE', source, '-inf', now)) do
+        redis.call('ZREM', source, job_id)
+        redis.call('ZADD', KEYS[1], redis.call('HGET', KEYS[4], job_id) or 0, job_id)
+    end
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return false
+end
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), popped[1])
+return popped[1]
+"""
+
+class RedisJobBackend(JobBackend):
+    """
+    Redis-backed queue shared by every replica and worker process.
+    Job ids sit in a sorted set scored by priority, then submission time.
+    A claim moves the id into a processing set with a lease of lease_seconds;
+    any claim requeues ids whose lease ran out, so a job survives the replica
+    that was running it. Retries wait in a delayed set scored by when they are
+    due. Job records are JSON strings; they expire ttl_seconds after the job
+    finishes, never while it is pending.
+    """
+    
+    # Scores order by priority first: each priority step outweighs ~300 years of milliseconds
+    PRIORITY_SCALE = 1e13
+    # Wake-up tokens kept for idle workers (one per push)
+    MAX_WAKE_TOKENS = 1000
+    
+    def __init__(self,
+                 redis_url: str,
+                 prefix: str = "jobs",
+                 ttl_seconds: float = 3600,
+                 lease_seconds: float = 150):
+        import redis.asyncio as redis
+        
+        self.client = redis.from_url(redis_url)
+        self.queue_key = f"{prefix}:queue"
+        self.processing_key = f"{prefix}:processing"
+        self.delayed_key = f"{prefix}:delayed"
+        self.scores_key = f"{prefix}:scores"
+        self.wake_key = f"{prefix}:wake"
+        self.prefix = prefix
+        self.ttl_seconds = max(1, int(ttl_seconds))
+        self.lease_seconds = lease_seconds
+        self.claim = self.client.register_script(CLAIM_SCRIPT)
+    
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+    
+    async def push(self, job: Job, delay: float = 0.0) -> None:
+        job_id = job["id"]
+        score = -job["priority"] * self.PRIORITY_SCALE + job["enqueued_at"] * 1000
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._job_key(job_id), encode_json(job))
+            pipe.hset(self.scores_key, job_id, score)
+            pipe.zrem(self.processing_key, job_id)
+            if delay > 0:
+                pipe.zadd(self.delayed_key, {job_id: time.time() + delay})
+            else:
+                pipe.zadd(self.queue_key, {job_id: score})
+                pipe.lpush(self.wake_key, 1)
+                pipe.ltrim(self.wake_key, 0, self.MAX_WAKE_TOKENS - 1)
+            await pipe.execute()
+    
+    async def _claim(self) -> Optional[str]:
+        job_id = await self.claim(
+            keys=[self.queue_key, self.processing_key, self.delayed_key, self.scores_key],
+            args=[time.time(), self.lease_seconds]
+        )
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+    
+    async def pop(self, timeout: float) -> Optional[Job]:
+        job_id = await self._claim()
+        if job_id is None:
+            # Woken by the next push, or after `timeout` to pick up due retries
+            # and expired leases (BLPOP takes fractional seconds; 0 would block forever)
+            await self.client.blpop(self.wake_key, timeout=max(timeout, 0.01))
+            job_id = await self._claim()
+            if job_id is None:
+                return None
+        
+        job = await self.get(job_id)
+        if job is None:
+            # Pending records do not expire, so only a manual delete gets here
+            print(f"Job {job_id} has no record; dropping it from the queue")
+            await self._release(job_id)
+        return job
+    
+    async def _release(self, job_id: str) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.processing_key, job_id)
+            pipe.hdel(self.scores_key, job_id)
+            await pipe.execute()
+    
+    async def save(self, job: Job) -> None:
+        if job["status"] not in (SUCCEEDED, FAILED):
+            await self.client.set(self._job_key(job["id"]), encode_json(job))
+            return
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.setex(self._job_key(job["id"]), self.ttl_seconds, encode_json(job))
+            pipe.zrem(self.processing_key, job["id"])
+            pipe.hdel(self.scores_key, job["id"])
+            await pipe.execute()
+    
+    async def get(self, job_id: str) -> Optional[Job]:
+        raw = await self.client.get(self._job_key(job_id))
+        return orjson.loads(raw) if raw is not None else None
+    
+    async def depth(self) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zcard(self.queue_key)
+            pipe.zcard(self.delayed_key)
+            return sum(await pipe.execute())
+    
+    async def close(self) -> None:
+        await self.client.close()
+
+class JobQueue:
+    """
+    Priority job queue drained by a fixed number of worker tasks.
+    Each job is a dict with a kind and a JSON-serializable payload, run by the
+    handler registered for its kind. Failed or timed-out attempts are retried
+    with exponential backoff up to max_attempts, through the backend's delayed
+    queue; a job claimed again after its worker died counts that attempt as
+    failed. Every replica (and the
+    standalone worker script) can drain a shared Redis queue; the model
+    registry's process pools do the CPU-heavy work, so workers here only
+    bound how many jobs run at once.
+    """
+    
+    def __init__(self,
+                 backend: JobBackend,
+                 concurrency: int = 4,
+                 max_attempts: int = 3,
+                 timeout: float = 120.0,
+                 retry_backoff: float = 1.0,
+                 poll_interval: float = 1.0):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Callable[[Job], Awaitable[Any]]] = {}
+        self.workers: List[asyncio.Task] = []
+        self.running = 0
+        self.last_depth = 0
+        self.wait = Histogram()
+        self.counters = {"submitted": 0, "succeeded": 0, "failed": 0, "retried": 0}
+    
+    def register(self, kind: str, handler: Callable[[Job], Awaitable[Any]]) -> None:
+        self.handlers[kind] = handler
+    
+    async def submit(self,
+                     kind: str,
+                     payload: Dict[str, Any],
+                     priority: int = 0,
+                     job_id: Optional[str] = None) -> Job:
+        """
+        Queue a job and return its record; poll get(job["id"]) for its status.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"No handler for job kind: {kind}")
+        
+        job = {
+            "id": job_id or str(uuid.uuid4()),
+            "kind": kind,
+            "priority": priority,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "enqueued_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "wait_seconds": None,
+            "run_seconds": None,
+            "error": None
+        }
+        await self.backend.push(job)
+        self.counters["submitted"] += 1
+        self.last_depth = await self.backend.depth()
+        return job
+    
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.backend.get(job_id)
+    
+    async def start(self) -> None:
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+    
+    async def close(self) -> None:
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        await self.backend.close()
+    
+    async def _work(self) -> None:
+        while True:
+            try:
+                job = await self.backend.pop(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job queue read failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if job is None:
+                continue
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+    
+    async def _run(self, job: Job) -> None:
+        kind = job["kind"]
+        if job["status"] == RUNNING:
+            # Reclaimed after its lease ran out: the worker running the last attempt died
+            job["error"] = "LeaseExpired"
+            if job["attempts"] >= self.max_attempts:
+                JOB_RESULTS.inc(kind, FAILED)
+                job.update(status=FAILED, finished_at=time.time())
+                await self.backend.save(job)
+                self.counters[FAILED] += 1
+                return
+        
+        started = time.time()
+        wait_seconds = max(0.0, started - job["enqueued_at"])
+        JOB_WAIT_SECONDS.labels(kind).observe(wait_seconds)
+        self.wait.observe(wait_seconds)
+        job.update(status=RUNNING, started_at=started, attempts=job["attempts"] + 1, wait_seconds=wait_seconds)
+        await self.backend.save(job)
+        self.last_depth = await self.backend.depth()
+        
+        handler = self.handlers.get(kind)
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind: {kind}")
+            await asyncio.wait_for(handler(job), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            status = RETRYING if job["attempts"] < self.max_attempts and handler is not None else FAILED
+        else:
+            job["error"] = None
+            status = SUCCEEDED
+        
+        run_seconds = time.perf_counter() - start
+        JOB_RUN_SECONDS.labels(kind).observe(run_seconds)
+        JOB_RESULTS.inc(kind, status)
+        job.update(status=status, run_seconds=run_seconds, finished_at=time.time() if status != RETRYING else None)
+        
+        if status == RETRYING:
+            self.counters["retried"] += 1
+            delay = self.retry_backoff * 2 ** (job["attempts"] - 1)
+            # Wait time of the next attempt is measured from when it is due, not the first submission
+            job["enqueued_at"] = time.time() + delay
+            await self.backend.push(job, delay)
+        else:
+            await self.backend.save(job)
+            self.counters[status] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "workers": len(self.workers),
+            "running": self.running,
+            "depth": self.last_depth,
+            "wait_ms_p50": round(self.wait.quantile(0.5) * 1000, 3),
+            "wait_ms_p95": round(self.wait.quantile(0.95) * 1000, 3)
+        }
+
+# Least time a Redis claim outlasts JOB_TIMEOUT_SECONDS, for saving the attempt's outcome
+LEASE_GRACE_SECONDS = 30.0
+
+def create_job_queue() -> JobQueue:
+    """
+    Build the job queue described by settings. A Redis lease shorter than
+    the job timeout (plus LEASE_GRACE_SECONDS) would hand running jobs to
+    a second worker, so it is raised to that.
+    """
+    if settings.JOB_QUEUE_BACKEND.lower() == "redis":
+        lease_seconds = settings.JOB_LEASE_SECONDS
+        if lease_seconds < settings.JOB_TIMEOUT_SECONDS + LEASE_GRACE_SECONDS:
+            lease_seconds = settings.JOB_TIMEOUT_SECONDS + LEASE_GRACE_SECONDS
+            print(f"JOB_LEASE_SECONDS ({settings.JOB_LEASE_SECONDS}s) does not exceed JOB_TIMEOUT_SECONDS "
+                  f"({settings.JOB_TIMEOUT_SECONDS}s); using {lease_seconds}s")
+        backend = RedisJobBackend(
+            settings.REDIS_URL,
+            ttl_seconds=settings.JOB_RESULT_TTL_SECONDS,
+            lease_seconds=lease_seconds
+        )
+    else:
+        backend = MemoryJobBackend()
+    
+    return JobQueue(
+        backend,
+        concurrency=settings.JOB_QUEUE_CONCURRENCY,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        timeout=settings.JOB_TIMEOUT_SECONDS,
+        retry_backoff=settings.JOB_RETRY_BACKOFF_SECONDS
+    )
+
+# Create a singleton instance
+job_queue = create_job_queue()
+
+def _job_queue_metrics():
+    stats = job_queue.stats()
+    return [
+        ("terrapulse_job_queue_depth", "gauge", "Jobs waiting in the queue, retries included (as of the last submit or claim)",
+         [({}, stats["depth"])]),
+        ("terrapulse_job_queue_running", "gauge", "Jobs being run by this process's workers",
+         [({}, stats["running"])])
+    ]
+
+metrics.register_collector(_job_queue_metrics)
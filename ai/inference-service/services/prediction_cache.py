@@ -0,0 +1,124 @@
+import hashlib
+from typing import Dict, Any, Optional, Tuple
+from ..config import settings
+from ..models.wildfire_heuristic import WildfireHeuristicModel
+from ..schemas.prediction import WildfirePredictionResult
+from ..services.weather_cache import MemoryCacheBackend, RedisCacheBackend
+from ..utils.metrics import metrics
+from ..utils.serialization import encode_json
+
+CACHE_REQUESTS = metrics.counter(
+    "terrapulse_prediction_cache_requests_total", "Prediction cache lookups by model and result", ("model", "result")
+)
+
+class PredictionCache:
+    """
+    Memoizes model results on quantized inputs.
+    Inputs are snapped to a grid of configurable tolerances before the model
+    runs, so every request that lands in the same cell gets the same result
+    whether it was computed or served from cache. Keys include the model name
+    and version: a new model version never sees the previous version's entries,
+    which then age out of the LRU or expire in Redis.
+    """
+    
+    def __init__(self, backend, tolerances: Dict[str, float], coordinate_deg: float):
+        self.backend = backend
+        self.tolerances = tolerances
+        self.coordinate_deg = coordinate_deg
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _snap(value: float, step: float) -> float:
+        if step <= 0:
+            return float(value)
+        return round(round(float(value) / step) * step, 10)
+    
+    def quantize(self, event_data: Dict[str, Any], parameters: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Snap the prediction center and numeric parameters to the cache grid.
+        The event is reduced to a Point at the snapped center, which is all the
+        models read from it.
+        """
+        lon, lat = WildfireHeuristicModel.event_coordinates(event_data)[:2]
+        event = {
+            **event_data,
+            "geometry": {
+                "type": "Point",
+                "coordinates": [self._snap(lon, self.coordinate_deg), self._snap(lat, self.coordinate_deg)]
+            }
+        }
+        
+        quantized = dict(parameters)
+        for field, step in self.tolerances.items():
+            if quantized.get(field) is not None:
+                quantized[field] = self._snap(quantized[field], step)
+        if quantized.get("wind_direction") is not None:
+            quantized["wind_direction"] = quantized["wind_direction"] % 360
+        
+        return event, quantized
+    
+    def key(self, model_name: str, model_version: str, event: Dict[str, Any], parameters: Dict[str, Any]) -> str:
+        """
+        Cache key for quantized inputs; parameters are hashed in sorted order.
+        """
+        payload = encode_json([event["geometry"]["coordinates"], sorted(parameters.items())])
+        return f"prediction:{model_name}:{model_version}:{hashlib.sha1(payload).hexdigest()}"
+    
+    async def get(self, model_name: str, key: str) -> Optional[WildfirePredictionResult]:
+        try:
+            fields = await self.backend.get(key)
+        except Exception as e:
+            print(f"Prediction cache read failed: {e}")
+            fields = None
+        
+        if fields is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(model_name, "miss")
+            return None
+        self.hits += 1
+        CACHE_REQUESTS.inc(model_name, "hit")
+        # A new result object per hit; nested values are shared and treated as read-only
+        return WildfirePredictionResult.model_construct(**fields)
+    
+    async def set(self, key: str, result: WildfirePredictionResult) -> None:
+        try:
+            await self.backend.set(key, dict(result))
+        except Exception as e:
+            print(f"Prediction cache write failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+    
+    async def close(self) -> None:
+        await self.backend.close()
+
+def create_prediction_cache() -> Optional[PredictionCache]:
+    """
+    Build the prediction cache described by settings, or None when disabled.
+    """
+    backend_name = settings.PREDICTION_CACHE_BACKEND.lower()
+    if backend_name == "none":
+        return None
+    
+    if backend_name == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL, settings.PREDICTION_CACHE_TTL_SECONDS)
+    else:
+        backend = MemoryCacheBackend(settings.PREDICTION_CACHE_MAX_ENTRIES, settings.PREDICTION_CACHE_TTL_SECONDS)
+    
+    return PredictionCache(
+        backend,
+        tolerances={
+            "wind_speed": settings.PREDICTION_CACHE_WIND_SPEED_KMH,
+            "wind_direction": settings.PREDICTION_CACHE_WIND_DIRECTION_DEG,
+            "vegetation_density": settings.PREDICTION_CACHE_VEGETATION,
+            "temperature": settings.PREDICTION_CACHE_TEMPERATURE_C,
+            "humidity": settings.PREDICTION_CACHE_HUMIDITY_PCT
+        },
+        coordinate_deg=settings.PREDICTION_CACHE_COORDINATE_DEG
+    )
@@ -1,92 +1,569 @@
+import asyncio
+import time
 import uuid
-from datetime import datetime
-from typing import Dict, Any, Optional, List
-from ..models.wildfire_heuristic import wildfire_model
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Tuple, Awaitable, AsyncIterator
+from ..config import settings
+from ..models.registry import model_registry, ModelHandle, WARMUP_EVENT, WARMUP_PARAMETERS
+from ..models.wildfire_heuristic import WildfireHeuristicModel
 from ..services.data_fetcher import data_fetcher
-from ..schemas.prediction import PredictionResponse, WildfirePredictionRequest
+from ..services.asset_index import asset_index
+from ..services.prediction_store import PredictionStore, create_prediction_store
+from ..services.prediction_cache import PredictionCache, create_prediction_cache
+from ..services.job_queue import JobQueue, Job, job_queue
+from ..services.tile_service import TileService, tile_service
+from ..services.alert_matcher import AlertMatcher, alert_matcher
+from ..schemas.prediction import WildfirePredictionRequest, WildfirePredictionResult
+from ..utils.serialization import encode_json, map_perimeters, prepare_geometry
+from ..utils.metrics import timed, ENRICHMENT_RESULTS, STREAM_FIRST_PERIMETER_SECONDS, STREAM_SECONDS
+
+# Fallback values used when a parameter is neither supplied nor fetched in time
+DEFAULT_PARAMETERS = {
+    "wind_speed": 10.0,
+    "wind_direction": 0.0,
+    "temperature": 20.0,
+    "humidity": 50.0,
+    "vegetation_density": 0.5
+}
+
+WEATHER_FIELDS = ("wind_speed", "wind_direction", "temperature", "humidity")
+
+# Job priority by event severity; user-facing requests outrank all background re-scoring
+SEVERITY_PRIORITY = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+USER_PRIORITY_BOOST = 10
+
+# Request fields that control the run rather than describe the fire
+RUN_FIELDS = {"event_id", "forecast_hours", "model", "ensemble"}
 
 class PredictionService:
     """
     Main service for handling prediction requests.
     """
     
-    def __init__(self):
-        self.predictions = {}  # In-memory store for demo; use DB in production
+    def __init__(self,
+                 store: Optional[PredictionStore] = None,
+                 cache: Optional[PredictionCache] = None,
+                 jobs: Optional[JobQueue] = None,
+                 tiles: Optional[TileService] = None,
+                 alerts: Optional[AlertMatcher] = None):
+        self.store = store or create_prediction_store()
+        self.cache = cache or create_prediction_cache()
+        self.jobs = jobs or job_queue
+        self.tiles = tiles or tile_service
+        self.alerts = alerts or alert_matcher
+        self.jobs.register("wildfire", self._run_wildfire_job)
+        self.background_tasks = set()  # Enrichment fetches that outlived their request deadline
+    
+    async def predict_wildfire(self,
+                               request: WildfirePredictionRequest,
+                               event_data: Dict[str, Any],
+                               prediction_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Generate a wildfire prediction for an event, as a PredictionResponse-shaped dict.
+        """
+        model = self.get_model(request.model)
+        parameters, enrichment = await self._resolve_parameters(request, event_data)
+        model_event, parameters = self._quantize(event_data, parameters)
+        model_parameters = self._model_parameters(request, parameters)
+        
+        cache_key = self._cache_key(model, model_event, model_parameters)
+        prediction_result = await self._cached_result(model, cache_key)
+        cached = prediction_result is not None
+        if not cached:
+            # Generate prediction
+            method = "predict_ensemble_from_event" if request.ensemble else "predict_from_event"
+            with timed("model_predict"):
+                prediction_result = await model.run(method, model_event, model_parameters)
+            self._assess_risk(prediction_result)
+            await self._assess_vegetation([prediction_result])
+            await self._remember(cache_key, prediction_result)
+        
+        response = self._build_response(model, request, prediction_result, parameters, enrichment, cached, prediction_id)
+        with timed("store"):
+            await self.store.add(response)
+        self.tiles.record_predictions([response], [event_data])
+        self.alerts.submit([response], [event_data])
+        
+        return response
     
-    async def predict_wildfire(self, request: WildfirePredictionRequest, event_data: Dict[str, Any]) -> PredictionResponse:
+    async def stream_wildfire(self,
+                              request: WildfirePredictionRequest,
+                              event_data: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
         """
-        Generate a wildfire prediction for an event.
+        Generate a wildfire prediction hour by hour. Yields ("hour", frame) as
+        the model computes each forecast hour, then ("prediction", response)
+        with the final hour as a PredictionResponse-shaped dict, which is stored.
+        The model runs only as far ahead of the consumer as
+        settings.STREAM_BUFFER_HOURS allows and only the hour being sent is held,
+        so the stored result has no hourly perimeters. Streams bypass the prediction cache.
         """
-        # Generate prediction ID
+        model = self.get_model(request.model)
+        parameters, enrichment = await self._resolve_parameters(request, event_data)
+        model_event, parameters = self._quantize(event_data, parameters)
+        model_parameters = self._model_parameters(request, parameters)
         prediction_id = str(uuid.uuid4())
+        precision = settings.RESPONSE_COORDINATE_PRECISION
+        tolerance = settings.RESPONSE_SIMPLIFY_TOLERANCE_DEG
         
-        # If parameters are not provided, try to fetch them
-        parameters = request.dict(exclude={"event_id", "forecast_hours"})
-        
-        # If wind data is not provided, try to fetch from weather API
-        if parameters.get("wind_speed") is None or parameters.get("wind_direction") is None:
-            # Get event coordinates
-            geometry = event_data.get("geometry", {})
-            if geometry.get("type") == "Point":
-                coordinates = geometry.get("coordinates", [0, 0])
-                weather_data = await data_fetcher.fetch_weather_data(coordinates[1], coordinates[0])
-                
-                if weather_data:
-                    if parameters.get("wind_speed") is None:
-                        parameters["wind_speed"] = weather_data.get("wind_speed", 10.0)
-                    if parameters.get("wind_direction") is None:
-                        parameters["wind_direction"] = weather_data.get("wind_direction", 0.0)
-                    if parameters.get("temperature") is None:
-                        parameters["temperature"] = weather_data.get("temperature", 20.0)
-                    if parameters.get("humidity") is None:
-                        parameters["humidity"] = weather_data.get("humidity", 50.0)
-        
-        # If vegetation density is not provided, try to fetch it
-        if parameters.get("vegetation_density") is None:
-            geometry = event_data.get("geometry", {})
-            if geometry.get("type") == "Point":
-                coordinates = geometry.get("coordinates", [0, 0])
-                vegetation_density = await data_fetcher.fetch_vegetation_data(coordinates[1], coordinates[0])
-                parameters["vegetation_density"] = vegetation_density
-        
-        # Generate prediction
-        prediction_result = wildfire_model.predict_from_event(
-            event_data, 
-            {**parameters, "forecast_hours": request.forecast_hours}
+        start = time.perf_counter()
+        status = "disconnected"
+        prediction_result = None
+        try:
+            async for kind, value in model.stream(
+                "stream_from_event", model_event, model_parameters,
+                buffer=settings.STREAM_BUFFER_HOURS,
+                stall_timeout=settings.STREAM_STALL_TIMEOUT_SECONDS
+            ):
+                if kind == "result":
+                    prediction_result = value
+                    continue
+                if value["hour"] == 1:
+                    STREAM_FIRST_PERIMETER_SECONDS.labels(model.model_name).observe(time.perf_counter() - start)
+                yield "hour", {
+                    "prediction_id": prediction_id,
+                    "hour": value["hour"],
+                    "perimeter": prepare_geometry(value["perimeter"], precision, tolerance),
+                    "area_km2": value["area_km2"],
+                    "spread_distance_km": value["spread_distance_km"]
+                }
+            
+            self._assess_risk(prediction_result)
+            await self._assess_vegetation([prediction_result])
+            response = self._build_response(model, request, prediction_result, parameters, enrichment, False, prediction_id)
+            with timed("store"):
+                await self.store.add(response)
+            self.tiles.record_predictions([response], [event_data])
+            self.alerts.submit([response], [event_data])
+            status = "completed"
+            yield "prediction", response
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            STREAM_SECONDS.labels(model.model_name, status).observe(time.perf_counter() - start)
+    
+    @staticmethod
+    def job_priority(event_data: Dict[str, Any], background: bool = False) -> int:
+        """
+        Queue priority of a prediction job: event severity, plus a boost for
+        requests a user is waiting on.
+        """
+        priority = SEVERITY_PRIORITY.get(str(event_data.get("severity") or "").lower(), 1)
+        return priority if background else priority + USER_PRIORITY_BOOST
+    
+    async def submit_wildfire(self,
+                              request: WildfirePredictionRequest,
+                              event_data: Dict[str, Any],
+                              background: bool = False) -> Job:
+        """
+        Queue a wildfire prediction. The job id is the id the prediction will be
+        stored under, so clients poll get_prediction/get_job with it.
+        """
+        return await self.jobs.submit(
+            "wildfire",
+            {"request": request.model_dump(), "event": event_data},
+            priority=self.job_priority(event_data, background)
         )
+    
+    async def _run_wildfire_job(self, job: Job) -> None:
+        payload = job["payload"]
+        request = WildfirePredictionRequest(**payload["request"])
+        await self.predict_wildfire(request, payload["event"], prediction_id=job["id"])
+    
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        return await self.jobs.get(job_id)
+    
+    async def predict_wildfire_batch(self,
+                                     requests: List[WildfirePredictionRequest],
+                                     events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate wildfire predictions for many events with one batch run per model.
+        Cached results are reused; only the misses are sent to the models.
+        Ensemble requests are already array runs, so each one runs on its own.
+        Responses are returned in the same order as the requests.
+        """
+        models = [self.get_model(request.model) for request in requests]
+        local = await self._prefetch_local_sources(requests, events)
+        resolved = await asyncio.gather(*(
+            self._resolve_parameters(request, event_data, prefetched)
+            for request, event_data, prefetched in zip(requests, events, local)
+        ))
+        
+        model_events = []
+        parameters = []
+        model_parameters = []
+        for request, event_data, (request_parameters, _) in zip(requests, events, resolved):
+            model_event, request_parameters = self._quantize(event_data, request_parameters)
+            model_events.append(model_event)
+            parameters.append(request_parameters)
+            model_parameters.append(self._model_parameters(request, request_parameters))
+        
+        cache_keys = [
+            self._cache_key(model, model_event, params)
+            for model, model_event, params in zip(models, model_events, model_parameters)
+        ]
+        prediction_results: List[Optional[WildfirePredictionResult]] = list(await asyncio.gather(
+            *(self._cached_result(model, key) for model, key in zip(models, cache_keys))
+        ))
+        cached = [prediction_result is not None for prediction_result in prediction_results]
+        
+        # Group the misses by model so each model sees one batch
+        groups: Dict[str, List[int]] = {}
+        ensembles: List[int] = []
+        for index, (model, request) in enumerate(zip(models, requests)):
+            if cached[index]:
+                continue
+            if request.ensemble:
+                ensembles.append(index)
+            else:
+                groups.setdefault(model.model_name, []).append(index)
         
-        # Create response
-        response = PredictionResponse(
-            prediction_id=prediction_id,
-            event_id=request.event_id,
-            model_type="wildfire",
-            forecast_hours=request.forecast_hours,
-            generated_at=datetime.now(),
-            confidence=prediction_result.confidence_factors.get("model_confidence", 0.7),
-            result=prediction_result.dict(),
-            metadata={
-                "model_name": wildfire_model.model_name,
-                "model_version": wildfire_model.model_version,
-                "parameters_used": parameters
+        with timed("model_predict_batch"):
+            group_results = await asyncio.gather(*(
+                model_registry.get(model_name).run(
+                    "predict_batch_from_events",
+                    [model_events[i] for i in indices],
+                    [model_parameters[i] for i in indices]
+                )
+                for model_name, indices in groups.items()
+            ))
+            ensemble_results = await asyncio.gather(*(
+                models[i].run("predict_ensemble_from_event", model_events[i], model_parameters[i])
+                for i in ensembles
+            ))
+        
+        batches = list(zip(groups.values(), group_results)) + [(ensembles, ensemble_results)]
+        computed = [(index, result) for indices, results in batches for index, result in zip(indices, results)]
+        await self._assess_vegetation([prediction_result for _, prediction_result in computed])
+        for index, prediction_result in computed:
+            self._assess_risk(prediction_result)
+            prediction_results[index] = prediction_result
+            await self._remember(cache_keys[index], prediction_result)
+        
+        responses = [
+            self._build_response(model, request, prediction_result, request_parameters, enrichment, is_cached)
+            for model, request, prediction_result, request_parameters, (_, enrichment), is_cached
+            in zip(models, requests, prediction_results, parameters, resolved, cached)
+        ]
+        with timed("store"):
+            await self.store.add_many(responses)
+        self.tiles.record_predictions(responses, events)
+        self.alerts.submit(responses, events)
+        
+        return responses
+    
+    @staticmethod
+    def _model_parameters(request: WildfirePredictionRequest, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parameters passed to the model (and keyed in the cache): the resolved
+        inputs plus the forecast window and, for ensembles, the ensemble settings.
+        """
+        model_parameters = {**parameters, "forecast_hours": request.forecast_hours}
+        if request.ensemble:
+            model_parameters["ensemble"] = request.ensemble
+            model_parameters["ensemble_spreads"] = {
+                "wind_speed": settings.ENSEMBLE_WIND_SPEED_SIGMA,
+                "wind_direction": settings.ENSEMBLE_WIND_DIRECTION_SD_DEG,
+                "humidity": settings.ENSEMBLE_HUMIDITY_SD_PCT,
+                "vegetation_density": settings.ENSEMBLE_VEGETATION_SD
             }
+            model_parameters["ensemble_levels"] = [
+                float(level) for level in settings.ENSEMBLE_CONTOUR_LEVELS.split(",") if level.strip()
+            ]
+        return model_parameters
+    
+    def _quantize(self,
+                  event_data: Dict[str, Any],
+                  parameters: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Snap inputs to the prediction cache grid, so cached and computed results
+        agree. The snapped event is only for the model and the cache key; store,
+        tiles and alerts get the original event.
+        """
+        if self.cache is None:
+            return event_data, parameters
+        return self.cache.quantize(event_data, parameters)
+    
+    def _cache_key(self,
+                   model: ModelHandle,
+                   event_data: Dict[str, Any],
+                   parameters: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.key(model.model_name, model.model_version, event_data, parameters)
+    
+    async def _cached_result(self, model: ModelHandle, cache_key: Optional[str]) -> Optional[WildfirePredictionResult]:
+        if cache_key is None:
+            return None
+        return await self.cache.get(model.model_name, cache_key)
+    
+    async def _remember(self, cache_key: Optional[str], prediction_result: WildfirePredictionResult) -> None:
+        if cache_key is not None:
+            await self.cache.set(cache_key, prediction_result)
+    
+    def get_model(self, model_name: Optional[str] = None) -> ModelHandle:
+        """
+        Look up a wildfire model in the model registry, defaulting to the registry's default model.
+        """
+        return model_registry.get(model_name)
+    
+    @timed("risk_assessment")
+    def _assess_risk(self, prediction_result: WildfirePredictionResult) -> None:
+        """
+        Fill in the at-risk infrastructure and population from the asset index, when loaded.
+        """
+        if not asset_index.loaded:
+            return
+        infrastructure, population = asset_index.assess(prediction_result.predicted_perimeter)
+        prediction_result.at_risk_infrastructure = infrastructure
+        prediction_result.at_risk_population = population
+    
+    async def _assess_vegetation(self, prediction_results: List[WildfirePredictionResult]) -> None:
+        """
+        Fill in the vegetation density inside each predicted perimeter from the NDVI rasters, when loaded.
+        """
+        if data_fetcher.vegetation_raster is None or not prediction_results:
+            return
+        rings = [result.predicted_perimeter["coordinates"][0] for result in prediction_results]
+        for prediction_result, footprint in zip(prediction_results, await data_fetcher.fetch_vegetation_footprints(rings)):
+            prediction_result.vegetation_footprint = footprint
+    
+    async def _prefetch_local_sources(self,
+                                      requests: List[WildfirePredictionRequest],
+                                      events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Look up the local data sources (forecast grid, NDVI rasters) for a whole
+        batch with one vectorized call each. Returns per request the values
+        found, by source name; anything missing is fetched as usual.
+        """
+        prefetched: List[Dict[str, Any]] = [{} for _ in requests]
+        lookups = {
+            "weather": (data_fetcher.weather_grid is not None,
+                        lambda request: any(getattr(request, field) is None for field in WEATHER_FIELDS)),
+            "vegetation": (data_fetcher.vegetation_raster is not None,
+                           lambda request: request.vegetation_density is None)
+        }
+        
+        for source, (available, missing) in lookups.items():
+            if not available:
+                continue
+            indices, lats, lons = [], [], []
+            for index, (request, event_data) in enumerate(zip(requests, events)):
+                if not missing(request):
+                    continue
+                try:
+                    lon, lat = WildfireHeuristicModel.event_coordinates(event_data)[:2]
+                except ValueError:
+                    continue
+                indices.append(index)
+                lats.append(lat)
+                lons.append(lon)
+            if not indices:
+                continue
+            
+            if source == "weather":
+                values = data_fetcher.fetch_grid_weather(lats, lons)
+            else:
+                values = await data_fetcher.fetch_vegetation_batch(lats, lons)
+            for index, value in zip(indices, values):
+                if value is not None:
+                    prefetched[index][source] = value
+        
+        return prefetched
+    
+    @timed("enrichment")
+    async def _resolve_parameters(self,
+                                  request: WildfirePredictionRequest,
+                                  event_data: Dict[str, Any],
+                                  prefetched: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Fill in any model parameters missing from the request.
+        All data sources are queried concurrently under one deadline
+        (settings.ENRICHMENT_DEADLINE_SECONDS); anything not available by then
+        falls back to DEFAULT_PARAMETERS. Sources already looked up for the
+        event (`prefetched`, by source name, e.g. for a batch) are used as is.
+        Returns the parameters and a summary of which sources answered and
+        which fields were defaulted.
+        """
+        parameters = request.model_dump(exclude=RUN_FIELDS)
+        
+        missing_weather = [field for field in WEATHER_FIELDS if parameters.get(field) is None]
+        missing_vegetation = parameters.get("vegetation_density") is None
+        enrichment = {"sources": {}, "defaulted_fields": []}
+        
+        if not missing_weather and not missing_vegetation:
+            return parameters, enrichment
+        
+        prefetched = prefetched or {}
+        sources = {}
+        try:
+            lon, lat = WildfireHeuristicModel.event_coordinates(event_data)[:2]
+            if missing_weather and "weather" not in prefetched:
+                sources["weather"] = data_fetcher.fetch_weather_data(lat, lon, request.forecast_hours)
+            if missing_vegetation and "vegetation" not in prefetched:
+                sources["vegetation"] = data_fetcher.fetch_vegetation_data(lat, lon)
+        except ValueError:
+            pass
+        
+        results, enrichment["sources"] = await self._gather_with_deadline(
+            sources, settings.ENRICHMENT_DEADLINE_SECONDS
         )
+        for name, value in prefetched.items():
+            results[name] = value
+            enrichment["sources"][name] = "ok"
+            ENRICHMENT_RESULTS.inc(name, "ok")
         
-        # Store prediction (in memory for demo)
-        self.predictions[prediction_id] = response.dict()
+        weather_data = results.get("weather") or {}
+        fetched = {field: weather_data.get(field) for field in missing_weather}
+        if weather_data.get("hourly"):
+            # The forecast grid's series over the forecast window, reported alongside the result
+            enrichment["weather_hourly"] = weather_data["hourly"]
+        if missing_vegetation:
+            fetched["vegetation_density"] = results.get("vegetation")
         
-        return response
+        for field, value in fetched.items():
+            if value is None:
+                value = DEFAULT_PARAMETERS[field]
+                enrichment["defaulted_fields"].append(field)
+            parameters[field] = value
+        
+        return parameters, enrichment
+    
+    async def _gather_with_deadline(self,
+                                    sources: Dict[str, Awaitable[Any]],
+                                    deadline: float) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Run every source concurrently and collect whatever finished within the deadline.
+        Sources that miss it keep running in the background (their result can
+        still warm the weather cache) but are not waited for.
+        """
+        if not sources:
+            return {}, {}
+        
+        tasks = {name: asyncio.ensure_future(source) for name, source in sources.items()}
+        await asyncio.wait(tasks.values(), timeout=deadline)
+        
+        results = {}
+        status = {}
+        for name, task in tasks.items():
+            if not task.done():
+                status[name] = "timeout"
+                self.background_tasks.add(task)
+                task.add_done_callback(self._discard_background_task)
+            elif task.exception() is not None:
+                print(f"Error fetching {name} data: {task.exception()}")
+                status[name] = "error"
+            elif task.result() is None:
+                status[name] = "unavailable"
+            else:
+                status[name] = "ok"
+                results[name] = task.result()
+            ENRICHMENT_RESULTS.inc(name, status[name])
+        
+        return results, status
+    
+    def _discard_background_task(self, task: asyncio.Task) -> None:
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background enrichment failed: {task.exception()}")
+    
+    @timed("build_response")
+    def _build_response(self,
+                        model: ModelHandle,
+                        request: WildfirePredictionRequest,
+                        prediction_result: WildfirePredictionResult,
+                        parameters: Dict[str, Any],
+                        enrichment: Dict[str, Any],
+                        cached: bool = False,
+                        prediction_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Wrap a model result in a PredictionResponse-shaped dict.
+        The same dict is stored and serialized, so it is built once, without a
+        model/dict round-trip, with perimeters rounded (and optionally simplified) for output.
+        """
+        metadata = {
+            "model_name": model.model_name,
+            "model_version": model.model_version,
+            "parameters_used": parameters,
+            "enrichment_sources": enrichment["sources"],
+            "defaulted_fields": enrichment["defaulted_fields"],
+            "cached": cached
+        }
+        if enrichment.get("weather_hourly"):
+            metadata["weather_hourly"] = enrichment["weather_hourly"]
+        
+        precision = settings.RESPONSE_COORDINATE_PRECISION
+        tolerance = settings.RESPONSE_SIMPLIFY_TOLERANCE_DEG
+        result = map_perimeters(
+            dict(prediction_result), lambda geometry: prepare_geometry(geometry, precision, tolerance)
+        )
+        
+        return {
+            "prediction_id": prediction_id or str(uuid.uuid4()),
+            "event_id": request.event_id,
+            "model_type": "wildfire",
+            "forecast_hours": request.forecast_hours,
+            "generated_at": datetime.now(timezone.utc),
+            "confidence": float(prediction_result.confidence_factors.get("model_confidence", 0.7)),
+            "result": result,
+            "metadata": metadata
+        }
     
     async def get_prediction(self, prediction_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a stored prediction.
         """
-        return self.predictions.get(prediction_id)
+        return await self.store.get(prediction_id)
     
-    async def get_event_predictions(self, event_id: str) -> List[Dict[str, Any]]:
+    async def get_event_predictions(self,
+                                    event_id: str,
+                                    limit: int = 50,
+                                    offset: int = 0,
+                                    since: Optional[datetime] = None,
+                                    until: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
-        Retrieve all predictions for an event.
+        Retrieve predictions for an event, newest first.
+        """
+        return await self.store.list_for_event(event_id, limit=limit, offset=offset, since=since, until=until)
+    
+    async def warm_up(self) -> Dict[str, float]:
         """
-        return [pred for pred in self.predictions.values() if pred.get("event_id") == event_id]
+        Run one prediction per loaded model through the request path (parameter
+        resolution, the model in its executor, risk and vegetation assessment,
+        response building and encoding) without caching, storing or publishing
+        it, so first-use costs are paid before the service reports ready. Opens
+        the OpenWeatherMap session too when weather is fetched from there.
+        Returns seconds per model.
+        """
+        if settings.OPENWEATHER_API_KEY:
+            await data_fetcher.get_session()
+        
+        event_data = {**WARMUP_EVENT, "id": "warmup", "category": "wildfires"}
+        timings = {}
+        for model_name in list(model_registry.handles):
+            start = time.perf_counter()
+            model = self.get_model(model_name)
+            request = WildfirePredictionRequest(event_id="warmup", model=model_name, **{
+                **DEFAULT_PARAMETERS, **WARMUP_PARAMETERS
+            })
+            parameters, enrichment = await self._resolve_parameters(request, event_data)
+            prediction_result = await model.run("predict_from_event", event_data, self._model_parameters(request, parameters))
+            self._assess_risk(prediction_result)
+            await self._assess_vegetation([prediction_result])
+            encode_json(self._build_response(model, request, prediction_result, parameters, enrichment))
+            timings[model_name] = time.perf_counter() - start
+        return timings
+    
+    async def start(self):
+        await self.store.start()
+        if settings.JOB_QUEUE_WORKERS_ENABLED:
+            await self.jobs.start()
+    
+    async def close(self):
+        await self.jobs.close()
+        await self.store.close()
+        if self.cache is not None:
+            await self.cache.close()
 
 # Create a singleton instance
 prediction_service = PredictionService()
\ No newline at end of file
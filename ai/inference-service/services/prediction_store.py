@@ -0,0 +1,368 @@
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+from ..config import settings
+from ..utils.metrics import metrics
+from ..utils.serialization import encode_json
+
+STORE_WRITES = metrics.counter(
+    "terrapulse_prediction_store_writes_total",
+    "Predictions written to the database, rejected by it, or dropped from a full write buffer",
+    ("result",)
+)
+
+INSERT_PREDICTION_SQL = """
+INSERT INTO predictions (id, event_id, model_type, model_name, model_version,
+                         forecast_hours, generated_at, confidence, perimeter,
+                         result, metadata)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s,
+        ST_GeomFromGeoJSON(%s)::geography, %s::jsonb, %s::jsonb)
+ON CONFLICT (id) DO NOTHING
+"""
+
+class PredictionStore(ABC):
+    """
+    Storage interface for generated predictions.
+    Predictions are the dicts produced by PredictionResponse.model_dump().
+    """
+    
+    async def start(self) -> None:
+        pass
+    
+    async def close(self) -> None:
+        pass
+    
+    @abstractmethod
+    async def add_many(self, predictions: List[Dict[str, Any]]) -> None:
+        ...
+    
+    @abstractmethod
+    async def get(self, prediction_id: str) -> Optional[Dict[str, Any]]:
+        ...
+    
+    @abstractmethod
+    async def list_for_event(self,
+                             event_id: str,
+                             limit: int = 50,
+                             offset: int = 0,
+                             since: Optional[datetime] = None,
+                             until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Predictions for an event, newest first, optionally restricted to
+        generated_at in [since, until]. Timestamps are timezone-aware (UTC).
+        """
+        ...
+    
+    async def add(self, prediction: Dict[str, Any]) -> None:
+        await self.add_many([prediction])
+
+class InMemoryPredictionStore(PredictionStore):
+    """
+    Bounded in-process store with a secondary index by event_id.
+    Oldest predictions are evicted once max_predictions or max_age_seconds is exceeded.
+    Adding a prediction id that is already stored keeps the stored one.
+    """
+    
+    def __init__(self, max_predictions: int = 10000, max_age_seconds: Optional[float] = None):
+        self.max_predictions = max_predictions
+        self.max_age_seconds = max_age_seconds
+        # prediction_id -> (stored_at, prediction), in insertion order
+        self.predictions: "OrderedDict[str, tuple]" = OrderedDict()
+        # event_id -> parallel lists of generated_at and prediction_id, sorted by generated_at
+        self.event_times: Dict[str, List[datetime]] = {}
+        self.event_ids: Dict[str, List[str]] = {}
+    
+    async def add_many(self, predictions: List[Dict[str, Any]]) -> None:
+        now = time.monotonic()
+        for prediction in predictions:
+            prediction_id = prediction["prediction_id"]
+            event_id = prediction["event_id"]
+            generated_at = prediction["generated_at"]
+            if prediction_id in self.predictions:
+                # As ON CONFLICT DO NOTHING in Postgres: the first copy stays (e.g. a re-run job)
+                continue
+            
+            self.predictions[prediction_id] = (now, prediction)
+            times = self.event_times.setdefault(event_id, [])
+            ids = self.event_ids.setdefault(event_id, [])
+            position = bisect_right(times, generated_at)
+            times.insert(position, generated_at)
+            ids.insert(position, prediction_id)
+        
+        self._evict(now)
+    
+    def _evict(self, now: float) -> None:
+        while self.predictions:
+            prediction_id, (stored_at, prediction) = next(iter(self.predictions.items()))
+            expired = self.max_age_seconds is not None and now - stored_at > self.max_age_seconds
+            if len(self.predictions) <= self.max_predictions and not expired:
+                break
+            self.predictions.popitem(last=False)
+            self._unindex(prediction["event_id"], prediction_id)
+    
+    def _unindex(self, event_id: str, prediction_id: str) -> None:
+        ids = self.event_ids[event_id]
+        position = ids.index(prediction_id)
+        del ids[position]
+        del self.event_times[event_id][position]
+        if not ids:
+            del self.event_ids[event_id]
+            del self.event_times[event_id]
+    
+    async def get(self, prediction_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.predictions.get(prediction_id)
+        if entry is None:
+            return None
+        stored_at, prediction = entry
+        if self.max_age_seconds is not None and time.monotonic() - stored_at > self.max_age_seconds:
+            return None
+        return prediction
+    
+    async def list_for_event(self,
+                             event_id: str,
+                             limit: int = 50,
+                             offset: int = 0,
+                             since: Optional[datetime] = None,
+                             until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        self._evict(time.monotonic())
+        times = self.event_times.get(event_id)
+        if not times:
+            return []
+        
+        low = bisect_left(times, since) if since is not None else 0
+        high = bisect_right(times, until) if until is not None else len(times)
+        
+        # Walk the window newest first, touching only the requested page
+        stop = max(low, high - offset)
+        start = max(low, stop - limit)
+        ids = self.event_ids[event_id][start:stop]
+        return [self.predictions[prediction_id][1] for prediction_id in reversed(ids)]
+
+class PostgresPredictionStore(PredictionStore):
+    """
+    PostGIS-backed store using the predictions table from database/init.sql.
+    Writes are buffered and flushed in batches by a background task. At most
+    max_pending predictions wait to be written; beyond that the oldest are
+    dropped (and counted), so an unreachable database cannot exhaust memory.
+    When the database rejects a batch, its rows are inserted one at a time
+    and the ones it rejects are set aside in `rejected` instead of blocking
+    every later flush.
+    """
+    
+    def __init__(self,
+                 conn_string: str,
+                 batch_size: int = 100,
+                 flush_interval: float = 0.5,
+                 max_pending: int = 10000,
+                 max_rejected: int = 100):
+        self.conn_string = conn_string
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pool = None
+        self.pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.rejected: deque = deque(maxlen=max_rejected)
+        self.flush_task = None
+        self.flush_requested = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.counters = {"written": 0, "rejected": 0, "dropped": 0, "flush_errors": 0}
+    
+    async def start(self) -> None:
+        from psycopg_pool import AsyncConnectionPool
+        
+        self.pool = AsyncConnectionPool(self.conn_string, open=False)
+        await self.pool.open()
+        self.flush_task = asyncio.create_task(self._flush_periodically())
+    
+    async def close(self) -> None:
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+        if self.pool:
+            await self.flush()
+            await self.pool.close()
+            self.pool = None
+    
+    async def add_many(self, predictions: List[Dict[str, Any]]) -> None:
+        for prediction in predictions:
+            self.pending[prediction["prediction_id"]] = prediction
+        dropped = 0
+        while len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            dropped += 1
+        if dropped:
+            self.counters["dropped"] += dropped
+            STORE_WRITES.inc("dropped", amount=dropped)
+            print(f"Prediction write buffer full ({self.max_pending}): dropped the {dropped} oldest unwritten predictions")
+        if len(self.pending) >= self.batch_size:
+            self.flush_requested.set()
+    
+    async def _flush_periodically(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.counters["flush_errors"] += 1
+                print(f"Error flushing predictions: {e}")
+    
+    async def flush(self) -> None:
+        """
+        Write all buffered predictions in one executemany round-trip; if the
+        database rejects the batch, retry its rows one by one (each in its own
+        savepoint) and set aside the rows it rejects. Connection failures leave
+        everything buffered for the next flush.
+        """
+        import psycopg
+        
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            batch = list(self.pending.values())
+            rows = [self._to_row(prediction) for prediction in batch]
+            
+            async with self.pool.connection() as conn:
+                try:
+                    async with conn.transaction():
+                        async with conn.cursor() as cur:
+                            await cur.executemany(INSERT_PREDICTION_SQL, rows)
+                    rejected: List[Tuple[Dict[str, Any], str]] = []
+                except (psycopg.OperationalError, psycopg.InterfaceError):
+                    raise
+                except psycopg.Error as e:
+                    print(f"Batch of {len(batch)} predictions rejected ({e}); inserting them one at a time")
+                    rejected = await self._insert_each(conn, batch, rows)
+            
+            for prediction in batch:
+                self.pending.pop(prediction["prediction_id"], None)
+            for prediction, error in rejected:
+                self.rejected.append({"prediction": prediction, "error": error})
+            written = len(batch) - len(rejected)
+            self.counters["written"] += written
+            self.counters["rejected"] += len(rejected)
+            STORE_WRITES.inc("written", amount=written)
+            STORE_WRITES.inc("rejected", amount=len(rejected))
+    
+    @staticmethod
+    async def _insert_each(conn, batch: List[Dict[str, Any]], rows: List[tuple]) -> List[Tuple[Dict[str, Any], str]]:
+        """
+        Insert rows individually; returns the predictions the database rejected, with the error.
+        """
+        import psycopg
+        
+        rejected = []
+        for prediction, row in zip(batch, rows):
+            try:
+                async with conn.transaction():
+                    await conn.execute(INSERT_PREDICTION_SQL, row)
+            except (psycopg.OperationalError, psycopg.InterfaceError):
+                raise
+            except psycopg.Error as e:
+                print(f"Prediction {prediction['prediction_id']} (event {prediction['event_id']}) rejected: {e}")
+                rejected.append((prediction, str(e)))
+        return rejected
+    
+    @staticmethod
+    def _to_row(prediction: Dict[str, Any]) -> tuple:
+        metadata = prediction.get("metadata") or {}
+        perimeter = prediction["result"].get("predicted_perimeter")
+        return (
+            prediction["prediction_id"],
+            prediction["event_id"],
+            prediction["model_type"],
+            metadata.get("model_name"),
+            metadata.get("model_version"),
+            prediction["forecast_hours"],
+            prediction["generated_at"],
+            prediction["confidence"],
+            encode_json(perimeter).decode() if perimeter else None,
+            encode_json(prediction["result"]).decode(),
+            encode_json(metadata).decode()
+        )
+    
+    @staticmethod
+    def _from_row(row: tuple) -> Dict[str, Any]:
+        prediction_id, event_id, model_type, forecast_hours, generated_at, confidence, result, metadata = row
+        return {
+            "prediction_id": str(prediction_id),
+            "event_id": event_id,
+            "model_type": model_type,
+            "forecast_hours": forecast_hours,
+            "generated_at": generated_at,
+            "confidence": confidence,
+            "result": result,
+            "metadata": metadata
+        }
+    
+    async def get(self, prediction_id: str) -> Optional[Dict[str, Any]]:
+        if prediction_id in self.pending:
+            return self.pending[prediction_id]
+        
+        try:
+            uuid.UUID(prediction_id)
+        except ValueError:
+            return None
+        
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT id, event_id, model_type, forecast_hours, generated_at, confidence, result, metadata
+                    FROM predictions WHERE id = %s::uuid
+                    """,
+                    (prediction_id,)
+                )
+                row = await cur.fetchone()
+        return self._from_row(row) if row else None
+    
+    async def list_for_event(self,
+                             event_id: str,
+                             limit: int = 50,
+                             offset: int = 0,
+                             since: Optional[datetime] = None,
+                             until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        # Make buffered writes visible before querying
+        await self.flush()
+        
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT id, event_id, model_type, forecast_hours, generated_at, confidence, result, metadata
+                    FROM predictions
+                    WHERE event_id = %s
+                      AND (%s::timestamptz IS NULL OR generated_at >= %s)
+                      AND (%s::timestamptz IS NULL OR generated_at <= %s)
+                    ORDER BY generated_at DESC
+                    LIMIT %s OFFSET %s
+                    """,
+                    (event_id, since, since, until, until, limit, offset)
+                )
+                rows = await cur.fetchall()
+        return [self._from_row(row) for row in rows]
+
+def create_prediction_store() -> PredictionStore:
+    """
+    Build the prediction store selected by settings.PREDICTION_STORE_BACKEND.
+    """
+    if settings.PREDICTION_STORE_BACKEND.lower() == "postgres":
+        return PostgresPredictionStore(
+            settings.DB_CONN_STRING,
+            batch_size=settings.PREDICTION_STORE_BATCH_SIZE,
+            flush_interval=settings.PREDICTION_STORE_FLUSH_INTERVAL,
+            max_pending=settings.PREDICTION_STORE_MAX_PENDING
+        )
+    
+    return InMemoryPredictionStore(
+        max_predictions=settings.PREDICTION_STORE_MAX_ITEMS,
+        max_age_seconds=settings.PREDICTION_STORE_MAX_AGE_HOURS * 3600 if settings.PREDICTION_STORE_MAX_AGE_HOURS > 0 else None
+    )
@@ -0,0 +1,422 @@
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple
+from ..config import settings
+from ..models.wildfire_heuristic import WildfireHeuristicModel
+from ..schemas.prediction import WildfirePredictionRequest
+from ..services.data_fetcher import data_fetcher
+from ..services.event_repository import EventRepository
+from ..services.prediction_service import PredictionService, prediction_service, WEATHER_FIELDS
+from ..utils.metrics import metrics
+
+# Event rows in the format of EventRepository.get
+Event = Dict[str, Any]
+
+# Why an event is re-scored; an event with none of these is skipped
+RESCORE_REASONS = ("new", "event", "moved", "weather", "stale")
+
+# 1° latitude ≈ 111 km, 1° longitude ≈ 111 km * cos(latitude)
+KM_PER_DEGREE = 111
+
+RESCORE_DECISIONS = metrics.counter(
+    "terrapulse_rescore_decisions_total",
+    "Active wildfire re-scoring decisions by outcome (performed, skipped, deferred, failed)",
+    ("result",)
+)
+RESCORE_CYCLE_SECONDS = metrics.histogram(
+    "terrapulse_rescore_cycle_seconds", "Duration of a re-scoring pass over the active wildfires"
+)
+
+class ActiveEventSource(ABC):
+    """
+    The wildfires currently worth keeping predictions for.
+    """
+    
+    name = "source"
+    
+    async def start(self) -> None:
+        pass
+    
+    async def close(self) -> None:
+        pass
+    
+    @abstractmethod
+    async def load(self, active_since: datetime) -> List[Event]:
+        """
+        Every wildfire updated (or, never updated, acquired) since `active_since`.
+        """
+
+class MemoryActiveEventSource(ActiveEventSource):
+    """
+    Events registered in-process, active until removed; for running without PostGIS.
+    """
+    
+    name = "memory"
+    
+    def __init__(self):
+        self.events: Dict[str, Event] = {}
+    
+    def upsert(self, event: Event) -> None:
+        self.events[event["id"]] = event
+    
+    def remove(self, event_id: str) -> None:
+        self.events.pop(event_id, None)
+    
+    async def load(self, active_since: datetime) -> List[Event]:
+        return list(self.events.values())
+
+ACTIVE_WILDFIRES_SQL = """
+SELECT id, title, description, category_id, ST_AsGeoJSON(geometry)::json AS geometry,
+       acquired, updated, source_url, severity, confidence
+FROM events
+WHERE category_id = 'wildfires' AND COALESCE(updated, acquired, inserted_at) > %(since)s
+"""
+
+class PostgresActiveEventSource(ActiveEventSource):
+    """
+    Wildfire rows of the events table of database/init.sql.
+    """
+    
+    name = "postgres"
+    
+    def __init__(self, conn_string: str):
+        self.conn_string = conn_string
+        self.pool = None
+    
+    async def start(self) -> None:
+        from psycopg_pool import AsyncConnectionPool
+        from psycopg.rows import dict_row
+        
+        self.pool = AsyncConnectionPool(self.conn_string, min_size=1, max_size=2,
+                                        kwargs={"row_factory": dict_row}, open=False)
+        await self.pool.open()
+    
+    async def close(self) -> None:
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+    
+    async def load(self, active_since: datetime) -> List[Event]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(ACTIVE_WILDFIRES_SQL, {"since": active_since})
+            rows = await cursor.fetchall()
+        return [EventRepository._to_event(row) for row in rows]
+
+def _direction_change(previous: float, current: float) -> float:
+    change = abs(current - previous) % 360
+    return min(change, 360 - change)
+
+class RescoreScheduler:
+    """
+    Keeps the predictions of active wildfires current without re-scoring
+    every one of them on every pass. Each pass loads the active wildfires,
+    looks up their weather in one batch (forecast grid, then the weather
+    cache) and compares each event's inputs with those of its last
+    re-scoring: an event is queued again only when it is new, its row
+    changed (`updated`, severity), it moved more than move_km, its weather
+    moved past one of the thresholds (wind speed km/h, wind direction
+    degrees, temperature °C, humidity %) or it was last re-scored
+    max_age_seconds ago. The rest are skipped.
+    
+    Queued events are coalesced, one entry per event carrying every reason
+    seen since it was queued and the latest inputs, and predicted in batches
+    of batch_size through PredictionService.predict_wildfire_batch (one
+    model run per batch), highest severity first. A token bucket caps
+    re-scoring at max_per_minute predictions; what it holds back stays queued
+    for the next pass. Inputs of the last re-scoring are kept in memory, so
+    after a restart every active event is re-scored once.
+    """
+    
+    def __init__(self,
+                 source: ActiveEventSource,
+                 service: PredictionService,
+                 interval_seconds: float = 60,
+                 active_days: float = 7,
+                 max_age_seconds: float = 6 * 3600,
+                 thresholds: Optional[Dict[str, float]] = None,
+                 move_km: float = 1,
+                 batch_size: int = 256,
+                 max_per_minute: int = 600,
+                 weather_concurrency: int = 8,
+                 model: Optional[str] = None,
+                 forecast_hours: int = 24):
+        self.source = source
+        self.service = service
+        self.interval_seconds = interval_seconds
+        self.active_days = active_days
+        self.max_age_seconds = max_age_seconds
+        self.thresholds = thresholds or {"wind_speed": 5, "wind_direction": 20, "temperature": 3, "humidity": 10}
+        self.move_km = move_km
+        self.batch_size = batch_size
+        self.max_per_minute = max_per_minute
+        self.weather_concurrency = weather_concurrency
+        self.model = model
+        self.forecast_hours = forecast_hours
+        # Inputs of each active event's last re-scoring, and the events waiting for one
+        self.scored: Dict[str, Dict[str, Any]] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.tokens = float(max_per_minute)
+        self.refilled_at = time.monotonic()
+        self.active = 0
+        self.task: Optional[asyncio.Task] = None
+        self.counters = {"passes": 0, "evaluated": 0, "performed": 0, "skipped": 0, "coalesced": 0,
+                         "deferred": 0, "failed": 0, "invalid": 0, "retired": 0, "errors": 0}
+        self.reasons = dict.fromkeys(RESCORE_REASONS, 0)
+        self.cycle_seconds = RESCORE_CYCLE_SECONDS.labels()
+    
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+    
+    async def start(self) -> None:
+        if self.running:
+            return
+        await self.source.start()
+        self.refilled_at = time.monotonic()
+        self.task = asyncio.create_task(self._run_periodically())
+    
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.source.close()
+    
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"Error re-scoring active wildfires: {e}")
+            await asyncio.sleep(self.interval_seconds)
+    
+    async def run_once(self) -> Dict[str, int]:
+        """
+        One pass over the active wildfires: queue the events whose inputs
+        changed and re-score as many of the queued as the rate limit allows.
+        Returns the pass's counts; `deferred` counts the events newly held
+        back by the rate limit in this pass, `queued` all that are waiting.
+        """
+        start = time.perf_counter()
+        queued_before = set(self.pending)
+        events = await self.source.load(datetime.now(timezone.utc) - timedelta(days=self.active_days))
+        
+        located: List[Tuple[Event, float, float]] = []
+        for event_data in events:
+            try:
+                lon, lat = WildfireHeuristicModel.event_coordinates(event_data)[:2]
+            except ValueError:
+                self.counters["invalid"] += 1
+                continue
+            located.append((event_data, float(lon), float(lat)))
+        weather = await data_fetcher.fetch_weather_batch(
+            [lat for _, _, lat in located], [lon for _, lon, _ in located], self.weather_concurrency
+        )
+        
+        now = time.time()
+        skipped = 0
+        for (event_data, lon, lat), event_weather in zip(located, weather):
+            event_id = event_data["id"]
+            inputs = {
+                "version": event_data.get("updated") or event_data.get("acquired"),
+                "severity": event_data.get("severity"),
+                "lon": lon,
+                "lat": lat,
+                "weather": {field: event_weather.get(field) for field in WEATHER_FIELDS} if event_weather else None
+            }
+            reasons = self.changes(self.scored.get(event_id), inputs, now)
+            entry = self.pending.get(event_id)
+            if not reasons:
+                # Also drops a queued re-scoring whose inputs have moved back
+                self.pending.pop(event_id, None)
+                skipped += 1
+            elif entry is None:
+                self.pending[event_id] = {"event": event_data, "inputs": inputs, "reasons": set(reasons),
+                                          "priority": PredictionService.job_priority(event_data, background=True),
+                                          "queued_at": now}
+            else:
+                entry.update(event=event_data, inputs=inputs,
+                             priority=PredictionService.job_priority(event_data, background=True))
+                entry["reasons"].update(reasons)
+                self.counters["coalesced"] += 1
+        
+        active_ids = {event_data["id"] for event_data, _, _ in located}
+        retired = [event_id for event_id in self.scored if event_id not in active_ids]
+        for event_id in retired:
+            del self.scored[event_id]
+        for event_id in [event_id for event_id in self.pending if event_id not in active_ids]:
+            del self.pending[event_id]
+        
+        performed, failed_ids = await self._dispatch()
+        failed = len(failed_ids)
+        deferred = sum(1 for event_id in self.pending if event_id not in queued_before and event_id not in failed_ids)
+        
+        self.active = len(located)
+        self.counters["passes"] += 1
+        self.counters["evaluated"] += len(located)
+        self.counters["performed"] += performed
+        self.counters["skipped"] += skipped
+        self.counters["deferred"] += deferred
+        self.counters["failed"] += failed
+        self.counters["retired"] += len(retired)
+        RESCORE_DECISIONS.inc("performed", amount=performed)
+        RESCORE_DECISIONS.inc("skipped", amount=skipped)
+        RESCORE_DECISIONS.inc("deferred", amount=deferred)
+        RESCORE_DECISIONS.inc("failed", amount=failed)
+        self.cycle_seconds.observe(time.perf_counter() - start)
+        return {"active": len(located), "performed": performed, "skipped": skipped, "deferred": deferred,
+                "queued": len(self.pending), "failed": failed}
+    
+    def changes(self, previous: Optional[Dict[str, Any]], current: Dict[str, Any], now: float) -> List[str]:
+        """
+        The reasons (RESCORE_REASONS) to re-score an event whose last
+        re-scoring used `previous` inputs and whose inputs are now `current`.
+        Weather that could not be fetched counts as unchanged.
+        """
+        if previous is None:
+            return ["new"]
+        reasons = []
+        if current["version"] != previous["version"] or current["severity"] != previous["severity"]:
+            reasons.append("event")
+        moved_km = KM_PER_DEGREE * math.hypot(current["lat"] - previous["lat"],
+                                              (current["lon"] - previous["lon"]) * math.cos(math.radians(current["lat"])))
+        if moved_km >= self.move_km:
+            reasons.append("moved")
+        if self._weather_moved(previous["weather"], current["weather"]):
+            reasons.append("weather")
+        if now - previous["scored_at"] >= self.max_age_seconds:
+            reasons.append("stale")
+        return reasons
+    
+    def _weather_moved(self, previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> bool:
+        if current is None:
+            return False
+        if previous is None:
+            return True
+        for field, threshold in self.thresholds.items():
+            before, after = previous.get(field), current.get(field)
+            if before is None or after is None:
+                continue
+            change = _direction_change(before, after) if field == "wind_direction" else abs(after - before)
+            if change >= threshold:
+                return True
+        return False
+    
+    def _available(self) -> int:
+        """
+        Re-scorings the rate limit allows now.
+        """
+        now = time.monotonic()
+        self.tokens = min(float(self.max_per_minute), self.tokens + (now - self.refilled_at) * self.max_per_minute / 60)
+        self.refilled_at = now
+        return int(self.tokens)
+    
+    def _request(self, event_id: str, inputs: Dict[str, Any]) -> WildfirePredictionRequest:
+        """
+        The prediction request for a re-scoring, with the weather it was
+        compared on (anything missing is resolved as for any request).
+        """
+        weather = {field: value for field, value in (inputs["weather"] or {}).items() if value is not None}
+        if "wind_direction" in weather:
+            weather["wind_direction"] %= 360
+        return WildfirePredictionRequest(event_id=event_id, forecast_hours=self.forecast_hours,
+                                         model=self.model, **weather)
+    
+    async def _dispatch(self) -> Tuple[int, List[str]]:
+        """
+        Re-score queued events in batches, highest severity and then longest
+        queued first, up to the rate limit. Returns the number performed and
+        the ids of the events that failed, which stay queued.
+        """
+        queued = sorted(self.pending.items(), key=lambda item: (-item[1]["priority"], item[1]["queued_at"]))
+        queued = queued[:self._available()]
+        performed = 0
+        for offset in range(0, len(queued), self.batch_size):
+            batch = queued[offset:offset + self.batch_size]
+            # Failed runs use up their tokens too, so a failing model is not retried at full rate
+            self.tokens -= len(batch)
+            try:
+                requests = [self._request(event_id, entry["inputs"]) for event_id, entry in batch]
+                await self.service.predict_wildfire_batch(requests, [entry["event"] for _, entry in batch])
+            except Exception as e:
+                print(f"Error re-scoring {len(batch)} wildfires: {e}")
+                return performed, [event_id for event_id, _ in batch]
+            
+            scored_at = time.time()
+            for event_id, entry in batch:
+                del self.pending[event_id]
+                self.scored[event_id] = {**entry["inputs"], "scored_at": scored_at}
+                for reason in entry["reasons"]:
+                    self.reasons[reason] += 1
+            performed += len(batch)
+        return performed, []
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counts over all passes. A full periodic re-scoring would have run
+        `evaluated` predictions (every active event on every pass); `savings`
+        is the share of those that were not needed.
+        """
+        evaluated = self.counters["evaluated"]
+        return {
+            "source": self.source.name,
+            "running": self.running,
+            "active": self.active,
+            "tracked": len(self.scored),
+            "queued": len(self.pending),
+            "tokens": int(self.tokens),
+            **self.counters,
+            "reasons": dict(self.reasons),
+            "full_rescore_predictions": evaluated,
+            "savings": round(1 - self.counters["performed"] / evaluated, 4) if evaluated else 0.0,
+            "cycle_ms_p50": round(self.cycle_seconds.quantile(0.5) * 1000, 3),
+            "cycle_ms_p95": round(self.cycle_seconds.quantile(0.95) * 1000, 3)
+        }
+
+def create_rescore_scheduler() -> RescoreScheduler:
+    """
+    Build the re-scoring scheduler over the source selected by settings.
+    """
+    if settings.RESCORE_SOURCE.lower() == "postgres":
+        source: ActiveEventSource = PostgresActiveEventSource(settings.DB_CONN_STRING)
+    else:
+        source = MemoryActiveEventSource()
+    
+    return RescoreScheduler(
+        source,
+        prediction_service,
+        interval_seconds=settings.RESCORE_INTERVAL_SECONDS,
+        active_days=settings.RESCORE_ACTIVE_DAYS,
+        max_age_seconds=settings.RESCORE_MAX_AGE_SECONDS,
+        thresholds={
+            "wind_speed": settings.RESCORE_WIND_SPEED_KMH,
+            "wind_direction": settings.RESCORE_WIND_DIRECTION_DEG,
+            "temperature": settings.RESCORE_TEMPERATURE_C,
+            "humidity": settings.RESCORE_HUMIDITY_PCT
+        },
+        move_km=settings.RESCORE_MOVE_KM,
+        batch_size=settings.RESCORE_BATCH_SIZE,
+        max_per_minute=settings.RESCORE_MAX_PER_MINUTE,
+        weather_concurrency=settings.RESCORE_WEATHER_CONCURRENCY,
+        model=settings.RESCORE_MODEL or None,
+        forecast_hours=settings.RESCORE_FORECAST_HOURS
+    )
+
+# Create a singleton instance
+rescore_scheduler = create_rescore_scheduler()
+
+def _rescore_metrics():
+    stats = rescore_scheduler.stats()
+    return [
+        ("terrapulse_rescore_active_events", "gauge", "Active wildfires tracked for re-scoring", [({}, stats["active"])]),
+        ("terrapulse_rescore_queued_events", "gauge", "Wildfires waiting to be re-scored (changed, held back by the rate limit)",
+         [({}, stats["queued"])])
+    ]
+
+metrics.register_collector(_rescore_metrics)
@@ -0,0 +1,532 @@
+import asyncio
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple, Set
+import numpy as np
+import shapely
+from ..config import settings
+from ..utils.metrics import metrics, timed, STAGE_SECONDS
+from ..utils.serialization import encode_json
+from ..utils.mvt import EXTENT, BBox, tile_bounds, tile_geometries, tile_range, to_mercator, encode_tile
+
+TileKey = Tuple[int, int, int]  # (z, x, y)
+Change = Tuple[str, Optional[BBox]]  # (event id, lon/lat bounds of its new features, if any)
+
+# Tiles are drawn at 512 screen pixels, so simplification tolerances are in those pixels
+SCREEN_TILE_PIXELS = 512
+
+def geometry_bounds(*geometries: Optional[Dict[str, Any]]) -> Optional[BBox]:
+    """
+    Lon/lat bounds of GeoJSON geometries together, or None when all are missing.
+    """
+    shapes = [shapely.from_geojson(_geojson(geometry)) for geometry in geometries if geometry]
+    if not shapes:
+        return None
+    lon_min, lat_min, lon_max, lat_max = shapely.total_bounds(shapes)
+    return float(lon_min), float(lat_min), float(lon_max), float(lat_max)
+
+def _geojson(geometry: Dict[str, Any]) -> str:
+    return encode_json(geometry).decode()
+
+class TileCache:
+    """
+    LRU of encoded tiles bounded by total bytes, indexed by the event ids each
+    tile contains and by zoom, so changes can drop exactly the tiles they touch:
+    every tile holding a changed event, plus every tile its new bounds cover.
+    Entries also expire after ttl_seconds as a backstop. buffer is how far
+    (as a fraction of a tile) features reach into neighbouring tiles.
+    """
+    
+    def __init__(self, max_bytes: int, ttl_seconds: float = 0, buffer: float = 64 / EXTENT):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.buffer = buffer
+        # key -> (stored_at, tile, etag, event ids)
+        self.tiles: "OrderedDict[TileKey, Tuple[float, bytes, str, Set[str]]]" = OrderedDict()
+        self.by_event: Dict[str, Set[TileKey]] = {}
+        self.by_zoom: Dict[int, Set[Tuple[int, int]]] = {}
+        self.bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidated": 0, "expired": 0}
+    
+    def get(self, key: TileKey) -> Optional[Tuple[bytes, str]]:
+        entry = self.tiles.get(key)
+        if entry is not None and self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds:
+            self._drop(key)
+            self.counters["expired"] += 1
+            entry = None
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        self.tiles.move_to_end(key)
+        return entry[1], entry[2]
+    
+    def put(self, key: TileKey, tile: bytes, etag: str, event_ids: Set[str]) -> None:
+        self._drop(key)
+        self.tiles[key] = (time.monotonic(), tile, etag, event_ids)
+        self.bytes += len(tile)
+        for event_id in event_ids:
+            self.by_event.setdefault(event_id, set()).add(key)
+        self.by_zoom.setdefault(key[0], set()).add(key[1:])
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            self._drop(next(iter(self.tiles)))
+            self.counters["evictions"] += 1
+    
+    def _drop(self, key: TileKey) -> bool:
+        entry = self.tiles.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= len(entry[1])
+        for event_id in entry[3]:
+            keys = self.by_event.get(event_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_event[event_id]
+        columns = self.by_zoom[key[0]]
+        columns.discard(key[1:])
+        if not columns:
+            del self.by_zoom[key[0]]
+        return True
+    
+    def invalidate(self, changes: List[Change]) -> int:
+        """
+        Drop the cached tiles affected by changed events. Returns how many were dropped.
+        """
+        stale: Set[TileKey] = set()
+        for event_id, bbox in changes:
+            stale.update(self.by_event.get(event_id, ()))
+            if bbox is None:
+                continue
+            for z, cached in self.by_zoom.items():
+                x0, y0, x1, y1 = tile_range(bbox, z, buffer=self.buffer)
+                if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(cached):
+                    stale.update((z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) if (x, y) in cached)
+                else:
+                    stale.update((z, x, y) for x, y in cached if x0 <= x <= x1 and y0 <= y <= y1)
+        
+        dropped = sum(self._drop(key) for key in stale)
+        self.counters["invalidated"] += dropped
+        return dropped
+    
+    def clear(self) -> None:
+        self.tiles.clear()
+        self.by_event.clear()
+        self.by_zoom.clear()
+        self.bytes = 0
+
+class TileSource(ABC):
+    """
+    Where tile features come from: an "events" layer of event geometries and
+    a "perimeters" layer of each event's latest predicted perimeter.
+    """
+    
+    name = "source"
+    # Whether changes() finds changes made by other processes, and so should be polled
+    polls = False
+    
+    async def start(self) -> None:
+        pass
+    
+    async def close(self) -> None:
+        pass
+    
+    @abstractmethod
+    async def build(self, z: int, x: int, y: int) -> Tuple[bytes, Dict[str, Any]]:
+        """
+        Encode a tile. Returns it with the ids of the events it shows, mapped to
+        their version (events.updated, or None when unknown).
+        """
+        ...
+    
+    def record(self, predictions: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> None:
+        """
+        Predictions just stored by this process, with their events.
+        """
+        pass
+    
+    async def changes(self, versions: Dict[str, Any]) -> List[Change]:
+        """
+        Events changed by other processes since the last call, given the
+        versions of the events in cached tiles.
+        """
+        return []
+
+class MemoryTileSource(TileSource):
+    """
+    Features of the predictions made by this process (the memory prediction
+    store has no events table to draw from), kept in Web Mercator with their
+    bounds in arrays so a tile only clips the features that overlap it.
+    At most max_events events are kept, least recently predicted first out.
+    """
+    
+    name = "memory"
+    
+    def __init__(self, max_events: int = 10000, extent: int = EXTENT, buffer: int = 64, simplify_pixels: float = 1.0):
+        self.max_events = max_events
+        self.extent = extent
+        self.buffer = buffer
+        self.tolerance = simplify_pixels * extent / SCREEN_TILE_PIXELS
+        # event id -> {layer name: (mercator geometry, properties)}
+        self.features: "OrderedDict[str, Dict[str, Tuple[shapely.Geometry, Dict[str, Any]]]]" = OrderedDict()
+        self.index: Optional[Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray, np.ndarray]] = None
+    
+    def record(self, predictions: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> None:
+        for prediction, event_data in zip(predictions, events):
+            event_id = prediction["event_id"]
+            layers = self.features.pop(event_id, {})
+            if event_data.get("geometry"):
+                layers["events"] = (to_mercator(shapely.from_geojson(_geojson(event_data["geometry"]))), {
+                    "event_id": event_id,
+                    "title": event_data.get("title"),
+                    "category": event_data.get("category"),
+                    "severity": event_data.get("severity")
+                })
+            perimeter = prediction["result"].get("predicted_perimeter")
+            if perimeter:
+                metadata = prediction.get("metadata") or {}
+                layers["perimeters"] = (to_mercator(shapely.from_geojson(_geojson(perimeter))), {
+                    "event_id": event_id,
+                    "prediction_id": prediction["prediction_id"],
+                    "model_name": metadata.get("model_name"),
+                    "forecast_hours": prediction["forecast_hours"],
+                    "confidence": prediction["confidence"],
+                    "generated_at": str(prediction["generated_at"])
+                })
+            self.features[event_id] = layers
+        while len(self.features) > self.max_events:
+            self.features.popitem(last=False)
+        self.index = None
+    
+    def _index(self) -> Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (event id, layer) keys with their geometries, bounds and layer names as arrays.
+        """
+        if self.index is None:
+            keys = [(event_id, layer) for event_id, layers in self.features.items() for layer in layers]
+            geometries = np.empty(len(keys), dtype=object)
+            geometries[:] = [self.features[event_id][layer][0] for event_id, layer in keys]
+            bounds = shapely.bounds(geometries) if len(keys) else np.empty((0, 4))
+            self.index = (keys, geometries, bounds, np.array([layer for _, layer in keys], dtype=str))
+        return self.index
+    
+    async def build(self, z: int, x: int, y: int) -> Tuple[bytes, Dict[str, Any]]:
+        bounds = tile_bounds(z, x, y)
+        margin = self.buffer * (bounds[2] - bounds[0]) / self.extent
+        keys, geometries, feature_bounds, feature_layers = self._index()
+        overlapping = (
+            (feature_bounds[:, 0] <= bounds[2] + margin) & (feature_bounds[:, 2] >= bounds[0] - margin)
+            & (feature_bounds[:, 1] <= bounds[3] + margin) & (feature_bounds[:, 3] >= bounds[1] - margin)
+        )
+        
+        # Each layer's features are clipped, simplified and encoded together
+        layers: Dict[str, List] = {}
+        versions: Dict[str, Any] = {}
+        for layer in ("events", "perimeters"):
+            selected = np.flatnonzero(overlapping & (feature_layers == layer))
+            encoded = tile_geometries(geometries[selected], bounds, self.extent, self.buffer,
+                                      self.tolerance if layer == "perimeters" else 0.0)
+            layers[layer] = []
+            for index, geometry in zip(selected.tolist(), encoded):
+                if geometry is not None:
+                    event_id, _ = keys[index]
+                    layers[layer].append((geometry, self.features[event_id][layer][1]))
+                    versions[event_id] = None
+        return encode_tile(layers, self.extent), versions
+
+# Both layers in one round-trip. Perimeters are each event's latest prediction,
+# found through the GIST index on predictions.perimeter and then checked
+# against newer predictions of the same event
+POSTGIS_TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS tile,
+           ST_Transform(ST_TileEnvelope(%(z)s, %(x)s, %(y)s, margin => %(margin)s), 4326)::geography AS area
+),
+event_features AS (
+    SELECT e.id AS event_id, e.title, e.category_id AS category, e.severity, e.updated,
+           ST_AsMVTGeom(ST_Transform(e.geometry::geometry, 3857), bounds.tile, %(extent)s, %(buffer)s) AS geom
+    FROM events e, bounds
+    WHERE e.geometry && bounds.area
+),
+perimeter_features AS (
+    SELECT p.event_id, p.id::text AS prediction_id, p.model_name, p.forecast_hours, p.confidence,
+           p.generated_at::text AS generated_at,
+           ST_AsMVTGeom(ST_SimplifyPreserveTopology(ST_Transform(p.perimeter::geometry, 3857), %(tolerance)s),
+                        bounds.tile, %(extent)s, %(buffer)s) AS geom
+    FROM predictions p, bounds
+    WHERE p.perimeter && bounds.area
+      AND NOT EXISTS (
+          SELECT 1 FROM predictions newer
+          WHERE newer.event_id = p.event_id AND newer.generated_at > p.generated_at
+      )
+)
+SELECT
+    COALESCE((SELECT ST_AsMVT(f, 'events', %(extent)s, 'geom')
+              FROM (SELECT event_id, title, category, severity, geom FROM event_features WHERE geom IS NOT NULL) f), '')
+    || COALESCE((SELECT ST_AsMVT(f, 'perimeters', %(extent)s, 'geom')
+                 FROM (SELECT * FROM perimeter_features WHERE geom IS NOT NULL) f), '') AS tile,
+    ARRAY(SELECT event_id FROM event_features WHERE geom IS NOT NULL) AS event_ids,
+    ARRAY(SELECT updated::text FROM event_features WHERE geom IS NOT NULL) AS event_versions,
+    ARRAY(SELECT event_id FROM perimeter_features WHERE geom IS NOT NULL) AS perimeter_event_ids
+"""
+
+# Events inserted or predicted since the last poll, plus the current version of
+# every event in a cached tile (missing rows were deleted)
+POSTGIS_CHANGES_SQL = """
+SELECT id AS event_id, inserted_at AS changed_at, updated::text AS version, inserted_at > %(since)s AS inserted,
+       ST_XMin(g) AS lon_min, ST_YMin(g) AS lat_min, ST_XMax(g) AS lon_max, ST_YMax(g) AS lat_max
+FROM (SELECT id, inserted_at, updated, geometry::geometry AS g FROM events
+      WHERE inserted_at > %(since)s OR id = ANY(%(ids)s)) e
+UNION ALL
+SELECT event_id, generated_at, NULL, TRUE,
+       ST_XMin(g), ST_YMin(g), ST_XMax(g), ST_YMax(g)
+FROM (SELECT event_id, generated_at, perimeter::geometry AS g FROM predictions WHERE generated_at > %(since)s) p
+"""
+
+# Polls look back this far past the previous one, so rows committed late (the
+# prediction store flushes in batches) are not missed; repeats are skipped
+CHANGE_OVERLAP_SECONDS = 10
+
+class PostgisTileSource(TileSource):
+    """
+    Tiles built entirely in PostGIS with ST_AsMVT from the events and
+    predictions tables of database/init.sql. Changes by other processes
+    (event ingestion, other replicas, prediction workers) are found by polling:
+    new rows by inserted_at/generated_at, edits by comparing events.updated.
+    """
+    
+    name = "postgres"
+    polls = True
+    
+    def __init__(self, conn_string: str, extent: int = EXTENT, buffer: int = 64, simplify_pixels: float = 1.0):
+        self.conn_string = conn_string
+        self.extent = extent
+        self.buffer = buffer
+        self.simplify_pixels = simplify_pixels
+        self.pool = None
+        self.since: Optional[datetime] = None
+        self.seen: Set[Tuple[str, Any]] = set()
+    
+    async def start(self) -> None:
+        from psycopg_pool import AsyncConnectionPool
+        from psycopg.rows import dict_row
+        
+        self.pool = AsyncConnectionPool(self.conn_string, kwargs={"row_factory": dict_row}, open=False)
+        await self.pool.open()
+    
+    async def close(self) -> None:
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+    
+    async def build(self, z: int, x: int, y: int) -> Tuple[bytes, Dict[str, Any]]:
+        bounds = tile_bounds(z, x, y)
+        parameters = {
+            "z": z, "x": x, "y": y,
+            "extent": self.extent,
+            "buffer": self.buffer,
+            "margin": self.buffer / self.extent,
+            "tolerance": self.simplify_pixels * (bounds[2] - bounds[0]) / SCREEN_TILE_PIXELS
+        }
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(POSTGIS_TILE_SQL, parameters)
+            row = await cursor.fetchone()
+        
+        versions: Dict[str, Any] = dict.fromkeys(row["perimeter_event_ids"])
+        versions.update(zip(row["event_ids"], row["event_versions"]))
+        return bytes(row["tile"]), versions
+    
+    async def changes(self, versions: Dict[str, Any]) -> List[Change]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute("SELECT now() AS now")
+            now = (await cursor.fetchone())["now"]
+            if self.since is None:
+                # Nothing is cached before the first poll
+                self.since = now
+                return []
+            cursor = await conn.execute(POSTGIS_CHANGES_SQL, {
+                "since": self.since - timedelta(seconds=CHANGE_OVERLAP_SECONDS),
+                "ids": [event_id for event_id, version in versions.items() if version is not None]
+            })
+            rows = await cursor.fetchall()
+        self.since = now
+        
+        changes: List[Change] = []
+        seen = set()
+        present = set()
+        for row in rows:
+            event_id = row["event_id"]
+            bbox = (row["lon_min"], row["lat_min"], row["lon_max"], row["lat_max"]) if row["lon_min"] is not None else None
+            if row["version"] is not None or not row["inserted"]:
+                present.add(event_id)
+            if row["inserted"]:
+                mark = (event_id, row["changed_at"])
+                seen.add(mark)
+                if mark not in self.seen:
+                    changes.append((event_id, bbox))
+            elif versions.get(event_id) is not None and row["version"] != versions[event_id]:
+                changes.append((event_id, bbox))
+        self.seen = seen
+        
+        # Cached events that no longer exist
+        changes.extend((event_id, None) for event_id, version in versions.items()
+                       if version is not None and event_id not in present)
+        return changes
+
+class TileService:
+    """
+    Vector tiles (events plus latest predicted perimeters) served from a
+    TileCache in front of a TileSource. Concurrent misses for a tile share one
+    build, and a build that raced an invalidation is returned but not cached.
+    Predictions stored by this process invalidate their tiles immediately;
+    changes made elsewhere are picked up every revalidate_seconds.
+    """
+    
+    def __init__(self, source: TileSource, cache: TileCache, revalidate_seconds: float = 10.0):
+        self.source = source
+        self.cache = cache
+        self.revalidate_seconds = revalidate_seconds
+        self.inflight: Dict[TileKey, asyncio.Future] = {}
+        # Version of every event in a cached tile, for the source to check
+        self.versions: Dict[str, Any] = {}
+        self.generation = 0
+        self.coalesced = 0
+        self.revalidate_task = None
+        self.build_seconds = STAGE_SECONDS.labels("tile_build")
+    
+    async def start(self) -> None:
+        await self.source.start()
+        if self.revalidate_seconds > 0 and self.source.polls:
+            self.revalidate_task = asyncio.create_task(self._revalidate_periodically())
+    
+    async def close(self) -> None:
+        if self.revalidate_task:
+            self.revalidate_task.cancel()
+            self.revalidate_task = None
+        await self.source.close()
+        self.cache.clear()
+    
+    async def get(self, z: int, x: int, y: int) -> Tuple[bytes, str]:
+        """
+        The tile and its ETag, from the cache when present.
+        """
+        key = (z, x, y)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        generation = self.generation
+        try:
+            with timed("tile_build"):
+                tile, versions = await self.source.build(z, x, y)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()
+            raise
+        finally:
+            self.inflight.pop(key, None)
+        
+        etag = hashlib.blake2b(tile, digest_size=12).hexdigest()
+        if generation == self.generation:
+            self.cache.put(key, tile, etag, set(versions))
+            self.versions.update(versions)
+        future.set_result((tile, etag))
+        return tile, etag
+    
+    def record_predictions(self, predictions: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> None:
+        """
+        Invalidate the tiles showing events that just got a new prediction,
+        and the tiles its perimeter now covers.
+        """
+        self.source.record(predictions, events)
+        self.invalidate([
+            (prediction["event_id"], geometry_bounds(event_data.get("geometry"), prediction["result"].get("predicted_perimeter")))
+            for prediction, event_data in zip(predictions, events)
+        ])
+    
+    def invalidate(self, changes: List[Change]) -> None:
+        if not changes:
+            return
+        self.generation += 1
+        self.cache.invalidate(changes)
+        for event_id, _ in changes:
+            if event_id not in self.cache.by_event:
+                self.versions.pop(event_id, None)
+    
+    async def revalidate(self) -> None:
+        self.invalidate(await self.source.changes(
+            {event_id: version for event_id, version in self.versions.items() if event_id in self.cache.by_event}
+        ))
+    
+    async def _revalidate_periodically(self) -> None:
+        while True:
+            try:
+                await self.revalidate()
+            except Exception as e:
+                print(f"Error checking for tile changes: {e}")
+            await asyncio.sleep(self.revalidate_seconds)
+    
+    def stats(self) -> Dict[str, Any]:
+        counters = self.cache.counters
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "source": self.source.name,
+            **counters,
+            "coalesced": self.coalesced,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "tiles_cached": len(self.cache.tiles),
+            "cache_mb": round(self.cache.bytes / 2 ** 20, 2),
+            "cache_limit_mb": round(self.cache.max_bytes / 2 ** 20, 2),
+            "build_ms_p50": round(self.build_seconds.quantile(0.5) * 1000, 3),
+            "build_ms_p95": round(self.build_seconds.quantile(0.95) * 1000, 3)
+        }
+
+def create_tile_service() -> TileService:
+    """
+    Build the tile service over the source selected by settings.TILE_SOURCE.
+    """
+    options = {
+        "extent": settings.TILE_EXTENT,
+        "buffer": settings.TILE_BUFFER,
+        "simplify_pixels": settings.TILE_SIMPLIFY_PIXELS
+    }
+    if settings.TILE_SOURCE.lower() == "postgres":
+        source: TileSource = PostgisTileSource(settings.DB_CONN_STRING, **options)
+    else:
+        source = MemoryTileSource(max_events=settings.PREDICTION_STORE_MAX_ITEMS, **options)
+    
+    return TileService(
+        source,
+        TileCache(int(settings.TILE_CACHE_MB * 2 ** 20), ttl_seconds=settings.TILE_CACHE_TTL_SECONDS,
+                  buffer=settings.TILE_BUFFER / settings.TILE_EXTENT),
+        revalidate_seconds=settings.TILE_REVALIDATE_SECONDS
+    )
+
+# Create a singleton instance
+tile_service = create_tile_service()
+
+def _tile_metrics():
+    stats = tile_service.stats()
+    return [
+        ("terrapulse_tile_cache_requests_total", "counter", "Vector tile cache lookups by result",
+         [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]),
+          ({"result": "coalesced"}, stats["coalesced"])]),
+        ("terrapulse_tile_cache_invalidations_total", "counter", "Cached tiles dropped after an event or prediction in them changed",
+         [({}, stats["invalidated"])]),
+        ("terrapulse_tile_cache_bytes", "gauge", "Bytes of encoded tiles cached", [({}, tile_service.cache.bytes)])
+    ]
+
+metrics.register_collector(_tile_metrics)
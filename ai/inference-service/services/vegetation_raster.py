@@ -0,0 +1,256 @@
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
+import shapely
+from ..config import settings
+
+TileKey = Tuple[int, int, int]  # (dataset index, tile row, tile column)
+
+# Decoded tiles hold density quantized to uint8 (0-254 for 0-1, ~0.004 steps);
+# a quarter of float32's memory, so four times the coverage per cache MB
+DENSITY_LEVELS = 254
+NODATA = 255
+
+class TileCache:
+    """
+    LRU of decoded raster tiles bounded by total array bytes.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.tiles: "OrderedDict[TileKey, np.ndarray]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: TileKey) -> Optional[np.ndarray]:
+        tile = self.tiles.get(key)
+        if tile is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.tiles.move_to_end(key)
+        return tile
+    
+    def put(self, key: TileKey, tile: np.ndarray) -> None:
+        previous = self.tiles.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.nbytes
+        self.tiles[key] = tile
+        self.bytes += tile.nbytes
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.bytes -= evicted.nbytes
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        self.tiles.clear()
+        self.bytes = 0
+
+class VegetationRaster:
+    """
+    Vegetation density sampled from local NDVI GeoTIFF/COG tiles.
+    Rasters are read in tile_size windows (aligned with COG blocks when the
+    sizes match), converted from NDVI to a 0-1 density once, and kept in a
+    memory-bounded TileCache (one byte per pixel), so repeated lookups in the
+    same area never touch the files. NDVI at or below ndvi_bare maps to 0 and
+    at or above ndvi_dense to 1, linearly in between; nodata pixels are NaN and ignored.
+    Rasters may be in any CRS; where several cover a point the first (in path order) wins.
+    """
+    
+    def __init__(self,
+                 paths: List[str],
+                 tile_size: int = 256,
+                 cache_bytes: int = 256 * 2 ** 20,
+                 ndvi_bare: float = 0.1,
+                 ndvi_dense: float = 0.8,
+                 max_footprint_samples: int = 65536):
+        import rasterio
+        
+        self.paths = paths
+        self.tile_size = tile_size
+        self.ndvi_bare = ndvi_bare
+        self.ndvi_dense = ndvi_dense
+        self.max_footprint_samples = max_footprint_samples
+        self.cache = TileCache(cache_bytes)
+        self.read_seconds = 0.0
+        self.datasets = [rasterio.open(path) for path in paths]
+        self.inverse = [~dataset.transform for dataset in self.datasets]
+        self.geographic = [dataset.crs is None or dataset.crs.is_geographic for dataset in self.datasets]
+        # Dataset reads are not thread-safe; lookups run off the event loop one at a time
+        self.lock = threading.Lock()
+    
+    def close(self) -> None:
+        for dataset in self.datasets:
+            dataset.close()
+        self.datasets = []
+        self.cache.clear()
+    
+    def _pixels(self, index: int, lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fractional (row, col) of lon/lat points in a dataset's pixel grid.
+        """
+        xs, ys = lons, lats
+        if not self.geographic[index]:
+            from rasterio.warp import transform
+            
+            xs, ys = transform("EPSG:4326", self.datasets[index].crs, lons.tolist(), lats.tolist())
+            xs, ys = np.asarray(xs), np.asarray(ys)
+        a, b, c, d, e, f = self.inverse[index][:6]
+        return d * xs + e * ys + f, a * xs + b * ys + c
+    
+    def _tile(self, key: TileKey) -> np.ndarray:
+        tile = self.cache.get(key)
+        if tile is not None:
+            return tile
+        
+        from rasterio.windows import Window
+        
+        index, tile_row, tile_col = key
+        dataset = self.datasets[index]
+        start = time.perf_counter()
+        row_off, col_off = tile_row * self.tile_size, tile_col * self.tile_size
+        window = Window(col_off, row_off,
+                        min(self.tile_size, dataset.width - col_off),
+                        min(self.tile_size, dataset.height - row_off))
+        # Masked reads are several times slower than handling nodata here
+        raw = dataset.read(1, window=window)
+        ndvi = raw.astype(np.float32) * np.float32(dataset.scales[0]) + np.float32(dataset.offsets[0])
+        density = np.clip((ndvi - self.ndvi_bare) / (self.ndvi_dense - self.ndvi_bare), 0, 1)
+        tile = np.rint(density * DENSITY_LEVELS).astype(np.uint8)
+        missing = ~np.isfinite(ndvi)
+        if dataset.nodata is not None:
+            missing |= raw == dataset.nodata
+        tile[missing] = NODATA
+        self.read_seconds += time.perf_counter() - start
+        
+        self.cache.put(key, tile)
+        return tile
+    
+    def sample(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Density at each point (nearest pixel); NaN where no raster has data.
+        Points are grouped by tile, so each tile is fetched once per call.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        values = np.full(lats.shape, np.nan, dtype=np.float32)
+        
+        with self.lock:
+            for index, dataset in enumerate(self.datasets):
+                pending = np.flatnonzero(np.isnan(values))
+                if not len(pending):
+                    break
+                rows, cols = self._pixels(index, lons[pending], lats[pending])
+                rows, cols = np.floor(rows).astype(np.int64), np.floor(cols).astype(np.int64)
+                inside = (rows >= 0) & (rows < dataset.height) & (cols >= 0) & (cols < dataset.width)
+                pending, rows, cols = pending[inside], rows[inside], cols[inside]
+                
+                tile_rows, tile_cols = rows // self.tile_size, cols // self.tile_size
+                tile_ids = tile_rows * (dataset.width // self.tile_size + 1) + tile_cols
+                order = np.argsort(tile_ids, kind="stable")
+                boundaries = np.flatnonzero(np.diff(tile_ids[order])) + 1
+                for group in np.split(order, boundaries):
+                    if not len(group):
+                        continue
+                    first = group[0]
+                    tile = self._tile((index, int(tile_rows[first]), int(tile_cols[first])))
+                    values[pending[group]] = tile[rows[group] % self.tile_size, cols[group] % self.tile_size]
+                # Quantized levels to density; nodata becomes NaN and falls through to the next raster
+                found = values[pending]
+                values[pending] = np.where(found == NODATA, np.nan, found / DENSITY_LEVELS)
+        return values
+    
+    def footprint(self, ring: np.ndarray) -> Optional[Dict[str, float]]:
+        """
+        Mean and max density over the pixels inside a [lon, lat] ring (e.g. a
+        predicted perimeter), plus the fraction of them with data. Large
+        footprints are sampled on a strided pixel lattice of at most
+        max_footprint_samples points. None when no raster has data there.
+        """
+        ring = np.asarray(ring, dtype=float)
+        polygon = shapely.Polygon(ring)
+        lon_min, lat_min, lon_max, lat_max = polygon.bounds
+        
+        # Lattice spacing from the finest raster's pixel size at this latitude
+        pixel_deg = min(self._pixel_degrees(index, (lat_min + lat_max) / 2) for index in range(len(self.datasets)))
+        span_lon, span_lat = max(lon_max - lon_min, pixel_deg), max(lat_max - lat_min, pixel_deg)
+        step = max(pixel_deg, np.sqrt(span_lon * span_lat / self.max_footprint_samples))
+        lons, lats = np.meshgrid(np.arange(lon_min + step / 2, lon_max, step), np.arange(lat_min + step / 2, lat_max, step))
+        lons, lats = lons.ravel(), lats.ravel()
+        inside = shapely.contains_xy(polygon, lons, lats)
+        if not inside.any():
+            # Footprint smaller than a lattice cell: use its center
+            lons, lats = np.array([ring[:, 0].mean()]), np.array([ring[:, 1].mean()])
+        else:
+            lons, lats = lons[inside], lats[inside]
+        
+        values = self.sample(lats, lons)
+        covered = ~np.isnan(values)
+        if not covered.any():
+            return None
+        return {
+            "mean": float(values[covered].mean()),
+            "max": float(values[covered].max()),
+            "coverage": float(covered.mean()),
+            "samples": int(len(values))
+        }
+    
+    def footprints(self, rings: List[np.ndarray]) -> List[Optional[Dict[str, float]]]:
+        return [self.footprint(ring) for ring in rings]
+    
+    def _pixel_degrees(self, index: int, lat: float) -> float:
+        dataset = self.datasets[index]
+        size = max(abs(dataset.transform.a), abs(dataset.transform.e))
+        if self.geographic[index]:
+            return size
+        # Projected rasters are assumed to be in meters
+        return size / (111_000 * max(np.cos(np.radians(lat)), 0.01))
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            "rasters": len(self.datasets),
+            "tiles_cached": len(self.cache.tiles),
+            "cache_mb": round(self.cache.bytes / 2 ** 20, 2),
+            "cache_limit_mb": round(self.cache.max_bytes / 2 ** 20, 2),
+            "tile_hits": self.cache.hits,
+            "tile_misses": self.cache.misses,
+            "tile_evictions": self.cache.evictions,
+            "hit_rate": round(self.cache.hits / lookups, 4) if lookups else 0.0,
+            "read_seconds": round(self.read_seconds, 4)
+        }
+
+def create_vegetation_raster() -> Optional[VegetationRaster]:
+    """
+    Open the NDVI rasters in settings.VEGETATION_NDVI_PATH (a file, directory
+    of .tif files or glob), or None when unset or unreadable.
+    """
+    location = settings.VEGETATION_NDVI_PATH
+    if not location:
+        return None
+    if os.path.isdir(location):
+        paths = sorted(glob.glob(os.path.join(location, "*.tif")) + glob.glob(os.path.join(location, "*.tiff")))
+    else:
+        paths = sorted(glob.glob(location))
+    if not paths:
+        print(f"No NDVI rasters found at {location}")
+        return None
+    
+    try:
+        return VegetationRaster(
+            paths,
+            tile_size=settings.VEGETATION_TILE_SIZE,
+            cache_bytes=int(settings.VEGETATION_TILE_CACHE_MB * 2 ** 20),
+            ndvi_bare=settings.VEGETATION_NDVI_BARE,
+            ndvi_dense=settings.VEGETATION_NDVI_DENSE,
+            max_footprint_samples=settings.VEGETATION_FOOTPRINT_MAX_SAMPLES
+        )
+    except Exception as e:
+        print(f"Error opening NDVI rasters at {location}: {e}")
+        return None
@@ -0,0 +1,194 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+import orjson
+from ..config import settings
+from ..utils.serialization import encode_json
+
+WeatherData = Dict[str, Any]
+
+class MemoryCacheBackend:
+    """
+    In-process LRU cache with per-entry TTL expiry.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, Tuple[float, WeatherData]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[WeatherData]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: WeatherData) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    async def close(self) -> None:
+        self.entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class RedisCacheBackend:
+    """
+    Redis-backed cache shared between inference replicas.
+    Entries expire via SETEX; the size cap is left to Redis' maxmemory policy.
+    """
+    
+    def __init__(self, redis_url: str, ttl_seconds: float):
+        import redis.asyncio as redis
+        
+        self.ttl_seconds = max(1, int(ttl_seconds))
+        self.client = redis.from_url(redis_url)
+    
+    async def get(self, key: str) -> Optional[WeatherData]:
+        raw = await self.client.get(key)
+        return orjson.loads(raw) if raw is not None else None
+    
+    async def set(self, key: str, value: WeatherData) -> None:
+        await self.client.setex(key, self.ttl_seconds, encode_json(value))
+    
+    async def close(self) -> None:
+        await self.client.close()
+
+class WeatherCache:
+    """
+    Weather lookup cache keyed by a quantized lat/lon cell and a time bucket.
+    Concurrent misses for the same cell share a single upstream request.
+    """
+    
+    def __init__(self,
+                 backend,
+                 resolution_deg: float = 0.05,
+                 bucket_seconds: float = 600):
+        self.backend = backend
+        self.resolution_deg = resolution_deg
+        self.bucket_seconds = bucket_seconds
+        self.inflight: Dict[str, "asyncio.Future[Optional[WeatherData]]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.backend_errors = 0
+    
+    def cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """
+        Grid cell indices containing a point.
+        """
+        return math.floor(lat / self.resolution_deg), math.floor(lon / self.resolution_deg)
+    
+    def cell_center(self, lat: float, lon: float) -> Tuple[float, float]:
+        """
+        Center of the grid cell containing a point; upstream lookups use this
+        so a cell's cached value does not depend on which event filled it.
+        """
+        lat_idx, lon_idx = self.cell(lat, lon)
+        return (lat_idx + 0.5) * self.resolution_deg, (lon_idx + 0.5) * self.resolution_deg
+    
+    def key(self, lat: float, lon: float, now: Optional[float] = None) -> str:
+        lat_idx, lon_idx = self.cell(lat, lon)
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        return f"weather:{self.resolution_deg}:{lat_idx}:{lon_idx}:{bucket}"
+    
+    async def get_or_fetch(self,
+                           lat: float,
+                           lon: float,
+                           fetch: Callable[[float, float], Awaitable[Optional[WeatherData]]]) -> Optional[WeatherData]:
+        """
+        Return cached weather for the point's cell, calling fetch(lat, lon) with
+        the cell center on a miss. Failed fetches (None) are not cached.
+        Requests waiting on another's fetch retry if that request is cancelled.
+        """
+        key = self.key(lat, lon)
+        
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            print(f"Weather cache read failed: {e}")
+            self.backend_errors += 1
+            cached = None
+        
+        if cached is not None:
+            self.hits += 1
+            return cached
+        
+        # Another request is already fetching this cell: wait for its result
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                # The leading request was cancelled, not this one: look the cell up again
+                return await self.get_or_fetch(lat, lon, fetch)
+        
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            value = await fetch(*self.cell_center(lat, lon))
+            if value is not None:
+                try:
+                    await self.backend.set(key, value)
+                except Exception as e:
+                    print(f"Weather cache write failed: {e}")
+                    self.backend_errors += 1
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "backend_errors": self.backend_errors,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "inflight": len(self.inflight)
+        }
+    
+    async def close(self) -> None:
+        await self.backend.close()
+
+def create_weather_cache() -> Optional[WeatherCache]:
+    """
+    Build the weather cache described by settings, or None when disabled.
+    """
+    backend_name = settings.WEATHER_CACHE_BACKEND.lower()
+    if backend_name == "none":
+        return None
+    
+    if backend_name == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL, settings.WEATHER_CACHE_TTL_SECONDS)
+    else:
+        backend = MemoryCacheBackend(settings.WEATHER_CACHE_MAX_ENTRIES, settings.WEATHER_CACHE_TTL_SECONDS)
+    
+    return WeatherCache(
+        backend,
+        resolution_deg=settings.WEATHER_CACHE_RESOLUTION_DEG,
+        bucket_seconds=settings.WEATHER_CACHE_BUCKET_SECONDS
+    )
@@ -0,0 +1,225 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Union
+import numpy as np
+from ..config import settings
+
+# Hourly stacks a grid directory must provide, each a (T, Ny, Nx) .npy array
+GRID_VARIABLES = ("u_wind", "v_wind", "temperature", "humidity")
+
+def _epoch_seconds(value: Union[str, float, int]) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+class WeatherGrid:
+    """
+    Offline gridded weather forecast read from memory-mapped .npy stacks.
+    A grid directory holds one (T, Ny, Nx) array per GRID_VARIABLES entry
+    (u/v wind in m/s, temperature in Celsius, relative humidity in percent)
+    and a grid.json describing the axes:
+        
+        {"lon0": -125.0, "lat0": 32.0, "dlon": 0.1, "dlat": 0.1,
+         "time0": "2024-08-01T00:00:00Z", "step_hours": 1}
+    
+    lon0/lat0 are the first column/row centers (dlat may be negative for
+    north-up rasters). Lookups are vectorized bilinear interpolation in space
+    and linear in time; only the pages holding the touched cells are read.
+    Wind is interpolated as u/v components, then converted to speed and direction.
+    """
+    
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "grid.json")) as f:
+            meta = json.load(f)
+        
+        self.directory = directory
+        self.lon0 = float(meta["lon0"])
+        self.lat0 = float(meta["lat0"])
+        self.dlon = float(meta["dlon"])
+        self.dlat = float(meta["dlat"])
+        self.time0 = _epoch_seconds(meta["time0"])
+        self.step_seconds = float(meta.get("step_hours", 1)) * 3600
+        self.arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in GRID_VARIABLES
+        }
+        
+        shapes = {array.shape for array in self.arrays.values()}
+        if len(shapes) != 1:
+            raise ValueError(f"Weather grid variables differ in shape: {sorted(shapes)}")
+        self.shape = shapes.pop()
+        if len(self.shape) != 3 or min(self.shape) < 2:
+            raise ValueError(f"Weather grid variables must be (T, Ny, Nx) with every axis >= 2, got {self.shape}")
+    
+    @property
+    def start(self) -> float:
+        return self.time0
+    
+    @property
+    def end(self) -> float:
+        return self.time0 + (self.shape[0] - 1) * self.step_seconds
+    
+    def _corners(self, lats: np.ndarray, lons: np.ndarray):
+        """
+        Flat in-plane offsets and bilinear weights of the four cells around
+        each point, plus a mask of the points inside the grid.
+        """
+        _, rows, cols = self.shape
+        fy = (lats - self.lat0) / self.dlat
+        fx = (lons - self.lon0) / self.dlon
+        valid = (fy >= 0) & (fy <= rows - 1) & (fx >= 0) & (fx <= cols - 1)
+        
+        # Lower corner indices, kept one short of the edge so the upper corner exists
+        y0 = np.clip(np.floor(np.nan_to_num(fy)), 0, rows - 2).astype(np.intp)
+        x0 = np.clip(np.floor(np.nan_to_num(fx)), 0, cols - 2).astype(np.intp)
+        wy = np.clip(fy - y0, 0, 1)
+        wx = np.clip(fx - x0, 0, 1)
+        
+        base = y0 * cols + x0
+        corners = [
+            (base + dy * cols + dx, (wy if dy else 1 - wy) * (wx if dx else 1 - wx))
+            for dy in (0, 1) for dx in (0, 1)
+        ]
+        return corners, valid
+    
+    def _time_weights(self, times: np.ndarray):
+        ft = (times - self.time0) / self.step_seconds
+        valid = (ft >= 0) & (ft <= self.shape[0] - 1)
+        t0 = np.clip(np.floor(np.nan_to_num(ft)), 0, self.shape[0] - 2).astype(np.intp)
+        return t0, np.clip(ft - t0, 0, 1), valid
+    
+    @staticmethod
+    def _wind(values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        u, v = values.pop("u_wind"), values.pop("v_wind")
+        values["wind_speed"] = np.hypot(u, v) * 3.6  # m/s to km/h
+        # Meteorological direction is where the wind blows from, clockwise from north
+        values["wind_direction"] = (270 - np.degrees(np.arctan2(v, u))) % 360
+        return values
+    
+    def sample(self,
+               lats: np.ndarray,
+               lons: np.ndarray,
+               times: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Interpolate every variable at matching (lat, lon, epoch seconds) arrays
+        of any broadcastable shape. Points outside the grid or its time range are NaN.
+        Returns wind_speed (km/h), wind_direction (degrees, meteorological),
+        temperature and humidity arrays of the broadcast shape.
+        """
+        lats, lons, times = np.broadcast_arrays(
+            np.asarray(lats, dtype=float), np.asarray(lons, dtype=float), np.asarray(times, dtype=float)
+        )
+        corners, valid = self._corners(lats, lons)
+        t0, wt, valid_time = self._time_weights(times)
+        valid = valid & valid_time
+        
+        # Gather through flat offsets into the raveled stack: one index array
+        # per corner is much cheaper than indexing with three
+        plane_size = self.shape[1] * self.shape[2]
+        offsets = [
+            (t0 * plane_size + dt * plane_size + offset, (wt if dt else 1 - wt) * weight)
+            for dt in (0, 1) for offset, weight in corners
+        ]
+        
+        values = {}
+        for name, array in self.arrays.items():
+            flat = array.reshape(-1)
+            value = sum(flat[index] * weight for index, weight in offsets)
+            values[name] = np.where(valid, value, np.nan)
+        return self._wind(values)
+    
+    def series(self,
+               lats: np.ndarray,
+               lons: np.ndarray,
+               start: float,
+               hours: int) -> Dict[str, np.ndarray]:
+        """
+        Hourly values for N points over [start, start + hours], as (N, hours + 1)
+        arrays. Hours past the end of the forecast repeat its last step.
+        Every point shares the time axis, so each forecast step in the window is
+        interpolated in space once per point and then in time per hour.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        # A start past the end stays past it, so stale forecasts are not extrapolated
+        times = np.minimum(start + np.arange(hours + 1) * 3600.0, max(self.end, start))
+        corners, valid = self._corners(lats, lons)
+        t0, wt, valid_time = self._time_weights(times)
+        first, last = int(t0.min()), int(t0.max()) + 1
+        lower = t0 - first
+        wt = wt[:, None]
+        mask = valid[:, None] & valid_time[None, :]
+        
+        values = {}
+        for name, array in self.arrays.items():
+            # (steps, Ny * Nx) view of the steps the window touches
+            steps = array[first:last + 1].reshape(last + 1 - first, -1)
+            planes = sum(steps[:, index] * weight for index, weight in corners)
+            value = planes[lower] * (1 - wt) + planes[lower + 1] * wt
+            values[name] = np.where(mask, value.T, np.nan)
+        return self._wind(values)
+    
+    def lookup(self,
+               lats: np.ndarray,
+               lons: np.ndarray,
+               hours: Optional[int] = None,
+               now: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Weather dicts shaped like DataFetcher.fetch_weather_upstream's, one per
+        point: values at `now`, plus an "hourly" series over the next `hours`
+        when requested. Points the grid does not cover are None.
+        """
+        now = time.time() if now is None else now
+        if hours:
+            values = self.series(lats, lons, now, hours)
+            current = {name: column[:, 0] for name, column in values.items()}
+        else:
+            values = None
+            current = self.sample(lats, lons, np.full(len(lats), now))
+        
+        names = ("temperature", "humidity", "wind_speed", "wind_direction")
+        columns = {name: current[name].tolist() for name in names}
+        hourly = {name: values[name].round(3).tolist() for name in names} if values is not None else None
+        
+        results: List[Optional[Dict[str, Any]]] = []
+        for index in range(len(columns["temperature"])):
+            if columns["temperature"][index] != columns["temperature"][index]:  # NaN: not covered
+                results.append(None)
+                continue
+            weather = {name: columns[name][index] for name in names}
+            weather["conditions"] = "Forecast grid"
+            if hourly is not None:
+                weather["hourly"] = {name: hourly[name][index] for name in names}
+            results.append(weather)
+        return results
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "shape": list(self.shape),
+            "start": datetime.fromtimestamp(self.start, timezone.utc).isoformat(),
+            "end": datetime.fromtimestamp(self.end, timezone.utc).isoformat(),
+            "bounds": [
+                min(self.lon0, self.lon0 + (self.shape[2] - 1) * self.dlon),
+                min(self.lat0, self.lat0 + (self.shape[1] - 1) * self.dlat),
+                max(self.lon0, self.lon0 + (self.shape[2] - 1) * self.dlon),
+                max(self.lat0, self.lat0 + (self.shape[1] - 1) * self.dlat)
+            ]
+        }
+
+def create_weather_grid() -> Optional[WeatherGrid]:
+    """
+    Open the forecast grid in settings.WEATHER_GRID_DIR, or None when unset or unreadable.
+    """
+    if not settings.WEATHER_GRID_DIR:
+        return None
+    try:
+        return WeatherGrid(settings.WEATHER_GRID_DIR)
+    except Exception as e:
+        print(f"Error opening weather grid {settings.WEATHER_GRID_DIR}: {e}")
+        return None
@@ -0,0 +1,12 @@
+import sys
+import types
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+PACKAGE_NAME = "inference_service"
+
+# Register the inference-service directory as a package so its relative imports resolve
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [str(SERVICE_DIR)]
+    sys.modules[PACKAGE_NAME] = package
@@ -0,0 +1,203 @@
+"""
+Alert matching: the index's delta set and base mask through edits, deletes,
+re-adds and rebuilds, the category and severity filters, and the matcher
+publishing once per alert and event within renotify_seconds.
+"""
+import asyncio
+
+import numpy as np
+import shapely
+
+from inference_service.services.alert_matcher import (
+    AlertIndex, AlertMatcher, MemoryAlertSource, MemoryNotificationPublisher
+)
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+def alert(alert_id, x, y, user_id="user-1", category_id=None, min_severity=None):
+    # A 10x10 region with its lower left corner at (x, y)
+    return {"id": alert_id, "user_id": user_id, "category_id": category_id,
+            "min_severity": min_severity, "region": shapely.box(x, y, x + 10, y + 10)}
+
+def matched(index: AlertIndex, x, y, category="", severity=None):
+    """
+    Ids of the alerts a 2x2 perimeter at (x, y) matches, sorted.
+    """
+    perimeters = np.array([shapely.box(x, y, x + 2, y + 2)], dtype=object)
+    categories = np.array([category], dtype=object)
+    ranks = np.array([{"low": 0, "medium": 1, "high": 2, "critical": 3}.get(severity, 0)], dtype=np.int8)
+    return sorted(alert_id for _, alert_id, _ in index.snapshot.match(perimeters, categories, ranks))
+
+def test_edit_masks_the_base_copy():
+    index = AlertIndex()
+    index.replace([alert(1, 0, 0), alert(2, 100, 0)])
+    index.update(upserted=[alert(1, 50, 0)])
+    
+    assert matched(index, 1, 1) == []
+    assert matched(index, 51, 1) == [1]
+    assert matched(index, 101, 1) == [2]
+    assert index.delta_ids == [1]
+    assert len(index.snapshot) == len(index) == 2
+
+def test_delete_and_readd():
+    index = AlertIndex()
+    index.replace([alert(1, 0, 0), alert(2, 100, 0)])
+    index.update(removed=[1, 99])
+    assert matched(index, 1, 1) == []
+    assert len(index.snapshot) == len(index) == 1
+    
+    index.update(upserted=[alert(1, 0, 0)])
+    assert matched(index, 1, 1) == [1]
+    assert len(index.snapshot) == 2
+    
+    # Deleting an alert that only lives in the delta takes it out of the delta
+    index.update(removed=[1])
+    assert matched(index, 1, 1) == []
+    assert index.delta_ids == []
+
+def test_repeated_edits_keep_one_delta_copy():
+    index = AlertIndex()
+    index.update(upserted=[alert(1, 0, 0)])
+    index.update(upserted=[alert(1, 50, 0)])
+    index.update(upserted=[alert(1, 200, 0)])
+    
+    assert index.delta_ids == [1]
+    assert matched(index, 1, 1) == matched(index, 51, 1) == []
+    assert matched(index, 201, 1) == [1]
+
+def test_outgrown_delta_is_folded_into_a_new_base():
+    index = AlertIndex(rebuild_threshold=2)
+    index.replace([alert(1, 0, 0)])
+    index.update(upserted=[alert(2, 100, 0), alert(1, 50, 0)])
+    assert index.rebuilds == 1
+    assert len(index.snapshot.delta) == 2
+    
+    index.update(upserted=[alert(3, 200, 0)])
+    assert index.rebuilds == 2
+    assert index.delta_ids == []
+    assert len(index.snapshot.base) == 3 and index.snapshot.active.all()
+    assert matched(index, 1, 1) == []
+    assert [matched(index, x, 1) for x in (51, 101, 201)] == [[1], [2], [3]]
+
+def test_update_leaves_published_snapshots_alone():
+    index = AlertIndex()
+    index.replace([alert(1, 0, 0)])
+    before = index.snapshot
+    index.update(removed=[1])
+    
+    assert before.active.all()
+    assert not index.snapshot.active.any()
+
+def test_category_and_severity_filters():
+    index = AlertIndex()
+    index.replace([
+        alert(1, 0, 0),
+        alert(2, 0, 0, category_id="wildfires"),
+        alert(3, 0, 0, min_severity="high")
+    ])
+    index.update(upserted=[alert(4, 0, 0, category_id="wildfires", min_severity="medium")])
+    
+    assert matched(index, 1, 1) == [1]
+    assert matched(index, 1, 1, category="floods", severity="critical") == [1, 3]
+    assert matched(index, 1, 1, category="wildfires", severity="low") == [1, 2]
+    assert matched(index, 1, 1, category="wildfires", severity="medium") == [1, 2, 4]
+    assert matched(index, 1, 1, category="wildfires", severity="high") == [1, 2, 3, 4]
+    # Out of every region
+    assert matched(index, 50, 50, category="wildfires", severity="high") == []
+
+def prediction(prediction_id, event_id, x, y):
+    return {
+        "prediction_id": prediction_id,
+        "event_id": event_id,
+        "forecast_hours": 24,
+        "result": {"predicted_perimeter": shapely.geometry.mapping(shapely.box(x, y, x + 2, y + 2))}
+    }
+
+EVENT = {"title": "Ridge Fire", "category": "wildfires", "severity": "high"}
+
+def make_matcher(**options):
+    source = MemoryAlertSource()
+    source.add([
+        {"id": 1, "user_id": "user-1", "region": {"type": "Polygon", "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]]}},
+        {"id": 2, "user_id": "user-2", "category_id": "floods", "region": shapely.box(0, 0, 10, 10)}
+    ])
+    return AlertMatcher(source, MemoryNotificationPublisher(), **options)
+
+def test_matcher_notifies_once_per_alert_and_event():
+    async def scenario():
+        matcher = make_matcher()
+        await matcher.refresh(full=True)
+        first = await matcher.process([(0.0, prediction("p1", "E1", 1, 1), EVENT)])
+        # A re-prediction of the event, and another event in the same region
+        second = await matcher.process([
+            (0.0, prediction("p2", "E1", 2, 2), EVENT),
+            (0.0, prediction("p3", "E2", 2, 2), EVENT)
+        ])
+        return matcher, first, second
+    
+    matcher, first, second = run(scenario())
+    assert [(n["id"], n["userId"], n["alertId"], n["eventId"]) for n in first] == [("p1:1", "user-1", 1, "E1")]
+    assert first[0]["type"] == "alert_match"
+    assert first[0]["message"].startswith("Ridge Fire: the 24-hour predicted perimeter")
+    assert [n["id"] for n in second] == ["p3:1"]
+    assert list(matcher.publisher.notifications) == first + second
+    assert matcher.counters["matched"] == 3
+    assert matcher.counters["suppressed"] == 1
+    assert matcher.counters["published"] == 2
+
+def test_matcher_renotifies_after_renotify_seconds():
+    async def scenario():
+        matcher = make_matcher(renotify_seconds=0)
+        await matcher.refresh(full=True)
+        first = await matcher.process([(0.0, prediction("p1", "E1", 1, 1), EVENT)])
+        second = await matcher.process([(0.0, prediction("p2", "E1", 1, 1), EVENT)])
+        return matcher, first, second
+    
+    matcher, first, second = run(scenario())
+    assert [n["id"] for n in first + second] == ["p1:1", "p2:1"]
+    assert matcher.counters["suppressed"] == 0
+
+def test_failed_publish_does_not_suppress_the_next_prediction():
+    class FailingPublisher(MemoryNotificationPublisher):
+        failures = 1
+        
+        async def publish(self, notifications):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("redis down")
+            await super().publish(notifications)
+    
+    async def scenario():
+        matcher = make_matcher()
+        matcher.publisher = FailingPublisher()
+        await matcher.refresh(full=True)
+        first = await matcher.process([(0.0, prediction("p1", "E1", 1, 1), EVENT)])
+        second = await matcher.process([(0.0, prediction("p2", "E1", 1, 1), EVENT)])
+        return matcher, first, second
+    
+    matcher, first, second = run(scenario())
+    assert first == []
+    assert [n["id"] for n in second] == ["p2:1"]
+    assert matcher.counters["publish_errors"] == 1
+
+def test_refreshes_pick_up_new_and_removed_alerts():
+    async def scenario():
+        matcher = make_matcher(renotify_seconds=0)
+        await matcher.refresh(full=True)
+        matcher.source.add([{"id": 3, "user_id": "user-3", "region": shapely.box(0, 0, 10, 10)}])
+        await matcher.refresh()
+        added = await matcher.process([(0.0, prediction("p1", "E1", 1, 1), EVENT)])
+        # Deletions only show up on a full refresh
+        matcher.source.remove([1])
+        await matcher.refresh()
+        kept = await matcher.process([(0.0, prediction("p2", "E1", 1, 1), EVENT)])
+        await matcher.refresh(full=True)
+        removed = await matcher.process([(0.0, prediction("p3", "E1", 1, 1), EVENT)])
+        return matcher, added, kept, removed
+    
+    matcher, added, kept, removed = run(scenario())
+    assert sorted(n["alertId"] for n in added) == [1, 3]
+    assert sorted(n["alertId"] for n in kept) == [1, 3]
+    assert [n["alertId"] for n in removed] == [3]
+    assert matcher.last_id == 3
@@ -0,0 +1,63 @@
+"""
+Geodesic areas of geo_utils against known values: GeographicLib areas of
+1° cells, and pyproj.Geod (GeographicLib underneath) for fire perimeters.
+"""
+import numpy as np
+import pytest
+
+from inference_service.utils.geo_utils import (
+    calculate_affected_area,
+    calculate_affected_areas,
+    create_fire_spread_polygon,
+    create_fire_spread_polygons
+)
+
+def cell(lon: float, lat: float) -> dict:
+    ring = [[lon, lat], [lon + 1, lat], [lon + 1, lat + 1], [lon, lat + 1], [lon, lat]]
+    return {"type": "Polygon", "coordinates": [[[(x + 180) % 360 - 180, y] for x, y in ring]]}
+
+# (polygon, GeographicLib area in km²)
+REFERENCE_AREAS = {
+    "1x1 deg cell at equator": (cell(0, 0), 12308.778),
+    "1x1 deg cell across antimeridian": (cell(179.5, 0), 12308.778),
+    "1x1 deg cell at 60N": (cell(0, 60), 6122.943),
+}
+
+@pytest.mark.parametrize("name", list(REFERENCE_AREAS))
+def test_reference_areas(name):
+    geojson, reference = REFERENCE_AREAS[name]
+    assert calculate_affected_area(geojson) == pytest.approx(reference, rel=1e-4)
+
+def test_area_ignores_orientation_and_subtracts_holes():
+    outer = cell(10, 10)["coordinates"][0]
+    hole = [[10.25, 10.25], [10.25, 10.75], [10.75, 10.75], [10.75, 10.25], [10.25, 10.25]]
+    outer_area = calculate_affected_area({"type": "Polygon", "coordinates": [outer]})
+    assert calculate_affected_area({"type": "Polygon", "coordinates": [outer[::-1]]}) == pytest.approx(outer_area)
+    hole_area = calculate_affected_area({"type": "Polygon", "coordinates": [hole]})
+    assert calculate_affected_area({"type": "Polygon", "coordinates": [outer, hole]}) == pytest.approx(outer_area - hole_area)
+
+@pytest.mark.parametrize("lat", [0, 40, 70])
+def test_fire_ellipse_matches_pyproj(lat):
+    pyproj = pytest.importorskip("pyproj")
+    geojson = create_fire_spread_polygon(-120, lat, 30, 45, 24)
+    coords = np.array(geojson["coordinates"][0])
+    reference = abs(pyproj.Geod(ellps="WGS84").polygon_area_perimeter(coords[:, 0], coords[:, 1])[0]) / 1e6
+    # ~68,000 km² ellipses: larger than most fires, so held to 1e-4
+    assert calculate_affected_area(geojson) == pytest.approx(reference, rel=1e-4)
+
+def test_batch_matches_pyproj():
+    pyproj = pytest.importorskip("pyproj")
+    geod = pyproj.Geod(ellps="WGS84")
+    rng = np.random.default_rng(0)
+    n = 500
+    rings = create_fire_spread_polygons(rng.uniform(-180, 180, n), rng.uniform(-75, 75, n),
+                                        rng.uniform(1, 60, n), rng.uniform(0, 360, n), rng.integers(1, 73, n))
+    areas = calculate_affected_areas(rings)
+    reference = np.array([abs(geod.polygon_area_perimeter(ring[:, 0], ring[:, 1])[0]) / 1e6 for ring in rings])
+    error = np.abs(areas - reference) / reference
+    # Straight edges in the equal-area projection drift from geodesics as rings grow
+    assert error[reference < 1e4].max() < 1e-5
+    assert error.max() < 2e-3
+    
+    for ring, area in zip(rings[:20], areas[:20]):
+        assert calculate_affected_area({"type": "Polygon", "coordinates": [ring.tolist()]}) == pytest.approx(area)
@@ -0,0 +1,173 @@
+"""
+JobQueue on the in-process backend: priority order, retries with backoff,
+timeouts, delayed jobs and jobs reclaimed after their worker died.
+"""
+import asyncio
+import time
+
+from inference_service.config import settings
+from inference_service.services import job_queue
+from inference_service.services.job_queue import (
+    FAILED, RETRYING, RUNNING, SUCCEEDED, JobQueue, MemoryJobBackend
+)
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+async def finished(queue: JobQueue, job_id: str) -> dict:
+    while True:
+        job = await queue.get(job_id)
+        if job["status"] in (SUCCEEDED, FAILED):
+            return job
+        await asyncio.sleep(0.005)
+
+def make_queue(**options) -> JobQueue:
+    options = {"concurrency": 1, "retry_backoff": 0.01, "poll_interval": 0.05, **options}
+    return JobQueue(MemoryJobBackend(), **options)
+
+def test_higher_priority_runs_first_then_submission_order():
+    async def scenario():
+        queue = make_queue()
+        ran = []
+        
+        async def handler(job):
+            ran.append(job["payload"]["name"])
+        
+        queue.register("test", handler)
+        jobs = [
+            await queue.submit("test", {"name": name}, priority=priority)
+            for name, priority in [("low", 0), ("high-1", 5), ("medium", 2), ("high-2", 5), ("urgent", 9)]
+        ]
+        await queue.start()
+        try:
+            for job in jobs:
+                await finished(queue, job["id"])
+        finally:
+            await queue.close()
+        return ran
+    
+    assert run(scenario()) == ["urgent", "high-1", "high-2", "medium", "low"]
+
+def test_failing_job_is_retried_then_fails():
+    async def scenario():
+        queue = make_queue(max_attempts=3)
+        attempts = []
+        
+        async def handler(job):
+            attempts.append(time.monotonic())
+            raise RuntimeError("upstream down")
+        
+        queue.register("test", handler)
+        job = await queue.submit("test", {})
+        await queue.start()
+        try:
+            job = await finished(queue, job["id"])
+        finally:
+            await queue.close()
+        return queue, job, attempts
+    
+    queue, job, attempts = run(scenario())
+    assert job["status"] == FAILED
+    assert job["attempts"] == 3
+    assert job["error"] == "RuntimeError: upstream down"
+    assert queue.counters["retried"] == 2 and queue.counters["failed"] == 1
+    # Exponential backoff: 0.01s, then 0.02s
+    assert attempts[1] - attempts[0] >= 0.01
+    assert attempts[2] - attempts[1] >= 0.02
+
+def test_retry_succeeds():
+    async def scenario():
+        queue = make_queue(max_attempts=3)
+        
+        async def handler(job):
+            if job["attempts"] == 1:
+                raise RuntimeError("flaky")
+        
+        queue.register("test", handler)
+        job = await queue.submit("test", {})
+        await queue.start()
+        try:
+            return await finished(queue, job["id"])
+        finally:
+            await queue.close()
+    
+    job = run(scenario())
+    assert job["status"] == SUCCEEDED
+    assert job["attempts"] == 2
+    assert job["error"] is None
+
+def test_attempt_over_timeout_fails():
+    async def scenario():
+        queue = make_queue(max_attempts=1, timeout=0.05)
+        
+        async def handler(job):
+            await asyncio.sleep(5)
+        
+        queue.register("test", handler)
+        job = await queue.submit("test", {})
+        await queue.start()
+        try:
+            return await finished(queue, job["id"])
+        finally:
+            await queue.close()
+    
+    job = run(scenario())
+    assert job["status"] == FAILED
+    assert job["error"] == "TimeoutError"
+    assert job["run_seconds"] < 1
+
+def test_delayed_job_is_claimed_once_due():
+    async def scenario():
+        backend = MemoryJobBackend()
+        await backend.push({"id": "later", "priority": 0, "status": RETRYING}, delay=0.1)
+        early = await backend.pop(0.01)
+        depth = await backend.depth()
+        start = time.monotonic()
+        job = await backend.pop(1.0)
+        return early, depth, job, time.monotonic() - start
+    
+    early, depth, job, waited = run(scenario())
+    assert early is None
+    assert depth == 1
+    assert job["id"] == "later"
+    assert waited < 0.5
+
+def test_reclaimed_job_counts_the_lost_attempt():
+    async def scenario():
+        queue = make_queue(max_attempts=2)
+        ran = []
+        
+        async def handler(job):
+            ran.append(job["id"])
+        
+        queue.register("test", handler)
+        # As the backend hands back jobs whose worker died mid-attempt
+        for job_id, attempts in [("lost", 2), ("retried", 1)]:
+            await queue.backend.push({
+                "id": job_id, "kind": "test", "priority": 0, "payload": {}, "status": RUNNING,
+                "attempts": attempts, "enqueued_at": time.time(), "error": None
+            })
+        await queue.start()
+        try:
+            return await finished(queue, "lost"), await finished(queue, "retried"), ran
+        finally:
+            await queue.close()
+    
+    lost, retried, ran = run(scenario())
+    assert lost["status"] == FAILED and lost["error"] == "LeaseExpired"
+    assert retried["status"] == SUCCEEDED and retried["attempts"] == 2
+    assert ran == ["retried"]
+
+def test_redis_lease_is_raised_above_the_job_timeout(monkeypatch):
+    class RecordingBackend(MemoryJobBackend):
+        def __init__(self, redis_url, ttl_seconds, lease_seconds):
+            super().__init__()
+            self.lease_seconds = lease_seconds
+    
+    monkeypatch.setattr(job_queue, "RedisJobBackend", RecordingBackend)
+    monkeypatch.setattr(settings, "JOB_QUEUE_BACKEND", "redis")
+    monkeypatch.setattr(settings, "JOB_TIMEOUT_SECONDS", 120.0)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 60.0)
+    assert job_queue.create_job_queue().backend.lease_seconds == 120.0 + job_queue.LEASE_GRACE_SECONDS
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 600.0)
+    assert job_queue.create_job_queue().backend.lease_seconds == 600.0
@@ -0,0 +1,224 @@
+"""
+Vector tile encoding checked by decoding it again with a minimal protobuf
+reader written from the MVT 2.1 spec: command streams (cursor carried across
+a feature's parts, reset between features), polygon winding, dropped
+collapsed parts and the layer's keys, values and tags.
+"""
+import struct
+
+import pytest
+import shapely
+
+from inference_service.utils.mvt import (
+    CLOSE_PATH, LINE_TO, LINESTRING, MOVE_TO, POINT, POLYGON, _packed_varints, encode_geometries, encode_layer
+)
+
+def read_varint(data: bytes, i: int):
+    shift = value = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, i
+        shift += 7
+
+def decode_packed(data: bytes):
+    """
+    A packed repeated varint field.
+    """
+    values, i = [], 0
+    while i < len(data):
+        value, i = read_varint(data, i)
+        values.append(value)
+    return values
+
+def read_fields(data: bytes):
+    """
+    (field number, value) pairs of a protobuf message.
+    """
+    i = 0
+    while i < len(data):
+        key, i = read_varint(data, i)
+        number, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, i = read_varint(data, i)
+        elif wire_type == 1:
+            value = struct.unpack("<d", data[i:i + 8])[0]
+            i += 8
+        elif wire_type == 2:
+            length, i = read_varint(data, i)
+            value = data[i:i + length]
+            i += length
+        else:
+            raise AssertionError(f"unexpected wire type {wire_type}")
+        yield number, value
+
+def unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+def decode_commands(packed: bytes):
+    """
+    A feature's parts as lists of absolute (x, y); closed rings repeat their first vertex.
+    """
+    integers = decode_packed(packed)
+    parts, x, y, i = [], 0, 0, 0
+    while i < len(integers):
+        command, count = integers[i] & 0x7, integers[i] >> 3
+        i += 1
+        if command == CLOSE_PATH:
+            assert count == 1
+            parts[-1].append(parts[-1][0])
+            continue
+        assert command in (MOVE_TO, LINE_TO)
+        for _ in range(count):
+            x += unzigzag(integers[i])
+            y += unzigzag(integers[i + 1])
+            i += 2
+            if command == MOVE_TO:
+                parts.append([(x, y)])
+            else:
+                parts[-1].append((x, y))
+    return parts
+
+def ring_area(ring) -> float:
+    """
+    Surveyor's formula in tile coordinates (y down): exteriors positive, holes negative.
+    """
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:])) / 2
+
+def decode(geometry):
+    geometry_type, packed = encode_geometries([geometry])[0]
+    return geometry_type, decode_commands(packed)
+
+def test_polygon_with_hole_is_rewound():
+    # Both rings wound the wrong way for MVT
+    exterior = [(0, 0), (0, 100), (100, 100), (100, 0)]
+    hole = [(20, 20), (40, 20), (40, 40), (20, 40)]
+    assert shapely.Polygon(exterior).exterior.is_ccw is False
+    geometry_type, rings = decode(shapely.Polygon(exterior, [hole]))
+    
+    assert geometry_type == POLYGON
+    assert len(rings) == 2
+    assert ring_area(rings[0]) == 10000 and ring_area(rings[1]) == -400
+    assert set(rings[0]) == set(exterior) and set(rings[1]) == set(hole)
+    # Closing vertex comes from ClosePath, not repeated in the stream
+    assert all(len(ring) == 5 for ring in rings)
+
+def test_correctly_wound_polygon_keeps_its_order():
+    exterior = [(10, 10), (90, 10), (90, 90), (10, 90)]
+    _, rings = decode(shapely.Polygon(exterior))
+    assert rings == [exterior + [exterior[0]]]
+
+def test_multipolygon_cursor_carries_over_between_parts():
+    first = shapely.box(0, 0, 10, 10)
+    second = shapely.box(1000, 2000, 1010, 2020)
+    geometry_type, rings = decode(shapely.MultiPolygon([first, second]))
+    
+    assert geometry_type == POLYGON
+    assert len(rings) == 2
+    assert set(rings[0]) == {(0, 0), (10, 0), (10, 10), (0, 10)}
+    assert set(rings[1]) == {(1000, 2000), (1010, 2000), (1010, 2020), (1000, 2020)}
+    assert all(ring_area(ring) > 0 for ring in rings)
+
+def test_cursor_resets_between_features():
+    encoded = encode_geometries([shapely.box(500, 500, 510, 510), shapely.box(20, 30, 40, 50)])
+    assert set(decode_commands(encoded[1][1])[0]) == {(20, 30), (40, 30), (40, 50), (20, 50)}
+
+def test_collapsed_rings_are_dropped():
+    # A hole and a part that round to nothing, and a polygon that does entirely
+    with_tiny_hole = shapely.Polygon([(0, 0), (0, 50), (50, 50), (50, 0)], [[(10.1, 10.1), (10.2, 10.1), (10.2, 10.2)]])
+    tiny = shapely.box(5.1, 5.1, 5.3, 5.3)
+    encoded = encode_geometries([
+        with_tiny_hole,
+        shapely.MultiPolygon([shapely.box(100, 100, 200, 200), tiny]),
+        tiny,
+        shapely.Polygon([(0, 0), (10, 0), (20, 0)])
+    ])
+    
+    assert len(decode_commands(encoded[0][1])) == 1
+    assert [set(ring) for ring in decode_commands(encoded[1][1])] == [{(100, 100), (200, 100), (200, 200), (100, 200)}]
+    assert encoded[2] is None
+    assert encoded[3] is None
+
+def test_collapsed_exterior_takes_its_holes():
+    # A bowtie exterior has zero area, though its hole does not
+    bowtie = shapely.Polygon([(0, 0), (100, 100), (100, 0), (0, 100)], [[(40, 45), (60, 45), (60, 55), (40, 55)]])
+    encoded = encode_geometries([shapely.MultiPolygon([bowtie, shapely.box(0, 110, 20, 130)])])
+    rings = decode_commands(encoded[0][1])
+    assert len(rings) == 1
+    assert ring_area(rings[0]) == 400
+
+def test_points():
+    geometry_type, points = decode(shapely.Point(10.4, 20.6))
+    assert geometry_type == POINT
+    assert points == [[(10, 21)]]
+    
+    geometry_type, points = decode(shapely.MultiPoint([(5, 5), (3, 9), (-4, 100)]))
+    assert geometry_type == POINT
+    assert points == [[(5, 5)], [(3, 9)], [(-4, 100)]]
+    # One MoveTo with a count of three
+    _, packed = encode_geometries([shapely.MultiPoint([(5, 5), (3, 9), (-4, 100)])])[0]
+    assert read_varint(packed, 0)[0] == MOVE_TO | 3 << 3
+
+def test_lines():
+    geometry_type, lines = decode(shapely.LineString([(0, 0), (10, 0), (10, 0.2), (10, -20)]))
+    assert geometry_type == LINESTRING
+    # The repeated vertex after rounding is dropped
+    assert lines == [[(0, 0), (10, 0), (10, -20)]]
+    
+    geometry_type, lines = decode(shapely.MultiLineString([[(0, 0), (5, 5)], [(100, 100), (90, 120)]]))
+    assert geometry_type == LINESTRING
+    assert lines == [[(0, 0), (5, 5)], [(100, 100), (90, 120)]]
+    
+    assert encode_geometries([shapely.LineString([(1, 1), (1.2, 1.1)])]) == [None]
+
+def test_collection_keeps_its_highest_dimension():
+    collection = shapely.GeometryCollection([shapely.Point(1, 1), shapely.LineString([(0, 0), (5, 0)]), shapely.box(0, 0, 4, 4)])
+    geometry_type, rings = decode(collection)
+    assert geometry_type == POLYGON
+    assert len(rings) == 1
+
+def test_empty_geometries_encode_to_none():
+    assert encode_geometries([shapely.Polygon(), shapely.Point()]) == [None, None]
+
+def test_layer_keys_values_and_tags():
+    geometries = encode_geometries([shapely.Point(1, 2), shapely.box(0, 0, 10, 10)])
+    features = [
+        (geometries[0], {"event_id": "EONET_1", "severity": None, "count": -3, "area": 1.5, "active": True}),
+        (geometries[1], {"event_id": "EONET_2", "count": -3})
+    ]
+    (number, layer), = read_fields(encode_layer("predictions", features, extent=4096))
+    assert number == 3
+    
+    fields = list(read_fields(layer))
+    scalars = {number: value for number, value in fields if number in (1, 5, 15)}
+    assert scalars == {15: 2, 1: b"predictions", 5: 4096}
+    keys = [value.decode() for number, value in fields if number == 3]
+    values = []
+    for number, value in fields:
+        if number == 4:
+            (kind, raw), = read_fields(value)
+            values.append({1: lambda v: v.decode(), 3: lambda v: v, 6: unzigzag, 7: bool}[kind](raw))
+    
+    decoded = []
+    for number, feature in fields:
+        if number != 2:
+            continue
+        parts = dict(read_fields(feature))
+        tags = decode_packed(parts[2])
+        properties = {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])}
+        decoded.append((parts[3], decode_commands(parts[4]), properties))
+    
+    assert decoded[0] == (POINT, [[(1, 2)]], {"event_id": "EONET_1", "count": -3, "area": 1.5, "active": True})
+    assert decoded[1][0] == POLYGON
+    assert decoded[1][2] == {"event_id": "EONET_2", "count": -3}
+    # Repeated values are stored once
+    assert values.count(-3) == 1
+
+def test_empty_layer_encodes_to_nothing():
+    assert encode_layer("predictions", []) == b""
+
+@pytest.mark.parametrize("value", [0, 127, 128, 16383, 16384, 2 ** 21, 2 ** 28, 2 ** 32 - 1])
+def test_varint_boundaries(value):
+    assert decode_packed(_packed_varints([value, 1])) == [value, 1]
@@ -0,0 +1,57 @@
+"""
+InMemoryPredictionStore: the event index stays consistent with the stored
+predictions through re-adds and eviction, and time windows select by UTC.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from inference_service.services.prediction_store import InMemoryPredictionStore
+
+START = datetime(2026, 8, 1, tzinfo=timezone.utc)
+
+def prediction(prediction_id: str, minutes: int, event_id: str = "e") -> dict:
+    return {"prediction_id": prediction_id, "event_id": event_id, "generated_at": START + timedelta(minutes=minutes)}
+
+def ids(predictions) -> list:
+    return [p["prediction_id"] for p in predictions]
+
+def test_readded_id_keeps_the_first_copy():
+    async def scenario():
+        store = InMemoryPredictionStore(max_predictions=10)
+        first = prediction("a", 0)
+        await store.add(first)
+        await store.add(prediction("a", 5))
+        return store, first, await store.get("a"), await store.list_for_event("e")
+    
+    store, first, stored, listed = asyncio.run(scenario())
+    assert stored is first
+    assert ids(listed) == ["a"]
+    assert store.event_ids["e"] == ["a"]
+
+def test_readded_id_survives_eviction():
+    async def scenario():
+        store = InMemoryPredictionStore(max_predictions=2)
+        await store.add(prediction("a", 0))
+        await store.add(prediction("a", 1))
+        await store.add(prediction("b", 2))
+        await store.add(prediction("c", 3))
+        return store, await store.list_for_event("e")
+    
+    store, listed = asyncio.run(scenario())
+    assert ids(listed) == ["c", "b"]
+    assert len(store.event_times["e"]) == 2
+
+def test_window_and_paging_newest_first():
+    async def scenario():
+        store = InMemoryPredictionStore()
+        await store.add_many([prediction(str(minute), minute) for minute in range(10)])
+        await store.add(prediction("other", 4, event_id="f"))
+        window = await store.list_for_event(
+            "e", since=START + timedelta(minutes=2), until=START + timedelta(minutes=7)
+        )
+        page = await store.list_for_event("e", limit=3, offset=2)
+        return window, page
+    
+    window, page = asyncio.run(scenario())
+    assert ids(window) == ["7", "6", "5", "4", "3", "2"]
+    assert ids(page) == ["7", "6", "5"]
@@ -0,0 +1,56 @@
+"""
+RescoreScheduler decisions over in-process events: new events are re-scored
+up to the rate limit, and each held-back event is counted as deferred once.
+"""
+import asyncio
+
+from inference_service.config import settings
+from inference_service.services.rescore_scheduler import MemoryActiveEventSource, RescoreScheduler
+
+class RecordingService:
+    def __init__(self):
+        self.event_ids = []
+    
+    async def predict_wildfire_batch(self, requests, events):
+        self.event_ids.extend(event["id"] for event in events)
+        return []
+
+def wildfire(index: int, severity: str = "low") -> dict:
+    return {"id": f"FIRE_{index}", "category": "wildfires", "severity": severity, "updated": "v1",
+            "geometry": {"type": "Point", "coordinates": [-120.0 + index, 38.0]}}
+
+def test_held_back_events_are_deferred_once(monkeypatch):
+    monkeypatch.setattr(settings, "OPENWEATHER_API_KEY", "")
+    
+    async def scenario():
+        source = MemoryActiveEventSource()
+        for index in range(5):
+            source.upsert(wildfire(index, "critical" if index == 3 else "low"))
+        service = RecordingService()
+        scheduler = RescoreScheduler(source, service, max_per_minute=2)
+        passes = [await scheduler.run_once() for _ in range(3)]
+        return scheduler, service, passes
+    
+    scheduler, service, passes = asyncio.run(scenario())
+    assert [(p["performed"], p["deferred"], p["queued"]) for p in passes] == [(2, 3, 3), (0, 0, 3), (0, 0, 3)]
+    assert scheduler.stats()["deferred"] == 3
+    # Highest severity first
+    assert service.event_ids[0] == "FIRE_3"
+
+def test_unchanged_events_are_skipped(monkeypatch):
+    monkeypatch.setattr(settings, "OPENWEATHER_API_KEY", "")
+    
+    async def scenario():
+        source = MemoryActiveEventSource()
+        for index in range(3):
+            source.upsert(wildfire(index))
+        scheduler = RescoreScheduler(source, RecordingService())
+        first = await scheduler.run_once()
+        source.upsert({**wildfire(1), "updated": "v2"})
+        second = await scheduler.run_once()
+        return scheduler, first, second
+    
+    scheduler, first, second = asyncio.run(scenario())
+    assert (first["performed"], first["skipped"]) == (3, 0)
+    assert (second["performed"], second["skipped"], second["deferred"]) == (1, 2, 0)
+    assert scheduler.reasons["new"] == 3 and scheduler.reasons["event"] == 1
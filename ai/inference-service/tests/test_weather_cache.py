@@ -0,0 +1,75 @@
+"""
+WeatherCache request coalescing: concurrent misses share one fetch, and a
+cancelled leader does not fail the requests waiting on it.
+"""
+import asyncio
+
+import pytest
+
+from inference_service.services.weather_cache import MemoryCacheBackend, WeatherCache
+
+def make_cache() -> WeatherCache:
+    return WeatherCache(MemoryCacheBackend(max_entries=100, ttl_seconds=600))
+
+def test_concurrent_misses_share_one_fetch():
+    async def scenario():
+        cache = make_cache()
+        calls = []
+        
+        async def fetch(lat, lon):
+            calls.append((lat, lon))
+            await asyncio.sleep(0.01)
+            return {"temperature": 21.0}
+        
+        results = await asyncio.gather(*(cache.get_or_fetch(40.01, -120.01, fetch) for _ in range(5)))
+        return cache, calls, results
+    
+    cache, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results == [{"temperature": 21.0}] * 5
+    assert cache.misses == 1 and cache.coalesced == 4
+
+def test_waiters_retry_when_the_leader_is_cancelled():
+    async def scenario():
+        cache = make_cache()
+        calls = 0
+        
+        async def fetch(lat, lon):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"temperature": 21.0}
+        
+        leader = asyncio.create_task(cache.get_or_fetch(40.01, -120.01, fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.get_or_fetch(40.01, -120.01, fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return calls, results
+    
+    calls, results = asyncio.run(scenario())
+    assert results == [{"temperature": 21.0}] * 3
+    # One waiter takes over the fetch; the others coalesce onto it
+    assert calls == 2
+
+def test_cancelled_waiter_is_cancelled():
+    async def scenario():
+        cache = make_cache()
+        
+        async def fetch(lat, lon):
+            await asyncio.sleep(0.05)
+            return {"temperature": 21.0}
+        
+        leader = asyncio.create_task(cache.get_or_fetch(40.01, -120.01, fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_fetch(40.01, -120.01, fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+    
+    assert asyncio.run(scenario()) == {"temperature": 21.0}
@@ -0,0 +1,312 @@
+import asyncio
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, Optional, List, Tuple, Callable, Iterable
+
+# Upper bounds (seconds) of latency buckets: four per decade from 10 us to 100 s
+LATENCY_BUCKETS = tuple(float(f"{10 ** (exponent / 4):.3g}") for exponent in range(-20, 9))
+
+# Quantiles estimated from the buckets and exported next to each histogram
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (stage, seconds) pairs of the current request, collected for the Server-Timing header
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families read at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+class Histogram:
+    """
+    Fixed-bucket histogram; observe() is a bisect and three additions.
+    """
+    
+    __slots__ = ("buckets", "counts", "sum", "count")
+    
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by linear interpolation inside its bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+class HistogramFamily:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.children: Dict[Tuple[str, ...], Histogram] = {}
+    
+    def labels(self, *values: str) -> Histogram:
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = Histogram(self.buckets)
+        return child
+
+class CounterFamily:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *values: str, amount: float = 1) -> None:
+        self.values[values] = self.values.get(values, 0) + amount
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format.
+    Histograms and counters are updated in place; collectors are called at
+    scrape time to export stats that other components already keep.
+    """
+    
+    def __init__(self):
+        self.histograms: List[HistogramFamily] = []
+        self.counters: List[CounterFamily] = []
+        self.collectors: List[Collector] = []
+    
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> HistogramFamily:
+        family = HistogramFamily(name, help, labelnames, buckets)
+        self.histograms.append(family)
+        return family
+    
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> CounterFamily:
+        family = CounterFamily(name, help, labelnames)
+        self.counters.append(family)
+        return family
+    
+    def register_collector(self, collector: Collector) -> None:
+        self.collectors.append(collector)
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        
+        for family in self.histograms:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} histogram")
+            for values, histogram in family.children.items():
+                labels = dict(zip(family.labelnames, values))
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{family.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+                lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{family.name}_count{_format_labels(labels)} {histogram.count}")
+            
+            quantile_name = f"{family.name}_quantile"
+            lines.append(f"# HELP {quantile_name} {family.help} (quantiles estimated from the buckets)")
+            lines.append(f"# TYPE {quantile_name} gauge")
+            for values, histogram in family.children.items():
+                labels = dict(zip(family.labelnames, values))
+                for q in QUANTILES:
+                    lines.append(f"{quantile_name}{_format_labels({**labels, 'quantile': q})} {_format_value(histogram.quantile(q))}")
+        
+        for family in self.counters:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} counter")
+            for values, value in family.values.items():
+                lines.append(f"{family.name}{_format_labels(dict(zip(family.labelnames, values)))} {_format_value(value)}")
+        
+        for collector in self.collectors:
+            try:
+                for name, metric_type, help, samples in collector():
+                    lines.append(f"# HELP {name} {help}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    for labels, value in samples:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "terrapulse_stage_duration_seconds", "Time spent in each prediction stage", ("stage",)
+)
+REQUEST_SECONDS = metrics.histogram(
+    "terrapulse_http_request_duration_seconds", "HTTP request latency until the response starts", ("method", "route", "status")
+)
+EVENT_LOOP_LAG_SECONDS = metrics.histogram(
+    "terrapulse_event_loop_lag_seconds", "Delay of event loop wake-ups past their scheduled time"
+)
+UPSTREAM_ERRORS = metrics.counter(
+    "terrapulse_upstream_errors_total", "Failed calls to upstream data providers", ("source",)
+)
+ENRICHMENT_RESULTS = metrics.counter(
+    "terrapulse_enrichment_results_total", "Outcome of each enrichment source per prediction", ("source", "status")
+)
+STREAM_FIRST_PERIMETER_SECONDS = metrics.histogram(
+    "terrapulse_stream_first_perimeter_seconds", "Time from a streaming prediction's start to its first hourly perimeter", ("model",)
+)
+STREAM_SECONDS = metrics.histogram(
+    "terrapulse_stream_duration_seconds", "Duration of streaming predictions, including time blocked on the client", ("model", "status")
+)
+STREAMS_REJECTED = metrics.counter(
+    "terrapulse_streams_rejected_total", "Streaming predictions turned away because the model's stream slots were taken", ("model",)
+)
+
+class StageTimer:
+    """
+    Times a stage into STAGE_SECONDS, and into the request's Server-Timing
+    header when one is being collected. Use as a context manager or decorator
+    (sync or async):
+        
+        with timed("model_predict"): ...
+        
+        @timed("fetch_event")
+        async def fetch_event_data(...): ...
+    """
+    
+    __slots__ = ("stage", "histogram", "start")
+    
+    def __init__(self, stage: str, histogram: Optional[Histogram] = None):
+        self.stage = stage
+        self.histogram = histogram or STAGE_SECONDS.labels(stage)
+        self.start = 0.0
+    
+    def __enter__(self) -> "StageTimer":
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.histogram.observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.stage, elapsed))
+    
+    def __call__(self, fn: Callable) -> Callable:
+        # A fresh timer per call, so concurrent calls don't share a start time
+        stage, histogram = self.stage, self.histogram
+        
+        if asyncio.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with StageTimer(stage, histogram):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+        
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with StageTimer(stage, histogram):
+                return fn(*args, **kwargs)
+        return wrapper
+
+def timed(stage: str) -> StageTimer:
+    return StageTimer(stage)
+
+class EventLoopLagMonitor:
+    """
+    Samples event loop lag: how late a sleep wakes up past its deadline.
+    Sustained lag means CPU-bound work is running on the loop.
+    """
+    
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.task = None
+        self.last_lag = 0.0
+    
+    async def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._sample())
+    
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            self.task = None
+    
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        histogram = EVENT_LOOP_LAG_SECONDS.labels()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - scheduled)
+            histogram.observe(self.last_lag)
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware recording request latency per route, and optionally adding
+    a Server-Timing header with the request's stage timings (summed per stage).
+    """
+    
+    def __init__(self, app, header: bool = False):
+        self.app = app
+        self.header = header
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timings: Optional[List[Tuple[str, float]]] = [] if self.header else None
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                route = scope.get("route")
+                REQUEST_SECONDS.labels(
+                    scope["method"], getattr(route, "path", "unmatched"), str(message["status"])
+                ).observe(total)
+                if timings is not None:
+                    message = {
+                        **message,
+                        "headers": list(message.get("headers", [])) + [(b"server-timing", self._header_value(timings, total))]
+                    }
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+    
+    @staticmethod
+    def _header_value(timings: List[Tuple[str, float]], total: float) -> bytes:
+        stages: Dict[str, List[float]] = {}
+        for stage, seconds in timings:
+            stages.setdefault(stage, []).append(seconds)
+        entries = [
+            f'{stage};dur={sum(durations) * 1000:.3f}' + (f';desc="{len(durations)} calls"' if len(durations) > 1 else "")
+            for stage, durations in stages.items()
+        ]
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries).encode("latin-1")
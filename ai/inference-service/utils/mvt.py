@@ -0,0 +1,310 @@
+import math
+import struct
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+import numpy as np
+import shapely
+
+# Mapbox Vector Tile 2.1 encoding (https://github.com/mapbox/vector-tile-spec)
+# in Web Mercator (EPSG:3857) tiles addressed by XYZ z/x/y
+EXTENT = 4096
+EARTH_RADIUS_M = 6378137.0
+ORIGIN_SHIFT_M = math.pi * EARTH_RADIUS_M
+MAX_LATITUDE = 85.0511287798066
+
+# Geometry types and commands
+POINT, LINESTRING, POLYGON = 1, 2, 3
+MOVE_TO, LINE_TO, CLOSE_PATH = 1, 2, 7
+
+BBox = Tuple[float, float, float, float]  # (min lon, min lat, max lon, max lat)
+TileGeometry = Tuple[int, bytes]  # (geometry type, packed command integers)
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= 30 and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+def tile_bounds(z: int, x: int, y: int) -> BBox:
+    """
+    (min x, min y, max x, max y) of a tile in Web Mercator meters.
+    """
+    size = 2 * ORIGIN_SHIFT_M / 2 ** z
+    min_x = -ORIGIN_SHIFT_M + x * size
+    max_y = ORIGIN_SHIFT_M - y * size
+    return min_x, max_y - size, min_x + size, max_y
+
+def mercator(lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lats = np.clip(lats, -MAX_LATITUDE, MAX_LATITUDE)
+    return np.radians(lons) * EARTH_RADIUS_M, np.log(np.tan(np.pi / 4 + np.radians(lats) / 2)) * EARTH_RADIUS_M
+
+def to_mercator(geometry: shapely.Geometry) -> shapely.Geometry:
+    """
+    Project a lon/lat geometry to Web Mercator.
+    """
+    return shapely.transform(geometry, lambda coords: np.column_stack(mercator(coords[:, 0], coords[:, 1])))
+
+def tile_range(bbox: BBox, z: int, margin: int = 0, buffer: float = 0.0) -> Tuple[int, int, int, int]:
+    """
+    Inclusive (min x, min y, max x, max y) of the zoom z tiles a lon/lat box
+    touches, widened by `margin` whole tiles and by `buffer` (a fraction of a
+    tile) for features drawn into neighbouring tiles' buffers.
+    """
+    n = 2 ** z
+    
+    def column(lon: float, offset: float) -> int:
+        return int(math.floor((lon + 180) / 360 * n + offset))
+    
+    def row(lat: float, offset: float) -> int:
+        lat = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, lat)))
+        return int(math.floor((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n + offset))
+    
+    lon_min, lat_min, lon_max, lat_max = bbox
+    return (
+        max(0, column(lon_min, -buffer) - margin),
+        max(0, row(lat_max, -buffer) - margin),
+        min(n - 1, column(lon_max, buffer) + margin),
+        min(n - 1, row(lat_min, buffer) + margin)
+    )
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+def _command(command: int, count: int) -> int:
+    return (command & 0x7) | (count << 3)
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _varint_lengths(values: np.ndarray) -> np.ndarray:
+    return 1 + sum((values >= np.uint64(1 << shift)).astype(np.int64) for shift in (7, 14, 21, 28))
+
+def _packed_varints(values: np.ndarray) -> bytes:
+    """
+    Varint-encode an array of unsigned 32-bit values in one vectorized pass.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = _varint_lengths(values)
+    shifts = np.arange(5, dtype=np.uint64) * np.uint64(7)
+    groups = (values[:, None] >> shifts[None, :]) & np.uint64(0x7F)
+    position = np.arange(5)[None, :]
+    groups |= (position < lengths[:, None] - 1).astype(np.uint64) << np.uint64(7)
+    return groups[position < lengths[:, None]].astype(np.uint8).tobytes()
+
+def _field(number: int, payload: bytes) -> bytes:
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+def _field_varint(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+def _zigzag_deltas(vertices: np.ndarray, feature_of: np.ndarray) -> np.ndarray:
+    # The cursor starts at (0, 0) in each feature and carries over between its parts
+    deltas = np.diff(vertices, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    first = np.ones(len(vertices), dtype=bool)
+    first[1:] = feature_of[1:] != feature_of[:-1]
+    deltas[first] = vertices[first]
+    return _zigzag(deltas)
+
+def _split_streams(encoded: List[Optional[TileGeometry]],
+                   geometry_type: int,
+                   features: np.ndarray,
+                   lengths: np.ndarray,
+                   stream: np.ndarray) -> None:
+    """
+    Varint-pack a concatenated command stream and slice out each feature's
+    bytes (features in stream order, `lengths` integers each).
+    """
+    packed = _packed_varints(stream)
+    byte_lengths = np.bincount(np.repeat(np.arange(len(features)), lengths), weights=_varint_lengths(stream),
+                               minlength=len(features)).astype(np.int64)
+    ends = np.cumsum(byte_lengths)
+    starts = ends - byte_lengths
+    for feature, start, end in zip(features.tolist(), starts.tolist(), ends.tolist()):
+        encoded[feature] = (geometry_type, packed[start:end])
+
+def _encode_points(encoded: List[Optional[TileGeometry]], parts: np.ndarray, owner: np.ndarray) -> None:
+    vertices = np.rint(shapely.get_coordinates(parts)).astype(np.int64)
+    features, first, counts = np.unique(owner, return_index=True, return_counts=True)
+    lengths = 1 + 2 * counts
+    offsets = np.cumsum(lengths) - lengths
+    rank = np.arange(len(owner)) - np.repeat(first, counts)
+    positions = np.repeat(offsets, counts) + 1 + 2 * rank
+    
+    stream = np.empty(int(lengths.sum()), dtype=np.uint64)
+    stream[offsets] = MOVE_TO | (counts.astype(np.uint64) << np.uint64(3))
+    deltas = _zigzag_deltas(vertices, owner)
+    stream[positions] = deltas[:, 0]
+    stream[positions + 1] = deltas[:, 1]
+    _split_streams(encoded, POINT, features, lengths, stream)
+
+def _encode_paths(encoded: List[Optional[TileGeometry]],
+                  geometry_type: int,
+                  parts: np.ndarray,
+                  owner: np.ndarray) -> None:
+    """
+    Encode line or polygon parts. Runs are the lines or the polygon rings
+    (exterior first); each becomes MoveTo, LineTo(n - 1) and, for rings, ClosePath.
+    """
+    if geometry_type == POLYGON:
+        runs, polygon_of = shapely.get_rings(parts, return_index=True)
+        exterior = np.ones(len(runs), dtype=bool)
+        exterior[1:] = polygon_of[1:] != polygon_of[:-1]
+        run_owner = owner[polygon_of]
+    else:
+        runs, polygon_of = parts, np.arange(len(parts))
+        exterior = np.ones(len(runs), dtype=bool)
+        run_owner = owner
+    closed = geometry_type == POLYGON
+    
+    coordinates, run_of = shapely.get_coordinates(runs, return_index=True)
+    vertices = np.rint(coordinates).astype(np.int64)
+    # Drop each ring's closing vertex and any vertex repeating the one before it
+    same_run = run_of[1:] == run_of[:-1]
+    keep = np.ones(len(vertices), dtype=bool)
+    keep[1:] = ~(same_run & np.all(vertices[1:] == vertices[:-1], axis=1))
+    if closed:
+        keep[:-1] &= same_run
+        keep[-1] = False
+    vertices, run_of = vertices[keep], run_of[keep]
+    
+    counts = np.bincount(run_of, minlength=len(runs))
+    run_start = np.cumsum(counts) - counts
+    rank = np.arange(len(vertices)) - run_start[run_of]
+    if closed:
+        # Signed ring areas (surveyor's formula, y down): exteriors must be
+        # positive and holes negative; collapsed exteriors take their holes with them
+        following = np.where(rank == counts[run_of] - 1, run_start[run_of], np.arange(len(vertices)) + 1)
+        cross = vertices[:, 0] * vertices[following, 1] - vertices[following, 0] * vertices[:, 1]
+        area = np.bincount(run_of, weights=cross.astype(float), minlength=len(runs))
+        valid = (counts >= 3) & (area != 0)
+        polygon_valid = np.zeros(len(parts), dtype=bool)
+        polygon_valid[polygon_of[exterior]] = valid[exterior]
+        valid &= polygon_valid[polygon_of]
+        flip = np.where(exterior, area < 0, area > 0)
+        order = np.where(flip[run_of], run_start[run_of] + counts[run_of] - 1 - rank, np.arange(len(vertices)))
+        vertices = vertices[order]
+    else:
+        valid = counts >= 2
+    
+    kept = valid[run_of]
+    vertices, rank = vertices[kept], rank[kept]
+    run_index = np.cumsum(valid) - 1
+    run_of = run_index[run_of[kept]]
+    counts, run_owner = counts[valid], run_owner[valid]
+    if not len(counts):
+        return
+    
+    lengths = 2 * counts + 2 + closed
+    offsets = np.cumsum(lengths) - lengths
+    stream = np.empty(int(lengths.sum()), dtype=np.uint64)
+    stream[offsets] = _command(MOVE_TO, 1)
+    stream[offsets + 3] = LINE_TO | ((counts - 1).astype(np.uint64) << np.uint64(3))
+    if closed:
+        stream[offsets + lengths - 1] = _command(CLOSE_PATH, 1)
+    positions = offsets[run_of] + np.where(rank == 0, 1, 2 + 2 * rank)
+    deltas = _zigzag_deltas(vertices, run_owner[run_of])
+    stream[positions] = deltas[:, 0]
+    stream[positions + 1] = deltas[:, 1]
+    
+    features, first_run = np.unique(run_owner, return_index=True)
+    feature_lengths = np.add.reduceat(lengths, first_run)
+    _split_streams(encoded, geometry_type, features, feature_lengths, stream)
+
+def encode_geometries(geometries: np.ndarray) -> List[Optional[TileGeometry]]:
+    """
+    Encode geometries already in tile pixel coordinates (y down), rounding to
+    integers, all in one vectorized pass. Each becomes (geometry type, packed
+    command integers), keeping only its parts of highest dimension. Parts that
+    collapse (lines under two distinct vertices, zero-area rings) are dropped
+    and polygon rings are rewound as the spec requires (exterior rings positive
+    area, holes negative). None where nothing is left.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    encoded: List[Optional[TileGeometry]] = [None] * len(geometries)
+    parts, owner = shapely.get_parts(geometries, return_index=True)
+    present = ~shapely.is_empty(parts)
+    parts, owner = parts[present], owner[present]
+    if not len(parts):
+        return encoded
+    
+    dimensions = shapely.get_dimensions(parts)
+    highest = np.full(len(geometries), -1)
+    np.maximum.at(highest, owner, dimensions)
+    for dimension, geometry_type in ((0, POINT), (1, LINESTRING), (2, POLYGON)):
+        selected = (dimensions == dimension) & (highest[owner] == dimension)
+        if not selected.any():
+            continue
+        if geometry_type == POINT:
+            _encode_points(encoded, parts[selected], owner[selected])
+        else:
+            _encode_paths(encoded, geometry_type, parts[selected], owner[selected])
+    return encoded
+
+def tile_geometries(geometries: np.ndarray,
+                    bounds: BBox,
+                    extent: int = EXTENT,
+                    buffer: int = 64,
+                    tolerance: float = 0.0) -> List[Optional[TileGeometry]]:
+    """
+    Clip Web Mercator geometries to a tile (plus `buffer` pixels), scale them
+    to the tile's pixel grid, simplify lines and polygons by `tolerance` pixels and encode them.
+    """
+    min_x, min_y, max_x, max_y = bounds
+    scale = extent / (max_x - min_x)
+    margin = buffer / scale
+    clipped = shapely.clip_by_rect(
+        np.asarray(geometries, dtype=object), min_x - margin, min_y - margin, max_x + margin, max_y + margin
+    )
+    pixels = shapely.transform(
+        clipped, lambda coords: np.column_stack(((coords[:, 0] - min_x) * scale, (max_y - coords[:, 1]) * scale))
+    )
+    if tolerance > 0:
+        pixels = shapely.simplify(pixels, tolerance, preserve_topology=True)
+    return encode_geometries(pixels)
+
+def _encode_value(value: Any) -> bytes:
+    if isinstance(value, bool):
+        return _field_varint(7, int(value))
+    if isinstance(value, int):
+        return _field_varint(6, int(_zigzag(np.array([value]))[0]))
+    if isinstance(value, float):
+        return _varint(3 << 3 | 1) + struct.pack("<d", value)
+    return _field(1, str(value).encode())
+
+def encode_layer(name: str,
+                 features: Iterable[Tuple[TileGeometry, Dict[str, Any]]],
+                 extent: int = EXTENT) -> bytes:
+    """
+    Encode a layer of (tile geometry, properties) features; properties with
+    None values are omitted. Empty layers encode to b"".
+    """
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, Any], int] = {}
+    encoded_features = []
+    for (geometry_type, commands), properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        feature = _field(2, b"".join(map(_varint, tags))) if tags else b""
+        feature += _field_varint(3, geometry_type) + _field(4, commands)
+        encoded_features.append(_field(2, feature))
+    if not encoded_features:
+        return b""
+    
+    layer = [_field_varint(15, 2), _field(1, name.encode())]
+    layer.extend(encoded_features)
+    layer.extend(_field(3, key.encode()) for key in keys)
+    layer.extend(_field(4, _encode_value(value)) for _, value in values)
+    layer.append(_field_varint(5, extent))
+    return _field(3, b"".join(layer))
+
+def encode_tile(layers: Dict[str, List[Tuple[TileGeometry, Dict[str, Any]]]], extent: int = EXTENT) -> bytes:
+    """
+    Encode a tile from its layers; layers concatenate, so this is the join of encode_layer.
+    """
+    return b"".join(encode_layer(name, features, extent) for name, features in layers.items())
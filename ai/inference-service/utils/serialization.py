@@ -0,0 +1,150 @@
+import numpy as np
+import orjson
+from decimal import Decimal
+from shapely.geometry import shape, mapping
+from typing import Dict, Any, List, Optional, Callable
+
+# Media type that opts a client into polyline-encoded geometries
+COMPACT_MEDIA_TYPE = "application/vnd.terrapulse.compact+json"
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def encode_json(content: Any) -> bytes:
+    """
+    Serialize to JSON bytes with orjson (datetimes, UUIDs and numpy values included).
+    """
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+def _map_rings(geometry: Dict[str, Any], fn: Callable[[np.ndarray], Any]) -> Dict[str, Any]:
+    """
+    Apply fn to every coordinate sequence of a GeoJSON geometry.
+    """
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+    if coordinates is None:
+        return geometry
+    
+    if geometry_type in ("LineString", "MultiPoint"):
+        mapped = fn(np.asarray(coordinates, dtype=float))
+    elif geometry_type in ("Polygon", "MultiLineString"):
+        mapped = [fn(np.asarray(ring, dtype=float)) for ring in coordinates]
+    elif geometry_type == "MultiPolygon":
+        mapped = [[fn(np.asarray(ring, dtype=float)) for ring in polygon] for polygon in coordinates]
+    elif geometry_type == "Point":
+        mapped = fn(np.asarray([coordinates], dtype=float))[0]
+    else:
+        return geometry
+    return {**geometry, "coordinates": mapped}
+
+def round_geometry(geometry: Dict[str, Any], precision: int) -> Dict[str, Any]:
+    """
+    Round coordinates to a number of decimal places (5 is ~1 m).
+    """
+    return _map_rings(geometry, lambda ring: np.round(ring, precision).tolist())
+
+def simplify_geometry(geometry: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """
+    Topology-preserving Douglas-Peucker simplification; tolerance is in degrees.
+    """
+    if tolerance <= 0 or geometry.get("type") not in ("Polygon", "MultiPolygon", "LineString", "MultiLineString"):
+        return geometry
+    simplified = shape(geometry).simplify(tolerance, preserve_topology=True)
+    if simplified.is_empty:
+        return geometry
+    return mapping(simplified)
+
+def prepare_geometry(geometry: Optional[Dict[str, Any]], precision: int, tolerance: float = 0.0) -> Optional[Dict[str, Any]]:
+    """
+    Simplify (when tolerance > 0) and round a GeoJSON geometry for output.
+    """
+    if not geometry:
+        return geometry
+    return round_geometry(simplify_geometry(geometry, tolerance), precision)
+
+def encode_polyline(coordinates: np.ndarray, precision: int = 5) -> str:
+    """
+    Encode (lon, lat) pairs with the encoded polyline algorithm: coordinates are
+    quantized, delta-encoded, zigzagged and written as base64-like 5-bit chunks.
+    Pairs are emitted in polyline (lat, lon) order.
+    """
+    quantized = np.round(np.asarray(coordinates, dtype=float)[:, ::-1] * 10 ** precision).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = (deltas << 1) ^ (deltas >> 63)
+    
+    chars = []
+    for value in values.tolist():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """
+    Decode an encoded polyline back to [lon, lat] pairs.
+    """
+    values = []
+    value = shift = 0
+    for char in encoded:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    
+    coordinates = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return coordinates[:, ::-1].tolist()
+
+def compact_geometry(geometry: Optional[Dict[str, Any]], precision: int) -> Optional[Dict[str, Any]]:
+    """
+    Replace each coordinate sequence of a GeoJSON geometry with its encoded polyline.
+    """
+    if not geometry or geometry.get("type") == "Point":
+        return geometry
+    compact = _map_rings(geometry, lambda ring: encode_polyline(ring, precision))
+    return {**compact, "encoding": "polyline", "precision": precision}
+
+def wants_compact(accept: Optional[str]) -> bool:
+    """
+    Whether an Accept header asks for the compact encoding.
+    """
+    if not accept:
+        return False
+    return any(part.split(";")[0].strip().lower() == COMPACT_MEDIA_TYPE for part in accept.split(","))
+
+def map_perimeters(result: Dict[str, Any], fn: Callable[[Any], Any]) -> Dict[str, Any]:
+    """
+    Copy of a prediction result with fn applied to every perimeter: the
+    predicted perimeter, hourly perimeters and ensemble contours.
+    """
+    mapped = {**result, "predicted_perimeter": fn(result.get("predicted_perimeter"))}
+    if result.get("hourly_perimeters"):
+        mapped["hourly_perimeters"] = [
+            {**hour, "perimeter": fn(hour.get("perimeter"))}
+            for hour in result["hourly_perimeters"]
+        ]
+    if result.get("ensemble"):
+        mapped["ensemble"] = {
+            **result["ensemble"],
+            "burn_probability_contours": [
+                {**contour, "perimeter": fn(contour.get("perimeter"))}
+                for contour in result["ensemble"].get("burn_probability_contours", [])
+            ]
+        }
+    return mapped
+
+def compact_prediction(prediction: Dict[str, Any], precision: int) -> Dict[str, Any]:
+    """
+    Copy of a prediction with its perimeters polyline-encoded; other fields are shared.
+    """
+    result = prediction.get("result") or {}
+    compact_result = map_perimeters(result, lambda geometry: compact_geometry(geometry, precision))
+    return {**prediction, "result": compact_result}
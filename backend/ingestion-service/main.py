@@ -1,22 +1,40 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 import asyncio
-from typing import Dict, Any, List
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple, Callable
 
 from config import settings
-from .schemas.prediction import PredictionRequest, PredictionResponse, WildfirePredictionRequest
+from .schemas.prediction import PredictionRequest, PredictionResponse, WildfirePredictionRequest, WildfireBatchPredictionRequest
 from .services.prediction_service import prediction_service
+from .models.registry import model_registry
 from .services.data_fetcher import data_fetcher
+from .services.asset_index import asset_index
+from .services.event_repository import event_repository
+from .services.job_queue import PENDING_STATES, RUNNING, SUCCEEDED
+from .services.tile_service import tile_service
+from .services.alert_matcher import alert_matcher
+from .services.rescore_scheduler import rescore_scheduler
+from .utils.serialization import COMPACT_MEDIA_TYPE, compact_prediction, encode_json, wants_compact
+from .utils.metrics import metrics, timed, EventLoopLagMonitor, ServerTimingMiddleware, STREAMS_REJECTED
+from .utils.mvt import valid_tile
 
-# Mock function to fetch event data (would connect to DB in real implementation)
-async def fetch_event_data(event_id: str) -> Dict[str, Any]:
+loop_lag_monitor = EventLoopLagMonitor(settings.LOOP_LAG_SAMPLE_SECONDS)
+
+@timed("fetch_event")
+async def fetch_event_data(event_id: str) -> Optional[Dict[str, Any]]:
     """
-    Fetch event data from database.
-    In a real implementation, this would query the PostGIS database.
+    Fetch event data from the PostGIS events table, through the hot-event cache.
+    Without a configured database (DB_CONN_STRING), a placeholder event is
+    returned so the service can run standalone.
     """
-    # This is a mock implementation
+    if event_repository.enabled:
+        return await event_repository.get(event_id)
+    
     return {
         "id": event_id,
         "title": "Wildfire in Northern California",
@@ -28,13 +46,133 @@ async def fetch_event_data(event_id: str) -> Dict[str, Any]:
         "severity": "high"
     }
 
+def prediction_response(content: Any, accept: Optional[str] = None) -> Response:
+    """
+    Encode a prediction (or list of predictions) with orjson, skipping response
+    model validation. Clients that accept COMPACT_MEDIA_TYPE get polyline-encoded perimeters.
+    """
+    with timed("encode"):
+        if wants_compact(accept):
+            precision = settings.RESPONSE_COORDINATE_PRECISION
+            if isinstance(content, list):
+                content = [compact_prediction(prediction, precision) for prediction in content]
+            else:
+                content = compact_prediction(content, precision)
+            media_type = COMPACT_MEDIA_TYPE
+        else:
+            media_type = "application/json"
+        body = encode_json(content)
+    return Response(body, media_type=media_type, headers={"Vary": "Accept"})
+
+def job_response(job: Dict[str, Any]) -> Response:
+    """
+    Status of a queued prediction: 202 while it is pending, 200 once it has
+    finished without a stored prediction to return (i.e. it failed).
+    """
+    content = {
+        "prediction_id": job["id"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "attempts": job["attempts"],
+        "wait_seconds": job["wait_seconds"],
+        "run_seconds": job["run_seconds"],
+        "error": job["error"],
+        "status_url": f"/predictions/{job['id']}"
+    }
+    status_code = 202 if job["status"] in PENDING_STATES else 200
+    return Response(encode_json(content), status_code=status_code, media_type="application/json")
+
+async def wildfire_event(request: WildfirePredictionRequest, streaming: bool = False) -> Dict[str, Any]:
+    """
+    Check a wildfire prediction request against its model and return the
+    wildfire event it targets, raising HTTPException when either is unsuitable.
+    """
+    if request.model and request.model not in model_registry:
+        raise HTTPException(status_code=400, detail=f"Unknown wildfire model: {request.model}")
+    
+    model = model_registry.get(request.model)
+    if request.ensemble and not model.supports("ensemble"):
+        raise HTTPException(status_code=400, detail=f"Model does not support ensembles: {request.model}")
+    if streaming and request.ensemble:
+        raise HTTPException(status_code=400, detail="Ensemble predictions cannot be streamed")
+    if streaming and not model.supports("streaming"):
+        raise HTTPException(status_code=400, detail=f"Model does not support streaming: {request.model}")
+    
+    event_data = await fetch_event_data(request.event_id)
+    
+    if not event_data:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    if event_data.get("category") != "wildfires":
+        raise HTTPException(status_code=400, detail="Event is not a wildfire")
+    
+    return event_data
+
+def reserve_stream(request: WildfirePredictionRequest) -> Callable[[], None]:
+    """
+    Take a stream slot on the request's model, returning the function that
+    frees it; raises a 503 HTTPException when the model has none left.
+    """
+    model = model_registry.get(request.model)
+    release = model.reserve_stream()
+    if release is None:
+        STREAMS_REJECTED.inc(model.model_name)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Too many concurrent streams for {model.model_name}; retry shortly or use /predict/wildfire",
+            headers={"Retry-After": "5"}
+        )
+    return release
+
+async def server_sent_events(frames: AsyncIterator[Tuple[str, Dict[str, Any]]],
+                             release: Callable[[], None]) -> AsyncIterator[bytes]:
+    """
+    Encode (event name, data) pairs as Server-Sent Events; a failure mid-stream
+    ends it with an "error" event. Frees the stream slot when done.
+    """
+    try:
+        async for name, data in frames:
+            yield b"event: " + name.encode() + b"\ndata: " + encode_json(data) + b"\n\n"
+    except Exception as e:
+        yield b"event: error\ndata: " + encode_json({"detail": f"Prediction failed: {str(e)}"}) + b"\n\n"
+    finally:
+        release()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting AI Inference Service...")
+    await loop_lag_monitor.start()
+    model_registry.load()
+    await model_registry.warm_pools()
+    asset_index.load(
+        infrastructure_path=settings.ASSET_INFRASTRUCTURE_PATH,
+        population_path=settings.ASSET_POPULATION_PATH,
+        cell_size_deg=settings.ASSET_INDEX_CELL_DEG,
+        max_results=settings.AT_RISK_MAX_ASSETS
+    )
+    for dataset, stats in asset_index.build_stats.items():
+        print(f"Indexed {stats['assets']} {dataset} assets in {stats['build_seconds']}s "
+              f"(loaded in {stats['load_seconds']}s, {stats['memory_mb']} MB)")
+    await event_repository.start()
+    await prediction_service.start()
+    await tile_service.start()
+    await alert_matcher.start()
+    if settings.STARTUP_WARMUP:
+        timings = await prediction_service.warm_up()
+        print("Warmed up " + ", ".join(f"{name} in {seconds:.3f}s" for name, seconds in timings.items()))
+    if settings.RESCORE_ENABLED:
+        await rescore_scheduler.start()
     yield
     # Shutdown
+    await rescore_scheduler.close()
+    await alert_matcher.close()
+    await tile_service.close()
+    await prediction_service.close()
+    await event_repository.close()
     await data_fetcher.close_session()
+    model_registry.close()
+    await loop_lag_monitor.close()
     print("AI Inference Service stopped.")
 
 app = FastAPI(
@@ -53,6 +191,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(ServerTimingMiddleware, header=settings.SERVER_TIMING_ENABLED)
 
 @app.get("/")
 async def root():
@@ -63,70 +202,232 @@ async def health():
     return {"status": "healthy", "service": "ai-inference"}
 
 @app.post("/predict/wildfire", response_model=PredictionResponse)
-async def predict_wildfire(request: WildfirePredictionRequest, background_tasks: BackgroundTasks):
+async def predict_wildfire(request: WildfirePredictionRequest,
+                           background_tasks: BackgroundTasks,
+                           run_async: bool = Query(False, alias="async", description="Queue the prediction and return a job to poll"),
+                           accept: Optional[str] = Header(None)):
     """
     Generate a wildfire spread prediction for an event.
+    With async=true the prediction is queued instead and a 202 is returned with
+    its prediction id; poll /predictions/{prediction_id} until it is ready.
     """
     try:
-        # Fetch event data (in real implementation, from database)
-        event_data = await fetch_event_data(request.event_id)
-        
-        if not event_data:
-            raise HTTPException(status_code=404, detail="Event not found")
+        event_data = await wildfire_event(request)
         
-        if event_data.get("category") != "wildfires":
-            raise HTTPException(status_code=400, detail="Event is not a wildfire")
+        if run_async:
+            job = await prediction_service.submit_wildfire(request, event_data)
+            return job_response(job)
         
         # Generate prediction
         prediction = await prediction_service.predict_wildfire(request, event_data)
         
-        return prediction
-        
+        return prediction_response(prediction, accept)
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/predict/wildfire/stream")
+async def stream_wildfire_prediction(request: WildfirePredictionRequest):
+    """
+    Stream a wildfire prediction as Server-Sent Events: an "hour" event with
+    the perimeter, area and spread distance of each forecast hour as soon as
+    it is computed, then a "prediction" event with the stored final prediction.
+    The model only runs a few hours ahead of what the client has read.
+    Answers 503 while the model is serving as many streams as it allows.
+    """
+    event_data = await wildfire_event(request, streaming=True)
+    release = reserve_stream(request)
+    return StreamingResponse(
+        server_sent_events(prediction_service.stream_wildfire(request, event_data), release),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot even if the client left before the body started
+        background=BackgroundTask(release)
+    )
+
+@app.websocket("/predict/wildfire/ws")
+async def stream_wildfire_prediction_ws(websocket: WebSocket):
+    """
+    WebSocket variant of /predict/wildfire/stream: send one
+    WildfirePredictionRequest as JSON, then receive {"event", "data"} messages
+    ("hour" per forecast hour, then "prediction", or "error").
+    """
+    await websocket.accept()
+    try:
+        try:
+            request = WildfirePredictionRequest(**await websocket.receive_json())
+            event_data = await wildfire_event(request, streaming=True)
+            release = reserve_stream(request)
+            try:
+                async for name, data in prediction_service.stream_wildfire(request, event_data):
+                    await websocket.send_text(encode_json({"event": name, "data": data}).decode())
+            finally:
+                release()
+        except HTTPException as e:
+            await websocket.send_text(encode_json({"event": "error", "data": {"detail": e.detail}}).decode())
+        except Exception as e:
+            await websocket.send_text(encode_json({"event": "error", "data": {"detail": f"Prediction failed: {str(e)}"}}).decode())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@app.post("/predict/wildfire/batch", response_model=List[PredictionResponse])
+async def predict_wildfire_batch(request: WildfireBatchPredictionRequest, accept: Optional[str] = Header(None)):
+    """
+    Generate wildfire spread predictions for many events in one vectorized run.
+    Predictions are returned in the same order as the requests.
+    """
+    try:
+        for item in request.requests:
+            if item.model and item.model not in model_registry:
+                raise HTTPException(status_code=400, detail=f"Unknown wildfire model: {item.model}")
+            
+            if item.ensemble and not model_registry.get(item.model).supports("ensemble"):
+                raise HTTPException(status_code=400, detail=f"Model does not support ensembles: {item.model}")
+        
+        events = await asyncio.gather(
+            *(fetch_event_data(item.event_id) for item in request.requests)
+        )
+        
+        for item, event_data in zip(request.requests, events):
+            if not event_data:
+                raise HTTPException(status_code=404, detail=f"Event not found: {item.event_id}")
+            
+            if event_data.get("category") != "wildfires":
+                raise HTTPException(status_code=400, detail=f"Event is not a wildfire: {item.event_id}")
+        
+        predictions = await prediction_service.predict_wildfire_batch(request.requests, list(events))
+        return prediction_response(predictions, accept)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
 @app.get("/predictions/{prediction_id}", response_model=PredictionResponse)
-async def get_prediction(prediction_id: str):
+async def get_prediction(prediction_id: str, accept: Optional[str] = Header(None)):
     """
-    Retrieve a specific prediction by ID.
+    Retrieve a specific prediction by ID, or the status of its job while it is queued.
     """
     prediction = await prediction_service.get_prediction(prediction_id)
-    if not prediction:
+    if prediction:
+        return prediction_response(prediction, accept)
+    
+    job = await prediction_service.get_job(prediction_id)
+    if not job:
         raise HTTPException(status_code=404, detail="Prediction not found")
-    return prediction
+    if job["status"] == SUCCEEDED:
+        # Finished, but the store has not made it readable yet (e.g. a pending batch write)
+        job = {**job, "status": RUNNING}
+    return job_response(job)
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Read a time filter without an offset as UTC, the zone predictions are stored in.
+    """
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
 
 @app.get("/events/{event_id}/predictions", response_model=List[PredictionResponse])
-async def get_event_predictions(event_id: str):
+async def get_event_predictions(
+    event_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    since: Optional[datetime] = Query(None, description="Only predictions generated at or after this time (UTC without an offset)"),
+    until: Optional[datetime] = Query(None, description="Only predictions generated at or before this time (UTC without an offset)"),
+    accept: Optional[str] = Header(None)
+):
     """
-    Retrieve all predictions for a specific event.
+    Retrieve predictions for a specific event, newest first.
     """
-    predictions = await prediction_service.get_event_predictions(event_id)
-    return predictions
+    predictions = await prediction_service.get_event_predictions(
+        event_id, limit=limit, offset=offset, since=as_utc(since), until=as_utc(until)
+    )
+    return prediction_response(predictions, accept)
+
+@app.get("/tiles/{z}/{x}/{y}.mvt")
+async def vector_tile(z: int, x: int, y: int, if_none_match: Optional[str] = Header(None)):
+    """
+    Mapbox Vector Tile of the events (layer "events") and their latest
+    predicted perimeters (layer "perimeters", simplified for the zoom level).
+    Tiles are cached until an event or prediction in them changes; clients
+    revalidate with the ETag.
+    """
+    if not valid_tile(z, x, y):
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    
+    try:
+        tile, etag = await tile_service.get(z, x, y)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Tile generation failed: {str(e)}")
+    
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if if_none_match and etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(tile, media_type="application/vnd.mapbox-vector-tile", headers=headers)
+
+@app.get("/assets")
+async def asset_stats():
+    """
+    Report the loaded at-risk asset datasets with index build time and memory.
+    """
+    return {"loaded": asset_index.loaded, "datasets": asset_index.build_stats}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Prometheus metrics: per-stage and request latency histograms, event loop
+    lag, upstream errors, enrichment outcomes and cache statistics.
+    """
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/events")
+async def event_lookup_stats():
+    """
+    Report event lookup metrics: cache hit rate, pool wait time and query latency.
+    """
+    return event_repository.stats()
+
+@app.get("/metrics/jobs")
+async def job_queue_stats():
+    """
+    Report prediction job queue metrics: depth, running jobs, outcomes and wait time.
+    """
+    return prediction_service.jobs.stats()
+
+@app.get("/metrics/tiles")
+async def tile_cache_stats():
+    """
+    Report vector tile metrics: cache hit rate, invalidations, size and build time.
+    """
+    return tile_service.stats()
+
+@app.get("/metrics/alerts")
+async def alert_stats():
+    """
+    Report alert fan-out metrics: regions indexed, matches and notifications
+    published, and matching latency.
+    """
+    return alert_matcher.stats()
+
+@app.get("/metrics/rescore")
+async def rescore_stats():
+    """
+    Report active wildfire re-scoring metrics: re-scorings performed, skipped
+    and held back by the rate limit, why events were re-scored, and the
+    savings against re-scoring every active event on every pass.
+    """
+    return rescore_scheduler.stats()
 
 @app.get("/models")
 async def list_models():
     """
-    List available prediction models.
+    List available prediction models with their load time and memory.
     """
-    return {
-        "models": [
-            {
-                "id": "wildfire_heuristic",
-                "name": "Wildfire Spread Prediction (Heuristic)",
-                "description": "Heuristic-based wildfire spread prediction model",
-                "version": "1.0.0",
-                "capabilities": ["spread_prediction", "risk_assessment"],
-                "parameters": {
-                    "wind_speed": {"type": "float", "required": True, "description": "Wind speed in km/h"},
-                    "wind_direction": {"type": "float", "required": True, "description": "Wind direction in degrees"},
-                    "vegetation_density": {"type": "float", "required": False, "description": "Vegetation density (0-1)"},
-                    "temperature": {"type": "float", "required": False, "description": "Temperature in Celsius"},
-                    "humidity": {"type": "float", "required": False, "description": "Relative humidity percentage"},
-                    "forecast_hours": {"type": "int", "required": False, "description": "Prediction timeframe in hours"}
-                }
-            }
-        ]
-    }
+    return {"models": model_registry.describe()}
 
 if __name__ == "__main__":
     import uvicorn
@@ -4,6 +4,12 @@ package models
 type Notification struct {
 	ID      string `json:"id"`
 	EventID string `json:"eventId"`
-	Type    string `json:"type"`    // e.g., "new_prediction", "event_update"
+	Type    string `json:"type"` // e.g., "new_prediction", "event_update", "alert_match"
 	Message string `json:"message"`
-}
\ No newline at end of file
+	// Set on alert matches: the subscriber, their alert and the prediction that triggered it
+	UserID       string `json:"userId,omitempty"`
+	AlertID      int    `json:"alertId,omitempty"`
+	PredictionID string `json:"predictionId,omitempty"`
+	Severity     string `json:"severity,omitempty"`
+	Category     string `json:"category,omitempty"`
+}
@@ -66,4 +66,26 @@ CREATE TABLE IF NOT EXISTS user_alerts (
     min_severity VARCHAR(20),
     region GEOGRAPHY(GEOMETRY, 4326),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
\ No newline at end of file
+);
+
+-- Table for model predictions
+CREATE TABLE IF NOT EXISTS predictions (
+    id UUID PRIMARY KEY,
+    event_id VARCHAR(255) NOT NULL, -- Not a foreign key: predictions may be generated before the event is ingested
+    model_type VARCHAR(50) NOT NULL,
+    model_name VARCHAR(100),
+    model_version VARCHAR(50),
+    forecast_hours INTEGER,
+    generated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    confidence REAL,
+    perimeter GEOGRAPHY(GEOMETRY, 4326),
+    result JSONB NOT NULL,
+    metadata JSONB
+);
+
+-- Per-event history lookups, newest first
+CREATE INDEX IF NOT EXISTS predictions_event_generated_idx ON predictions (event_id, generated_at DESC);
+-- Time-based queries and retention
+CREATE INDEX IF NOT EXISTS predictions_generated_idx ON predictions (generated_at DESC);
+-- Spatial queries on predicted perimeters
+CREATE INDEX IF NOT EXISTS predictions_perimeter_idx ON predictions USING GIST (perimeter);